@@ -8,6 +8,9 @@ This ensures that a deploy does not go out which fails *after* the health probes
 import os
 from pathlib import Path
 
+# first, so the import of everything below is included when profiling startup
+from .startup_profile import finish_startup_profile, startup_step  # isort: skip
+
 from structlog_config import LoggerWithContext, configure_logger
 
 from . import constants  # import all constants to trigger build failures
@@ -44,27 +47,33 @@ def setup():
     root = get_root_path()
 
     # log configuration should go first, so any logging is properly outputted downstream
-    log = configure_logger(
-        install_exception_hook=is_productionish(),
-        json_logger=is_productionish(),
-        # prevents any additional reconfiguration, which could cause issues with tests/dev
-        finalize_configuration=is_productionish(),
+    with startup_step("configure_logger"):
+        log = configure_logger(
+            install_exception_hook=is_productionish(),
+            json_logger=is_productionish(),
+            # prevents any additional reconfiguration, which could cause issues with tests/dev
+            finalize_configuration=is_productionish(),
+        )
+
+    configuration_steps = (
+        # debug configuration is first so nice stack traces are in place as soon as possible
+        # signals must come first, otherwise we'll get warnings that signals are already in place
+        configure_signals,
+        configure_debugging,
+        # explicitly order configuration execution in case there are dependencies
+        configure_python,
+        configure_database,
+        configure_openai,
+        configure_sentry,
+        configure_mailer,
+        check_service_versions,
+        configure_patches,
+        configure_posthog,
     )
 
-    # debug configuration is first so nice stack traces are in place as soon as possible
-    # signals must come first, otherwise we'll get warnings that signals are already in place
-    configure_signals()
-    configure_debugging()
-
-    # explicitly order configuration execution in case there are dependencies
-    configure_python()
-    configure_database()
-    configure_openai()
-    configure_sentry()
-    configure_mailer()
-    check_service_versions()
-    configure_patches()
-    configure_posthog()
+    for configure in configuration_steps:
+        with startup_step(configure.__name__):
+            configure()
 
     log.info(
         "application setup",
@@ -87,4 +96,7 @@ setup()
 
 # after configuration is complete, import all models and commands to ensure there are no startup issues
 # NOTE jobs are excluded since they are not required in all process types
-from . import commands, models  # noqa: F401
+with startup_step("import_commands_and_models"):
+    from . import commands, models  # noqa: F401
+
+finish_startup_profile()
@@ -10,11 +10,13 @@ from celery_once import QueueOnce
 
 from activemodel import SessionManager
 from activemodel.celery import register_celery_typeid_encoder
-from activemodel.session_manager import global_session
 
 from . import log, root
-from .configuration.redis import redis_url
+from .configuration.database_instrumentation import task_global_session
+from .configuration.database_replica import dispose_read_replica_engine
+from .configuration.redis import redis_pool_settings, redis_url
 from .configuration.sentry import configure_sentry
+from .helpers.facebook_batcher import flush_batchers
 
 # https://github.com/sbdchd/celery-types
 Task.__class_getitem__ = classmethod(lambda cls, *args, **kwargs: cls)  # type: ignore[attr-defined]
@@ -30,7 +32,7 @@ class DBSessionTask(Task):
     abstract = True
 
     def __call__(self, *args, **kwargs):
-        with global_session():
+        with task_global_session(self.name):
             return super().__call__(*args, **kwargs)
 
 
@@ -42,7 +44,7 @@ class QueueOnceWithDBSessionTask(QueueOnce):
     abstract = True
 
     def __call__(self, *args, **kwargs):
-        with global_session():
+        with task_global_session(self.name):
             return super().__call__(*args, **kwargs)
 
 
@@ -103,13 +105,22 @@ celery_app = Celery(
 @signals.worker_process_init.connect(weak=False)
 def init_worker(**kwargs):
     # Ensure engine is created per process
-    SessionManager.get_instance().get_engine()
+    engine = SessionManager.get_instance().get_engine()
+
+    # connections opened by the parent before forking (migrations, version checks) must not be shared with the
+    # child, `close=False` leaves them open for the parent and gives the child an empty pool
+    engine.dispose(close=False)
+    dispose_read_replica_engine(close=False)
 
 
 @signals.worker_process_shutdown.connect
 def shutdown_worker(**kwargs):
     # Dispose engine pool per process
     SessionManager.get_instance().get_engine().dispose()
+    dispose_read_replica_engine()
+
+    # prefork children exit with `os._exit`, which skips the `atexit` flush
+    flush_batchers()
 
 
 # ensures all job classes are available to celery and avoids circular imports
@@ -119,6 +130,19 @@ celery_app.autodiscover_tasks(["app.jobs"])
 # endpoint for running a TCP healthcheck on the container
 celery_healthcheck.register(celery_app)
 
+# celery, celery_once and redbeat create their own redis clients, this applies the app pool settings to celery's.
+# The broker pool is per process, and the result backend pool shares the same limits.
+redis_settings = redis_pool_settings()
+celery_app.conf.broker_transport_options = redis_settings.celery_transport_options()
+celery_app.conf.redis_max_connections = redis_settings.max_connections
+celery_app.conf.redis_socket_timeout = redis_settings.socket_timeout
+celery_app.conf.redis_socket_connect_timeout = redis_settings.socket_connect_timeout
+celery_app.conf.redis_socket_keepalive = redis_settings.socket_keepalive
+celery_app.conf.redis_retry_on_timeout = redis_settings.retry_on_timeout
+celery_app.conf.redis_backend_health_check_interval = (
+    redis_settings.health_check_interval
+)
+
 # define a hard timeout to limit infinitely running processes
 # 35m is an arbitrary number, but should be long enough to handle most tasks
 celery_app.conf.task_time_limit = 60 * 35
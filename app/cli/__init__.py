@@ -1,4 +1,6 @@
 import json
+from pathlib import Path
+from typing import Annotated
 
 import typer
 
@@ -106,6 +108,15 @@ def dump_openapi(
     typer.echo(json.dumps(schema))
 
 
+@app.command()
+def write_autoimport_manifest():
+    "record the submodules of each auto-imported package, see `autoimport_submodules`"
+
+    from app.setup import write_autoimport_manifest
+
+    write_autoimport_manifest()
+
+
 @app.command()
 def routes():
     "output list of routes available in the application"
@@ -123,6 +134,80 @@ def routes():
             typer.echo(f"unsupported route: {ctx.original_route}")
 
 
+@app.command()
+def benchmark_middleware(
+    iterations: int = typer.Option(1000, help="Measured requests per route"),
+    warmup: int = typer.Option(100, help="Unmeasured requests per route"),
+):
+    "measure the per-request latency and allocation cost of each middleware layer"
+
+    from app.commands.benchmark_middleware import layer_costs, perform
+
+    results = perform(iterations=iterations, warmup=warmup)
+
+    typer.echo(
+        f"{'configuration':<20} {'path':<24} {'p50 us':>10} {'p95 us':>10} {'bytes':>10}"
+    )
+    for result in results:
+        typer.echo(
+            f"{result.configuration:<20} {result.path:<24} {result.p50_us:>10.1f} {result.p95_us:>10.1f} {result.allocated_bytes:>10}"
+        )
+
+    typer.echo(f"\n{'layer':<20} {'path':<24} {'p50 us':>10} {'bytes':>10}")
+    for cost in layer_costs(results):
+        typer.echo(
+            f"{cost.layer:<20} {cost.path:<24} {cost.latency_us:>10.1f} {cost.allocated_bytes:>10}"
+        )
+
+
+@app.command()
+def profile_startup(
+    module: str = typer.Option("app", help="Module to import, e.g. app.celery"),
+    lazy_clients: bool = typer.Option(False, help="Construct API clients on first use"),
+    limit: int = typer.Option(25, help="Number of slowest modules to list"),
+):
+    "measure the wall time and import cost of each startup step and module"
+
+    from app.commands.profile_startup import perform
+
+    report = perform(module=module, lazy_clients=lazy_clients)
+
+    typer.echo(f"{'step':<32} {'wall ms':>10} {'import ms':>10} {'modules':>8}")
+    for step in report.steps:
+        typer.echo(
+            f"{step.name:<32} {step.wall_seconds * 1000:>10.1f} {step.import_seconds * 1000:>10.1f} {step.modules_imported:>8}"
+        )
+
+    typer.echo(f"\n{'module':<48} {'self ms':>10} {'total ms':>10}")
+    for module_import in report.modules[:limit]:
+        typer.echo(
+            f"{module_import.name:<48} {module_import.self_seconds * 1000:>10.1f} {module_import.cumulative_seconds * 1000:>10.1f}"
+        )
+
+    typer.echo(f"\ntotal: {report.total_seconds * 1000:.1f}ms")
+
+
+@app.command()
+def build_geoip_database(
+    blocks: Annotated[
+        list[Path], typer.Argument(help="GeoLite2 City blocks CSVs (IPv4 and IPv6)")
+    ],
+    locations: Annotated[Path, typer.Option(help="GeoLite2 City locations CSV")],
+    output: Annotated[Path, typer.Option(help="Database file to write")] = Path(
+        "tmp/geoip.db"
+    ),
+):
+    "build the local geoip database used when GEOIP_DATABASE_PATH is set"
+
+    from app.commands.build_geoip_database import perform
+
+    range_count = perform(
+        blocks_paths=blocks, locations_path=locations, output_path=output
+    )
+
+    typer.echo(f"wrote {range_count} ranges to {output}")
+
+
 @app.command()
 def migrate():
     """
@@ -0,0 +1,165 @@
+"""
+Measure the per-request overhead of each middleware layer added by `add_middleware`.
+
+The full application is built once with every layer, once with no middleware, and once with each layer removed. The
+cost of a layer is the difference between the full stack and the stack without that layer, which accounts for
+interactions between layers (e.g. the access logger depends on the context created by the request pipeline).
+
+Requests are driven in-process through the ASGI interface, so no sockets, proxies, or uvicorn parsing are included in
+the numbers. Both a sync (`/ping`, run in the threadpool) and async (`/aping`) route are measured.
+
+Latency and allocations are measured in separate passes since `tracemalloc` slows down every allocation.
+
+>>> python -m app.cli benchmark-middleware --iterations 2000
+"""
+
+import asyncio
+import statistics
+import time
+import tracemalloc
+from collections.abc import Collection
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from app import log
+
+BENCHMARK_PATHS = ("/unauthenticated/ping", "/unauthenticated/aping")
+
+FULL_STACK = "full"
+NO_MIDDLEWARE = "none"
+
+
+class MiddlewareBenchmark(BaseModel):
+    configuration: str
+    "`full`, `none`, or `-<layer>` when a single layer is removed"
+    path: str
+    iterations: int
+    mean_us: float
+    p50_us: float
+    p95_us: float
+    allocated_bytes: int
+    "average peak memory allocated while handling a single request"
+
+
+class LayerCost(BaseModel):
+    layer: str
+    path: str
+    latency_us: float
+    allocated_bytes: int
+
+
+def _build_app(skip: Collection[str]) -> FastAPI:
+    from app.server import build_api_app
+
+    return build_api_app(skip_middleware=skip)  # type: ignore[arg-type]
+
+
+async def _measure(
+    app: FastAPI, configuration: str, path: str, iterations: int, warmup: int
+) -> MiddlewareBenchmark:
+    from httpx2 import ASGITransport, AsyncClient
+
+    from app.routes.middleware import allowed_hosts
+
+    host = allowed_hosts(False)[0]
+    origin = allowed_hosts(True)[0]
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url=f"https://{host}",
+        headers={"Origin": origin},
+    ) as client:
+
+        async def request() -> None:
+            response = await client.get(path)
+            assert response.status_code == 200, (
+                f"{configuration} {path} returned {response.status_code}"
+            )
+
+        for _ in range(warmup):
+            await request()
+
+        timings: list[float] = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await request()
+            timings.append(time.perf_counter() - start)
+
+        # the client and transport allocations are included, but are identical across configurations
+        allocation_iterations = max(iterations // 10, 1)
+        allocated = 0
+
+        tracemalloc.start()
+        try:
+            for _ in range(allocation_iterations):
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                await request()
+                _, peak = tracemalloc.get_traced_memory()
+                allocated += peak - baseline
+        finally:
+            tracemalloc.stop()
+
+    return MiddlewareBenchmark(
+        configuration=configuration,
+        path=path,
+        iterations=iterations,
+        mean_us=statistics.fmean(timings) * 1_000_000,
+        p50_us=statistics.median(timings) * 1_000_000,
+        p95_us=statistics.quantiles(timings, n=20)[-1] * 1_000_000,
+        allocated_bytes=allocated // allocation_iterations,
+    )
+
+
+def layer_costs(results: list[MiddlewareBenchmark]) -> list[LayerCost]:
+    "cost of each layer, computed as the difference between the full stack and the stack without that layer"
+
+    by_key = {(result.configuration, result.path): result for result in results}
+    costs: list[LayerCost] = []
+
+    for result in results:
+        if not result.configuration.startswith("-"):
+            continue
+
+        full = by_key[(FULL_STACK, result.path)]
+        costs.append(
+            LayerCost(
+                layer=result.configuration.removeprefix("-"),
+                path=result.path,
+                latency_us=full.p50_us - result.p50_us,
+                allocated_bytes=full.allocated_bytes - result.allocated_bytes,
+            )
+        )
+
+    return costs
+
+
+async def _run(iterations: int, warmup: int) -> list[MiddlewareBenchmark]:
+    from app.routes.middleware import MIDDLEWARE_LAYERS
+
+    configurations: list[tuple[str, Collection[str]]] = [
+        (FULL_STACK, ()),
+        (NO_MIDDLEWARE, MIDDLEWARE_LAYERS),
+        *((f"-{layer}", (layer,)) for layer in MIDDLEWARE_LAYERS),
+    ]
+
+    results: list[MiddlewareBenchmark] = []
+
+    for configuration, skip in configurations:
+        app = _build_app(skip)
+
+        for path in BENCHMARK_PATHS:
+            result = await _measure(app, configuration, path, iterations, warmup)
+            log.info("middleware benchmark", **result.model_dump())
+            results.append(result)
+
+    return results
+
+
+def perform(iterations: int = 1000, warmup: int = 100) -> list[MiddlewareBenchmark]:
+    assert iterations >= 2, (
+        "at least two iterations are required to compute percentiles"
+    )
+
+    return asyncio.run(_run(iterations, warmup))
@@ -0,0 +1,67 @@
+"""
+Build the local geoip database (see `app.utils.geoip_database`) from the MaxMind GeoLite2 City CSV export.
+
+>>> python -m app.cli build-geoip-database \\
+>>>     GeoLite2-City-Blocks-IPv4.csv GeoLite2-City-Blocks-IPv6.csv \\
+>>>     --locations GeoLite2-City-Locations-en.csv --output tmp/geoip.db
+"""
+
+import csv
+import itertools
+from collections.abc import Iterator
+from pathlib import Path
+
+from app.utils.geoip import GeoIPLocation
+from app.utils.geoip_database import write_geoip_database
+
+
+def _optional_int(value: str) -> int | None:
+    return int(value) if value else None
+
+
+def _read_locations(locations_path: Path) -> dict[str, dict[str, str]]:
+    with locations_path.open(newline="", encoding="utf-8") as f:
+        return {row["geoname_id"]: row for row in csv.DictReader(f)}
+
+
+def _read_ranges(
+    blocks_path: Path, locations: dict[str, dict[str, str]]
+) -> Iterator[tuple[str, GeoIPLocation]]:
+    with blocks_path.open(newline="", encoding="utf-8") as f:
+        for block in csv.DictReader(f):
+            # a few blocks are only known at the country level, without coordinates there is nothing to bias with
+            if not block["latitude"] or not block["longitude"]:
+                continue
+
+            geoname_id = block["geoname_id"] or block["registered_country_geoname_id"]
+            place = locations.get(geoname_id, {})
+
+            yield (
+                block["network"],
+                GeoIPLocation(
+                    country=place.get("country_iso_code") or None,
+                    stateprov=place.get("subdivision_1_name") or None,
+                    stateprovCode=place.get("subdivision_1_iso_code") or None,
+                    city=place.get("city_name") or None,
+                    latitude=float(block["latitude"]),
+                    longitude=float(block["longitude"]),
+                    continent=place.get("continent_code") or None,
+                    timezone=place.get("time_zone") or None,
+                    usMetroCode=_optional_int(place.get("metro_code", "")),
+                    accuracyRadius=_optional_int(block["accuracy_radius"]),
+                ),
+            )
+
+
+def perform(blocks_paths: list[Path], locations_path: Path, output_path: Path) -> int:
+    "write the database to `output_path`, returns the number of ranges written"
+
+    locations = _read_locations(locations_path)
+    # millions of rows, streamed into the writer instead of building a list of models first
+    ranges = itertools.chain.from_iterable(
+        _read_ranges(blocks_path, locations) for blocks_path in blocks_paths
+    )
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    return write_geoip_database(output_path, ranges)
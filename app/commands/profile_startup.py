@@ -0,0 +1,47 @@
+"""
+Profile application startup in a fresh interpreter, see `app.startup_profile`.
+
+The current process has already imported (and cached) everything, so the profile is taken in a child process which
+only imports `module`. Import `app.celery` or `app.server` to include the worker or web server startup.
+
+>>> python -m app.cli profile-startup --module app.celery --lazy-clients
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from app.startup_profile import (
+    STARTUP_PROFILE_ENV,
+    STARTUP_PROFILE_OUTPUT_ENV,
+    ModuleImport,
+    StartupReport,
+    StartupStep,
+)
+
+
+def perform(module: str = "app", lazy_clients: bool = False) -> StartupReport:
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = Path(directory) / "startup_profile.json"
+
+        subprocess.run(
+            [sys.executable, "-c", f"import {module}"],
+            env=os.environ
+            | {
+                STARTUP_PROFILE_ENV: "true",
+                STARTUP_PROFILE_OUTPUT_ENV: str(output_path),
+                "LAZY_CLIENTS": "true" if lazy_clients else "false",
+            },
+            check=True,
+        )
+
+        raw_report = json.loads(output_path.read_text())
+
+    return StartupReport(
+        total_seconds=raw_report["total_seconds"],
+        steps=[StartupStep(**step) for step in raw_report["steps"]],
+        modules=[ModuleImport(**entry) for entry in raw_report["modules"]],
+    )
@@ -1,16 +1,27 @@
-from clerk_backend_api import Clerk
+from typing import TYPE_CHECKING
 
 from app.env import env
 from app.environments import is_debug_logging
+from app.utils.lazy import lazy_client
+
+if TYPE_CHECKING:
+    from clerk_backend_api import Clerk
 
 CLERK_PRIVATE_KEY = env.str("CLERK_PRIVATE_KEY")
 
-# we lose the typing with this approach, but
-clerk_kwargs = {}
 
-if is_debug_logging():
-    import logging
+def _build_clerk() -> Clerk:
+    from clerk_backend_api import Clerk
+
+    # we lose the typing with this approach, but
+    clerk_kwargs = {}
+
+    if is_debug_logging():
+        import logging
+
+        clerk_kwargs["debug_logger"] = logging.getLogger("app.clerk")
+
+    return Clerk(bearer_auth=CLERK_PRIVATE_KEY, **clerk_kwargs)
 
-    clerk_kwargs["debug_logger"] = logging.getLogger("app.clerk")
 
-clerk = Clerk(bearer_auth=CLERK_PRIVATE_KEY, **clerk_kwargs)
+clerk = lazy_client(_build_clerk)
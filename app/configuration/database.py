@@ -1,4 +1,4 @@
-from app.env import env
+from app.env import env, loose_env
 
 import activemodel
 from activemodel.session_manager import get_engine
@@ -6,18 +6,32 @@ from sqlmodel import SQLModel
 
 from ..environments import is_development, is_testing
 from ..setup import get_root_path
+from .database_instrumentation import configure_query_instrumentation
+from .database_pool import detect_pool_profile, engine_options
 
 
-def database_url():
+def database_url(direct: bool = False):
     """
     This is also used by alembic logic as well, which is why it's extracted out
+
+    When a transaction pooler (PgBouncer) is configured, the application connects through it. `direct=True` always
+    connects to postgres itself, which is required for anything relying on session state, like the migration advisory
+    lock in `migrations/env.py`.
     """
 
-    if is_testing():
+    if not direct and (pooler_url := database_pooler_url()):
+        url = pooler_url
+    elif is_testing():
         url = env.str("TEST_DATABASE_URL")
     else:
         url = env.str("DATABASE_URL")
 
+    return normalize_database_url(url)
+
+
+def normalize_database_url(url: str) -> str:
+    "use the psycopg (v3) dialect for any postgres URL"
+
     # some environments (dokku) specify the DATABASE_URL as postgres://
     url = url.replace("postgres://", "postgresql://")
 
@@ -32,10 +46,29 @@ def database_url():
     return url
 
 
+def database_pooler_url() -> str | None:
+    "optional PgBouncer (or compatible) URL running in transaction pooling mode"
+
+    if is_testing():
+        return loose_env.str("TEST_DATABASE_POOLER_URL")
+
+    return loose_env.str("DATABASE_POOLER_URL")
+
+
+def is_transaction_pooling() -> bool:
+    """
+    A transaction pooler hands each transaction to whichever server connection is free, so nothing which outlives a
+    transaction can be relied on: server-side prepared statements, `SET` (use `SET LOCAL`), advisory session locks,
+    `LISTEN`, temporary tables, or startup parameters like `options`.
+    """
+
+    return database_pooler_url() is not None
+
+
 def configure_database():
     """
-    The only configuration passed to active model, for now this project is tightly coupled
-    so the defaults are exactly what we want.
+    Configure active model with the connection pool profile for this process type, see `database_pool.py`, and
+    instrument queries, see `database_instrumentation.py`.
     """
 
     # initialize before running migrations since the migration may need to use the database
@@ -43,7 +76,14 @@ def configure_database():
     # we need to have this set in order to use those (at least, for now).
     # TODO we should consider setting `init` manually in each migration that needs this and understand if running this
     # before a migration will cause an issue...
-    activemodel.init(database_url())
+    configure_query_instrumentation()
+
+    activemodel.init(
+        database_url(),
+        engine_options=engine_options(
+            detect_pool_profile(), transaction_pooling=is_transaction_pooling()
+        ),
+    )
 
 
 def create_db_and_tables():
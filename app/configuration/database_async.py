@@ -0,0 +1,110 @@
+"""
+Async query path (psycopg's async driver), so `async def` routes can query without a threadpool hop.
+
+Sync routes and dependencies run in the AnyIO threadpool, which is limited to 40 threads by default. That caps the
+number of concurrent requests per worker, and every hop adds latency. Async routes should use the async helpers on
+models (see `app.models.mixins.AsyncQueryMixin`) or `get_async_session()` directly, which run on the event loop.
+
+- The async engine has its own pool, sized by the same profile as the sync engine (`database_pool.py`). It is created
+  on first use, so processes which never use it (celery workers, CLI) never open it. The server disposes it on
+  shutdown (see `app.server.lifespan`).
+- `aglobal_async_session` is the async counterpart of `aglobal_session`, sharing one session across a request.
+- Objects loaded through the async session must not be lazy loaded, use `selectinload` for relationships.
+- The sync global session (and the test transaction) is separate. Tests using the async path set
+  `async_session_connection` to a connection whose transaction is rolled back, like activemodel's
+  `session_connection`.
+"""
+
+import contextlib
+from collections.abc import AsyncIterator
+from contextvars import ContextVar
+
+from activemodel.session_manager import _serialize_pydantic_model
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .database import database_url, is_transaction_pooling
+from .database_pool import detect_pool_profile, engine_options
+
+_engine: AsyncEngine | None = None
+
+async_session_connection: AsyncConnection | None = None
+"optionally bind every async session to this connection, for tests"
+
+_async_session_context = ContextVar[AsyncSession | None](
+    "async_session_context", default=None
+)
+
+
+def get_async_engine() -> AsyncEngine:
+    global _engine
+
+    # no lock, creating the engine does not await so it can't be interleaved on the event loop
+    if _engine is None:
+        _engine = create_async_engine(
+            database_url(),
+            # JSONB columns holding pydantic models, same as the activemodel engine
+            json_serializer=_serialize_pydantic_model,
+            **engine_options(
+                detect_pool_profile(),
+                transaction_pooling=is_transaction_pooling(),
+                asyncio=True,
+            ),
+        )
+
+    return _engine
+
+
+async def dispose_async_engine() -> None:
+    "pooled connections belong to the event loop which opened them, dispose before that loop closes"
+
+    global _engine
+
+    if _engine is not None:
+        await _engine.dispose()
+
+    _engine = None
+
+
+@contextlib.asynccontextmanager
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    "get an async database session, respecting the global async session"
+
+    if session := _async_session_context.get():
+        yield session
+        return
+
+    if async_session_connection is not None:
+        # commits release a savepoint, the outer transaction is rolled back by the test
+        async with AsyncSession(
+            bind=async_session_connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        ) as session:
+            yield session
+
+        return
+
+    # attributes are not refreshed after commit, refreshing would be an implicit (and forbidden) async lazy load
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+
+async def aglobal_async_session():
+    """
+    Use this as a fastapi dependency to share an async session across the request, like `aglobal_session`:
+
+    >>> @router.get("/users", dependencies=[Depends(aglobal_async_session)])
+    >>> async def users(): ...
+    """
+
+    if _async_session_context.get() is not None:
+        raise RuntimeError("global async session already set")
+
+    async with get_async_session() as session:
+        token = _async_session_context.set(session)
+
+        try:
+            yield
+        finally:
+            _async_session_context.reset(token)
@@ -0,0 +1,170 @@
+"""
+Count the statements, database time, and duplicate statements (N+1 queries) of each request and celery task.
+
+Tracking is tied to the global session lifecycle: `app.routes.dependencies.database.instrumented_global_session` for
+requests, `task_global_session` for celery tasks. The counts are added to the log context (the starlette context on
+the web side, structlog context vars on the job side) so the access log and task logs include them, and a warning is
+logged when a request or task goes over `DATABASE_QUERY_BUDGET` statements or `DATABASE_DUPLICATE_QUERY_BUDGET`
+duplicates.
+
+Statements are compared by their SQL, without parameters, so loading the same relationship for every row in a loop
+shows up as duplicates. Slow statements are logged everywhere, including outside of a request or task.
+"""
+
+import contextlib
+from collections import Counter
+from collections.abc import Iterator, MutableMapping
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any
+
+from app.env import env
+
+from activemodel.session_manager import global_session
+from sqlalchemy import Engine, event
+
+DATABASE_QUERY_BUDGET = env.int("DATABASE_QUERY_BUDGET", 25)
+"statements a single request or task should stay under"
+
+DATABASE_DUPLICATE_QUERY_BUDGET = env.int("DATABASE_DUPLICATE_QUERY_BUDGET", 5)
+"repeated executions of the same SQL a single request or task should stay under"
+
+DATABASE_SLOW_QUERY_MS = env.int("DATABASE_SLOW_QUERY_MS", 500)
+
+LOGGED_STATEMENT_LENGTH = 500
+
+_QUERY_START_TIME_ATTRIBUTE = "_query_start_time"
+"""
+set on the execution context, which exists for a single statement. A statement which raises never reaches
+`after_cursor_execute`, and its start time is released along with its context instead of building up on the connection.
+"""
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    seconds: float = 0.0
+    statement_counts: Counter[str] = field(default_factory=Counter)
+    log_context: MutableMapping[str, Any] | None = None
+    "kept up to date with `log_fields()` after every statement, so logs emitted mid-request include the counts"
+
+    @property
+    def duplicate_statements(self) -> int:
+        return sum(count - 1 for count in self.statement_counts.values() if count > 1)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.seconds += seconds
+        self.statement_counts[statement] += 1
+
+        if self.log_context is not None:
+            self.log_context.update(self.log_fields())
+
+    def log_fields(self) -> dict[str, Any]:
+        return {
+            "db_queries": self.statements,
+            "db_time_ms": round(self.seconds * 1000, 1),
+            "db_duplicate_queries": self.duplicate_statements,
+        }
+
+    def is_over_budget(self) -> bool:
+        return (
+            self.statements > DATABASE_QUERY_BUDGET
+            or self.duplicate_statements > DATABASE_DUPLICATE_QUERY_BUDGET
+        )
+
+
+_query_stats = ContextVar[QueryStats | None]("query_stats", default=None)
+"""
+Stats for the current request or task. Sync routes run in a threadpool with a copy of the request context, which
+still points to the same `QueryStats` instance.
+"""
+
+
+def _truncate(statement: str) -> str:
+    return statement[:LOGGED_STATEMENT_LENGTH]
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    setattr(context, _QUERY_START_TIME_ATTRIBUTE, perf_counter())
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    seconds = perf_counter() - getattr(context, _QUERY_START_TIME_ATTRIBUTE)
+
+    if (stats := _query_stats.get()) is not None:
+        stats.record(statement, seconds)
+
+    if seconds * 1000 >= DATABASE_SLOW_QUERY_MS:
+        # import during execution to avoid circular imports, engines are created during setup()
+        from app import log
+
+        log.warning(
+            "slow database query",
+            duration_ms=round(seconds * 1000, 1),
+            statement=_truncate(statement),
+        )
+
+
+def configure_query_instrumentation() -> None:
+    "instrument every engine, including the read replica and migration engines"
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextlib.contextmanager
+def track_queries(
+    log_context: MutableMapping[str, Any] | None = None,
+) -> Iterator[QueryStats]:
+    "collect stats for the statements executed within this block, nested blocks are counted by the innermost only"
+
+    stats = QueryStats(log_context=log_context)
+    token = _query_stats.set(stats)
+
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def log_query_budget(stats: QueryStats, **log_fields: Any) -> None:
+    "warn when the request or task went over its query budget"
+
+    if not stats.is_over_budget():
+        return
+
+    from app import log
+
+    most_repeated, repeated_count = stats.statement_counts.most_common(1)[0]
+
+    log.warning(
+        "database query budget exceeded",
+        **stats.log_fields(),
+        db_query_budget=DATABASE_QUERY_BUDGET,
+        db_duplicate_query_budget=DATABASE_DUPLICATE_QUERY_BUDGET,
+        most_repeated_statement=_truncate(most_repeated),
+        most_repeated_count=repeated_count,
+        **log_fields,
+    )
+
+
+@contextlib.contextmanager
+def task_global_session(task_name: str) -> Iterator[None]:
+    "`global_session` for a celery task, with its statements added to the task log context"
+
+    from app import log
+
+    with track_queries() as stats, global_session():
+        try:
+            yield
+        finally:
+            # `on_task_postrun` clears the context after celery logs the task result
+            log.local(**stats.log_fields())
+            log_query_budget(stats, celery_task_name=task_name)
@@ -0,0 +1,309 @@
+"""
+Connection pool profiles per process type, and pool metrics.
+
+Every process used to get the library default pool (5 + 10 overflow). Each prefork celery child is a separate process
+with its own pool, so a worker with 8 children could hold 120 connections while only running 8 tasks, and we would hit
+`max_connections`. Each process type now gets a pool shaped for its concurrency:
+
+- `web`: sync routes run in the anyio threadpool, so many requests hold a connection at the same time
+- `worker`: a prefork child runs one task at a time
+- `beat`: only enqueues tasks
+- `cli`: one-off commands and other celery commands (flower, inspect), no statement timeout so long running
+  maintenance is not interrupted
+- `test`: unit tests run inside a single transaction, integration tests run a separate server process
+
+The profile is detected from the process (see `detect_pool_profile`) and can be overridden with `DATABASE_POOL_PROFILE`.
+
+Pool metrics (checkout wait, saturation, connection age) are tracked by `InstrumentedQueuePool`, available in-process
+via `database_pool_metrics()`, and logged every `POOL_METRICS_LOG_INTERVAL_SECONDS` while the pool is in use so they can
+be graphed from the logs of every process type.
+"""
+
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from time import monotonic, perf_counter
+from typing import Any, Literal, get_args
+
+from pydantic import BaseModel, ConfigDict
+
+from app.env import env
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    ConnectionPoolEntry,
+    PoolProxiedConnection,
+    QueuePool,
+)
+
+from ..environments import is_testing
+
+type PoolProfileName = Literal["web", "worker", "beat", "cli", "test"]
+
+POOL_PROFILE_NAMES: tuple[PoolProfileName, ...] = get_args(PoolProfileName.__value__)
+
+POOL_METRICS_LOG_INTERVAL_SECONDS = 60
+
+SLOW_CHECKOUT_SECONDS = 0.5
+"a checkout waiting this long means the pool is too small for the process concurrency, logged as a warning"
+
+CHECKOUT_WAIT_SAMPLES = 1000
+"number of recent checkout waits kept to compute percentiles"
+
+
+class PoolProfile(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    pool_size: int
+    "connections kept open once created"
+    max_overflow: int
+    "additional connections opened under load, closed when returned"
+    pool_timeout: float = 30
+    "seconds to wait for a connection before raising"
+    pool_pre_ping: bool = True
+    "test connections on checkout, so connections dropped by the server (restarts, idle timeouts) are replaced"
+    pool_recycle: int = 30 * 60
+    "seconds before a connection is replaced, below the idle timeout of load balancers and poolers"
+    statement_timeout_ms: int | None = None
+    "postgres `statement_timeout` set on each connection, None to use the server default"
+    prepare_threshold: int | None = 5
+    "executions before psycopg prepares a statement server-side, None disables prepared statements"
+
+
+POOL_PROFILES: dict[PoolProfileName, PoolProfile] = {
+    "web": PoolProfile(pool_size=10, max_overflow=10, statement_timeout_ms=30_000),
+    "worker": PoolProfile(
+        pool_size=1, max_overflow=2, statement_timeout_ms=5 * 60 * 1000
+    ),
+    "beat": PoolProfile(pool_size=1, max_overflow=0, statement_timeout_ms=30_000),
+    "cli": PoolProfile(pool_size=1, max_overflow=2),
+    "test": PoolProfile(pool_size=5, max_overflow=10),
+}
+
+
+def detect_pool_profile() -> PoolProfileName:
+    if profile := env.str("DATABASE_POOL_PROFILE", None):
+        assert profile in POOL_PROFILE_NAMES, (
+            f"DATABASE_POOL_PROFILE must be one of {POOL_PROFILE_NAMES}"
+        )
+        return profile  # type: ignore[return-value]
+
+    if is_testing():
+        return "test"
+
+    # setup() runs on import, before celery or uvicorn have parsed their arguments, so the command line is inspected
+    program = Path(sys.argv[0]).name if sys.argv else ""
+
+    if program == "celery":
+        # `worker --beat` runs beat inside the worker process, which still needs a worker pool
+        if "worker" in sys.argv:
+            return "worker"
+
+        if "beat" in sys.argv:
+            return "beat"
+
+        # flower, inspect, purge, etc do not run tasks
+        return "cli"
+
+    if program in ("main.py", "uvicorn", "fastapi"):
+        return "web"
+
+    return "cli"
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    `QueuePool` which records checkout waits, timeouts, and connection ages. `dispose()` replaces the pool, so metrics
+    start over, e.g. in a forked celery child.
+
+    `profile` is set on a subclass by `for_profile`, since `create_engine` only passes pool arguments it knows about.
+    """
+
+    profile_name: PoolProfileName
+    profile: PoolProfile
+
+    @classmethod
+    def for_profile(
+        cls, name: PoolProfileName, profile: PoolProfile, asyncio: bool = False
+    ) -> type[InstrumentedQueuePool]:
+        # async engines require an asyncio-compatible queue, which `AsyncAdaptedQueuePool` provides
+        bases = (cls, AsyncAdaptedQueuePool) if asyncio else (cls,)
+        kind = "Async" if asyncio else ""
+
+        return type(
+            f"{name.capitalize()}{kind}QueuePool",
+            bases,
+            {"profile_name": name, "profile": profile},
+        )
+
+    def __init__(self, creator: Any, **kwargs: Any):
+        # activemodel always enables pre-ping, the profile decides
+        kwargs["pre_ping"] = self.profile.pool_pre_ping
+        super().__init__(creator, **kwargs)
+
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_waits: deque[float] = deque(maxlen=CHECKOUT_WAIT_SAMPLES)
+        self.connected_at: dict[int, float] = {}
+        self.metrics_logged_at = monotonic()
+        self.metrics_lock = threading.Lock()
+
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "close", self._on_close)
+        event.listen(self, "close_detached", self._on_close_detached)
+
+    def _on_connect(self, dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        self.connected_at[id(dbapi_connection)] = monotonic()
+
+    def _on_close(self, dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        self.connected_at.pop(id(dbapi_connection), None)
+
+    def _on_close_detached(self, dbapi_connection: Any) -> None:
+        self.connected_at.pop(id(dbapi_connection), None)
+
+    def connect(self) -> PoolProxiedConnection:
+        # the `checkout` event fires once a connection is obtained, so the wait is timed around the public entry point.
+        # It includes pre-ping and opening new connections, which are part of what a checkout costs the caller.
+        start = perf_counter()
+
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            with self.metrics_lock:
+                self.checkout_timeouts += 1
+
+            _log_pool_metrics("database pool checkout timed out", self, warning=True)
+            raise
+
+        wait = perf_counter() - start
+
+        with self.metrics_lock:
+            self.checkouts += 1
+            self.checkout_waits.append(wait)
+
+            log_metrics = (
+                monotonic() - self.metrics_logged_at
+                >= POOL_METRICS_LOG_INTERVAL_SECONDS
+            )
+            if log_metrics:
+                self.metrics_logged_at = monotonic()
+
+        if wait >= SLOW_CHECKOUT_SECONDS:
+            _log_pool_metrics("slow database pool checkout", self, warning=True)
+        elif log_metrics:
+            _log_pool_metrics("database pool metrics", self)
+
+        return connection
+
+
+class DatabasePoolMetrics(BaseModel):
+    profile: str
+    pool_size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    saturation: float
+    "checked out connections / maximum connections"
+    checkouts: int
+    checkout_timeouts: int
+    checkout_wait_p50_ms: float
+    checkout_wait_p95_ms: float
+    checkout_wait_max_ms: float
+    "over the last `CHECKOUT_WAIT_SAMPLES` checkouts"
+    open_connections: int
+    oldest_connection_age_seconds: float
+
+
+def pool_metrics(pool: InstrumentedQueuePool) -> DatabasePoolMetrics:
+    with pool.metrics_lock:
+        waits = sorted(pool.checkout_waits)
+        checkouts = pool.checkouts
+        checkout_timeouts = pool.checkout_timeouts
+
+    connected_at = list(pool.connected_at.values())
+    now = monotonic()
+
+    max_connections = pool.profile.pool_size + pool.profile.max_overflow
+    checked_out = pool.checkedout()
+
+    def percentile_ms(quantile: float) -> float:
+        if not waits:
+            return 0.0
+
+        return waits[min(int(len(waits) * quantile), len(waits) - 1)] * 1000
+
+    return DatabasePoolMetrics(
+        profile=pool.profile_name,
+        pool_size=pool.profile.pool_size,
+        max_overflow=pool.profile.max_overflow,
+        checked_out=checked_out,
+        idle=pool.checkedin(),
+        saturation=checked_out / max_connections if max_connections else 0.0,
+        checkouts=checkouts,
+        checkout_timeouts=checkout_timeouts,
+        checkout_wait_p50_ms=percentile_ms(0.5),
+        checkout_wait_p95_ms=percentile_ms(0.95),
+        checkout_wait_max_ms=waits[-1] * 1000 if waits else 0.0,
+        open_connections=len(connected_at),
+        oldest_connection_age_seconds=now - min(connected_at) if connected_at else 0.0,
+    )
+
+
+def database_pool_metrics() -> DatabasePoolMetrics | None:
+    "metrics for the application engine's pool, None if the engine does not use an instrumented pool"
+
+    from activemodel.session_manager import get_engine
+
+    pool = get_engine().pool
+
+    if not isinstance(pool, InstrumentedQueuePool):
+        return None
+
+    return pool_metrics(pool)
+
+
+def _log_pool_metrics(
+    message: str, pool: InstrumentedQueuePool, warning: bool = False
+) -> None:
+    # import during execution to avoid circular imports, the pool is created during setup()
+    from app import log
+
+    metrics = pool_metrics(pool).model_dump()
+
+    if warning:
+        log.warning(message, **metrics)
+    else:
+        log.info(message, **metrics)
+
+
+def engine_options(
+    name: PoolProfileName, *, transaction_pooling: bool = False, asyncio: bool = False
+) -> dict[str, Any]:
+    """
+    `create_engine` options for a pool profile, or `create_async_engine` options with `asyncio`.
+
+    With `transaction_pooling`, prepared statements are disabled since the next execution may run on a different
+    server connection, and the statement timeout is not sent as a startup parameter since PgBouncer rejects (or, with
+    `ignore_startup_parameters`, silently drops) `options`. Set `statement_timeout` on the database role instead.
+    """
+
+    profile = POOL_PROFILES[name]
+
+    connect_args: dict[str, Any] = {
+        "prepare_threshold": None if transaction_pooling else profile.prepare_threshold
+    }
+
+    if profile.statement_timeout_ms is not None and not transaction_pooling:
+        connect_args["options"] = f"-c statement_timeout={profile.statement_timeout_ms}"
+
+    return {
+        "poolclass": InstrumentedQueuePool.for_profile(name, profile, asyncio),
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.max_overflow,
+        "pool_timeout": profile.pool_timeout,
+        "pool_recycle": profile.pool_recycle,
+        "connect_args": connect_args,
+    }
@@ -0,0 +1,156 @@
+"""
+Read replica routing, enabled with `READ_REPLICA_DATABASE_URL`.
+
+Every query goes through the primary by default, including everything done through activemodel (`User.get`,
+`.save()`, etc). Read-only paths which tolerate slightly stale data opt in with `replica_session()`, which is bound to
+the replica when it is configured and caught up, and otherwise falls back to the regular (primary) session. Writes
+always go to the primary: a replica session is never installed as the global session, and a hot standby rejects
+writes anyway.
+
+Replica lag is checked at most every `REPLICA_LAG_CHECK_INTERVAL_SECONDS` per process. When the replica lags more than
+`READ_REPLICA_MAX_LAG_SECONDS`, or cannot be reached, reads go to the primary until the next check.
+
+Do not read your own writes through the replica, they may not have been replayed yet.
+"""
+
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from time import monotonic
+
+from app.env import env, loose_env
+
+from activemodel.session_manager import get_session
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, create_engine
+
+from ..environments import is_testing
+from .database import normalize_database_url
+from .database_pool import detect_pool_profile, engine_options
+
+REPLICA_LAG_CHECK_INTERVAL_SECONDS = 5
+
+REPLICA_CONNECT_TIMEOUT_SECONDS = 2
+"an unreachable replica should fall back to the primary quickly, not hold up the request"
+
+# a replica which has replayed everything it received is not lagging, even if the primary has been idle for a while.
+# NULL outside of recovery, i.e. when the "replica" is a primary.
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+_lag_checked_at: float | None = None
+_replica_available = False
+
+
+def read_replica_url() -> str | None:
+    if is_testing():
+        url = loose_env.str("TEST_READ_REPLICA_DATABASE_URL")
+    else:
+        url = loose_env.str("READ_REPLICA_DATABASE_URL")
+
+    return normalize_database_url(url) if url else None
+
+
+def max_replica_lag_seconds() -> float:
+    return env.float("READ_REPLICA_MAX_LAG_SECONDS", 10)
+
+
+def get_read_replica_engine() -> Engine | None:
+    "replica engine, created on first use. None when no replica is configured"
+
+    global _engine
+
+    if (url := read_replica_url()) is None:
+        return None
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                options = engine_options(detect_pool_profile())
+                options["connect_args"]["connect_timeout"] = (
+                    REPLICA_CONNECT_TIMEOUT_SECONDS
+                )
+
+                _engine = create_engine(url, **options)
+
+    return _engine
+
+
+def dispose_read_replica_engine(close: bool = True) -> None:
+    "drop the replica pool and the cached lag check, see `celery.init_worker` for `close`"
+
+    global _engine, _lag_checked_at
+
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose(close=close)
+
+        _engine = None
+        _lag_checked_at = None
+
+
+def replica_lag_seconds(engine: Engine) -> float:
+    with engine.connect() as connection:
+        lag = connection.scalar(_REPLICA_LAG_SQL)
+
+    return float(lag) if lag is not None else 0.0
+
+
+def _is_replica_available(engine: Engine) -> bool:
+    global _lag_checked_at, _replica_available
+
+    if (
+        _lag_checked_at is not None
+        and monotonic() - _lag_checked_at < REPLICA_LAG_CHECK_INTERVAL_SECONDS
+    ):
+        return _replica_available
+
+    # import during execution to avoid circular imports, this module is imported during setup()
+    from app import log
+
+    try:
+        lag = replica_lag_seconds(engine)
+    except SQLAlchemyError as e:
+        log.warning("read replica unavailable, reading from primary", error=str(e))
+        available = False
+    else:
+        available = lag <= max_replica_lag_seconds()
+
+        if not available:
+            log.warning("read replica lagging, reading from primary", lag_seconds=lag)
+
+    # concurrent checks are harmless, whichever finishes last wins
+    _replica_available = available
+    _lag_checked_at = monotonic()
+
+    return available
+
+
+@contextmanager
+def replica_session() -> Iterator[Session]:
+    """
+    Session for read-only queries, bound to the replica when it is configured and caught up.
+
+    Falls back to `get_session()`, which reuses the global session when one is set (requests, tasks, tests).
+    """
+
+    engine = get_read_replica_engine()
+
+    if engine is None or not _is_replica_available(engine):
+        with get_session() as session:
+            yield session
+
+        return
+
+    with Session(engine) as session:
+        yield session
@@ -1,7 +1,19 @@
-from openai import OpenAI
+from typing import TYPE_CHECKING
 
-# OPENAI_API_KEY is automatically sourced from the ENV
-openai = OpenAI()
+from app.utils.lazy import lazy_client
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+def _build_openai() -> OpenAI:
+    from openai import OpenAI
+
+    # OPENAI_API_KEY is automatically sourced from the ENV
+    return OpenAI()
+
+
+openai = lazy_client(_build_openai)
 
 
 def configure_openai():
@@ -1,8 +1,44 @@
+"""
+Shared redis connection pools, one per URL (and per event loop for asyncio clients).
+
+Every client the app creates comes from this registry, so connection counts are bounded per process and pool usage is
+visible. Pool sizes follow the process type, the same way database pools do (see `database_pool.py`): a prefork celery
+child runs a single task at a time and does not need the connections a web worker needs.
+
+- Pools block for up to `pool_timeout` when every connection is in use, instead of failing the command immediately.
+  Checkouts which time out are counted in `RedisPoolMetrics.exhausted`.
+- Idle connections are health checked (`PING`) before reuse after `health_check_interval`, so connections dropped by
+  the server or a load balancer are replaced instead of failing a command
+- Responses are parsed with hiredis when it is installed (`redis[hiredis]`), see `RedisPoolMetrics.hiredis`
+- `redis_pipeline` batches commands into a single round trip
+- Celery, celery_once and redbeat create their own clients from the URL, they receive the same settings through
+  `RedisPoolSettings.celery_transport_options`
+
+Sync pools are fork safe: redis-py resets a pool when it is used from a new process.
+"""
+
+import abc
+import asyncio
+import threading
+import weakref
+from time import monotonic
+from typing import Any
+
 import redis
+import redis.asyncio
+from pydantic import BaseModel, ConfigDict
+from redis.client import Pipeline
+from redis.exceptions import ConnectionError, MaxConnectionsError
+from redis.utils import HIREDIS_AVAILABLE
 
 from app.env import env
 
 from ..environments import is_testing
+from .database_pool import (
+    POOL_METRICS_LOG_INTERVAL_SECONDS,
+    PoolProfileName,
+    detect_pool_profile,
+)
 
 
 def redis_url():
@@ -12,15 +48,237 @@ def redis_url():
         return env.str("REDIS_URL")
 
 
-REDIS = None
+class RedisPoolSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    max_connections: int
+    pool_timeout: float = 1
+    "seconds to wait for a connection once `max_connections` are in use, before the command fails"
+    socket_timeout: float = 5
+    socket_connect_timeout: float = 2
+    health_check_interval: int = 30
+    "seconds a connection can be idle before it is checked with a `PING` on checkout"
+    retry_on_timeout: bool = True
+    socket_keepalive: bool = True
+
+    def celery_transport_options(self) -> dict[str, Any]:
+        "kombu transport options for the celery broker, which long polls with `BRPOP` and sets its own socket timeout"
+
+        return self.model_dump(exclude={"socket_timeout", "pool_timeout"})
+
+
+REDIS_POOL_SETTINGS: dict[PoolProfileName, RedisPoolSettings] = {
+    # sync routes run in the anyio threadpool, 40 threads by default, plus async routes
+    "web": RedisPoolSettings(max_connections=50),
+    "worker": RedisPoolSettings(max_connections=10),
+    "beat": RedisPoolSettings(max_connections=5),
+    "cli": RedisPoolSettings(max_connections=5),
+    "test": RedisPoolSettings(max_connections=20),
+}
+
+
+def redis_pool_settings() -> RedisPoolSettings:
+    return REDIS_POOL_SETTINGS[detect_pool_profile()]
+
+
+class RedisPoolMetrics(BaseModel):
+    server: str
+    "host:port/db, without credentials"
+    asyncio: bool
+    hiredis: bool
+    max_connections: int
+    in_use: int
+    idle: int
+    exhausted: int
+    "checkouts which timed out waiting for a connection"
+
+
+def _is_pool_exhausted(error: ConnectionError) -> bool:
+    # blocking pools raise a plain `ConnectionError` when the timeout expires
+    return isinstance(error, MaxConnectionsError) or str(error) in (
+        "No connection available.",
+        "Too many connections",
+    )
+
+
+class _PoolMetricsMixin(abc.ABC):
+    "checkout accounting shared by the sync and asyncio pools, pools must implement `_usage` to be created"
+
+    is_asyncio = False
+    max_connections: int
+    connection_kwargs: dict[str, Any]
+
+    @abc.abstractmethod
+    def _usage(self) -> tuple[int, int]:
+        "connections in use and idle"
+
+    def _init_metrics(self) -> None:
+        self.exhausted = 0
+        self.metrics_logged_at = monotonic()
+
+    def metrics(self) -> RedisPoolMetrics:
+        in_use, idle = self._usage()
+
+        return RedisPoolMetrics(
+            server="{}:{}/{}".format(
+                self.connection_kwargs.get("host"),
+                self.connection_kwargs.get("port"),
+                self.connection_kwargs.get("db"),
+            ),
+            asyncio=self.is_asyncio,
+            hiredis=HIREDIS_AVAILABLE,
+            max_connections=self.max_connections,
+            in_use=in_use,
+            idle=idle,
+            exhausted=self.exhausted,
+        )
+
+    def _record_checkout(self, error: ConnectionError | None = None) -> None:
+        if error is not None:
+            if _is_pool_exhausted(error):
+                self.exhausted += 1
+                _log_pool_metrics("redis pool exhausted", self, warning=True)
+
+            return
+
+        if monotonic() - self.metrics_logged_at >= POOL_METRICS_LOG_INTERVAL_SECONDS:
+            self.metrics_logged_at = monotonic()
+            _log_pool_metrics("redis pool metrics", self)
+
+
+def _log_pool_metrics(
+    message: str, pool: _PoolMetricsMixin, warning: bool = False
+) -> None:
+    # import during execution to avoid circular imports, pools are created during setup()
+    from app import log
+
+    metrics = pool.metrics().model_dump()
+
+    if warning:
+        log.warning(message, **metrics)
+    else:
+        log.info(message, **metrics)
+
+
+class InstrumentedConnectionPool(_PoolMetricsMixin, redis.BlockingConnectionPool):
+    def __init__(self, **kwargs: Any):
+        self._init_metrics()
+        super().__init__(**kwargs)
+
+    def _usage(self) -> tuple[int, int]:
+        # the queue holds idle connections, plus `None` for each connection which has not been opened yet
+        idle = sum(connection is not None for connection in list(self.pool.queue))
+        return len(self._connections) - idle, idle
+
+    def get_connection(self, *args: Any, **kwargs: Any):
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except ConnectionError as e:
+            self._record_checkout(e)
+            raise
+
+        self._record_checkout()
+        return connection
+
+
+class InstrumentedAsyncConnectionPool(
+    _PoolMetricsMixin, redis.asyncio.BlockingConnectionPool
+):
+    is_asyncio = True
+
+    def __init__(self, **kwargs: Any):
+        self._init_metrics()
+        super().__init__(**kwargs)
+
+    def _usage(self) -> tuple[int, int]:
+        return len(self._in_use_connections), len(self._available_connections)
+
+    async def get_connection(self, *args: Any, **kwargs: Any):
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except ConnectionError as e:
+            self._record_checkout(e)
+            raise
+
+        self._record_checkout()
+        return connection
+
+
+_registry_lock = threading.Lock()
+
+_clients: dict[str, redis.Redis] = {}
+
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, redis.asyncio.Redis]
+] = weakref.WeakKeyDictionary()
+"asyncio connections belong to the event loop which opened them, so there is a pool per loop"
+
+
+def _pool_options() -> dict[str, Any]:
+    # settings fields are connection pool kwargs
+    options = redis_pool_settings().model_dump()
+    options["timeout"] = options.pop("pool_timeout")
+    return options
+
+
+def get_redis(url: str | None = None) -> redis.Redis:
+    "shared client for `url` (the app redis by default), backed by the registry pool"
+
+    url = url or redis_url()
+
+    if (client := _clients.get(url)) is None:
+        with _registry_lock:
+            if (client := _clients.get(url)) is None:
+                pool = InstrumentedConnectionPool.from_url(url, **_pool_options())
+                client = _clients[url] = redis.Redis(connection_pool=pool)
+
+    return client
+
+
+def get_async_redis(url: str | None = None) -> redis.asyncio.Redis:
+    "shared asyncio client for `url` on the running event loop"
+
+    url = url or redis_url()
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+
+    if (client := clients.get(url)) is None:
+        pool = InstrumentedAsyncConnectionPool.from_url(url, **_pool_options())
+        client = clients[url] = redis.asyncio.Redis(connection_pool=pool)
+
+    return client
+
+
+def redis_pipeline(transaction: bool = False, url: str | None = None) -> Pipeline:
+    """
+    Pipeline on the shared pool, commands are sent in a single round trip on `execute()`:
+
+    >>> with redis_pipeline() as pipe:
+    >>>     pipe.incr("a").expire("a", 60)
+    >>>     incremented, _ = pipe.execute()
+
+    Most batching does not need `MULTI`/`EXEC`, which is why `transaction` is off by default unlike redis-py.
+    """
+
+    return get_redis(url).pipeline(transaction=transaction)
+
+
+def async_redis_pipeline(
+    transaction: bool = False, url: str | None = None
+) -> redis.asyncio.client.Pipeline:
+    "asyncio counterpart of `redis_pipeline`"
+
+    return get_async_redis(url).pipeline(transaction=transaction)
+
 
+def redis_pool_metrics() -> list[RedisPoolMetrics]:
+    "every pool created by this process"
 
-def get_redis():
-    global REDIS  # pylint: disable=global-statement
+    pools: list[_PoolMetricsMixin] = [
+        client.connection_pool  # type: ignore[misc]
+        for client in _clients.values()
+    ]
 
-    if REDIS is None:
-        # TODO can list specific errors to retry with `retry_on_error`
-        # https://github.com/celery/kombu/issues/1018
-        REDIS = redis.from_url(redis_url(), retry_on_timeout=True)
+    for clients in list(_async_clients.values()):
+        pools.extend(client.connection_pool for client in clients.values())  # type: ignore[misc]
 
-    return REDIS
+    return [pool.metrics() for pool in pools]
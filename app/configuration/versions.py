@@ -5,57 +5,149 @@ of extremely hard-to-debug issues, so we capture & check versions on test & in p
 
 import inspect
 import json
+import os
 import sys
+import threading
+from typing import TYPE_CHECKING
 
 from app.setup import get_root_path
 
+if TYPE_CHECKING:
+    from redis import Redis
+
 VERSIONS_FILE = get_root_path() / ".service-versions"
 
+SERVICE_VERSIONS_CACHE_KEY = "service_versions:{build}"
+
+SERVICE_VERSIONS_CACHE_TTL_SECONDS = 60 * 60
+"live versions are looked up at most once an hour per build, instead of by every process on startup"
+
+SERVICE_VERSION_CHECK_TIMEOUT_SECONDS = 5
+"bounds each redis and postgres call, so a slow or unreachable service cannot leave the check running indefinitely"
+
+_check_thread: threading.Thread | None = None
+
 
-def check_service_versions():
+def check_service_versions() -> None:
     """
     Production check & logging of versions.
 
-    Chrome is excluded since it's not used in production
+    Chrome is excluded since it's not used in production.
+
+    The check makes network round trips to redis and postgres, so it runs in a background thread instead of blocking
+    `setup()`. The live versions are cached in redis for the current build, so other processes (web workers, celery
+    children) reuse them instead of running `INFO` and `SHOW server_version` themselves.
     """
 
-    # import during execution to avoid circular imports
-    from app import log
+    global _check_thread
 
-    persisted_versions = json.loads(VERSIONS_FILE.read_bytes())
+    if _check_thread is not None:
+        return
 
-    current_redis = redis_version()
-    if current_redis != persisted_versions["redis"]:
-        log.warning(
-            "Redis version mismatch",
-            expected=persisted_versions["redis"],
-            got=current_redis,
-        )
+    _check_thread = threading.Thread(
+        target=_check_service_versions,
+        name="check_service_versions",
+        daemon=True,
+    )
+    _check_thread.start()
 
-    current_postgres = postgres_version()
-    if current_postgres != persisted_versions["postgres"]:
-        log.warning(
-            "Postgres version mismatch",
-            expected=persisted_versions["postgres"],
-            got=current_postgres,
-        )
+    # a thread holding a connection or lock while the process forks (celery prefork, gunicorn) leaves the child with a
+    # lock it can never acquire, so forks wait for the check to finish
+    os.register_at_fork(before=wait_for_service_version_check)
+
+
+def wait_for_service_version_check() -> None:
+    if _check_thread is not None and _check_thread.is_alive():
+        _check_thread.join(SERVICE_VERSION_CHECK_TIMEOUT_SECONDS * 2)
 
-    # this can happen, mostly locally, if another process creates the venv from a sys python without us knowing
-    current_python = python_version()
-    if current_python != persisted_versions["python"]:
-        log.warning(
-            "python version mismatch",
-            expected=persisted_versions["python"],
-            got=current_python,
+
+def _check_service_versions() -> None:
+    # import during execution to avoid circular imports
+    from app import log
+
+    try:
+        persisted_versions = json.loads(VERSIONS_FILE.read_bytes())
+
+        # this can happen, mostly locally, if another process creates the venv from a sys python without us knowing
+        current_python = python_version()
+        if current_python != persisted_versions["python"]:
+            log.warning(
+                "python version mismatch",
+                expected=persisted_versions["python"],
+                got=current_python,
+            )
+
+        current_versions = cached_service_versions()
+
+        if current_versions["redis"] != persisted_versions["redis"]:
+            log.warning(
+                "Redis version mismatch",
+                expected=persisted_versions["redis"],
+                got=current_versions["redis"],
+            )
+
+        if current_versions["postgres"] != persisted_versions["postgres"]:
+            log.warning(
+                "Postgres version mismatch",
+                expected=persisted_versions["postgres"],
+                got=current_versions["postgres"],
+            )
+    # there is no caller to raise to in the background thread, an unreachable service is logged instead
+    except Exception:  # noqa: BLE001
+        log.exception("service version check failed")
+
+
+def cached_service_versions() -> dict[str, str]:
+    "live redis and postgres versions, shared across processes running the same build"
+
+    import redis
+
+    from app.configuration.redis import redis_url
+    from app.constants import BUILD_COMMIT
+
+    cache_key = SERVICE_VERSIONS_CACHE_KEY.format(build=BUILD_COMMIT)
+
+    # a dedicated client so the timeouts do not apply to the application's client
+    client = redis.from_url(
+        redis_url(),
+        socket_timeout=SERVICE_VERSION_CHECK_TIMEOUT_SECONDS,
+        socket_connect_timeout=SERVICE_VERSION_CHECK_TIMEOUT_SECONDS,
+    )
+
+    try:
+        if (cached := client.get(cache_key)) is not None:
+            return json.loads(cached)  # type: ignore[arg-type]
+
+        versions = {
+            "redis": redis_version(client),
+            "postgres": postgres_version(
+                statement_timeout_seconds=SERVICE_VERSION_CHECK_TIMEOUT_SECONDS
+            ),
+        }
+
+        client.set(
+            cache_key, json.dumps(versions), ex=SERVICE_VERSIONS_CACHE_TTL_SECONDS
         )
 
+        return versions
+    finally:
+        client.close()
 
-def postgres_version() -> str:
+
+def postgres_version(statement_timeout_seconds: int | None = None) -> str:
     from app.configuration.database import get_engine
 
     import sqlalchemy as sa
 
     with get_engine().connect() as conn:
+        if statement_timeout_seconds is not None:
+            # scoped to the current transaction, the pooled connection keeps its own timeout
+            conn.execute(
+                sa.text(
+                    f"SET LOCAL statement_timeout = {statement_timeout_seconds * 1000}"
+                )
+            )
+
         pg_version = conn.execute(sa.text("SHOW server_version")).scalar()
         assert pg_version
         # Extract major.minor version from full version string
@@ -64,10 +156,10 @@ def postgres_version() -> str:
     return pg_version
 
 
-def redis_version() -> str:
+def redis_version(client: Redis | None = None) -> str:
     from app.configuration.redis import get_redis
 
-    redis_info = get_redis().info()
+    redis_info = (client or get_redis()).info()
     assert not inspect.isawaitable(redis_info), "Redis info should not be awaitable"
     redis_version = redis_info["redis_version"]
 
@@ -54,6 +54,10 @@ def api_app_url_path_for(
 ) -> str: ...
 
 
+@overload
+def api_app_url_path_for(name: Literal["user_export"], **path_params) -> str: ...
+
+
 @overload
 def api_app_url_path_for(name: Literal["user_list"], **path_params) -> str: ...
 
@@ -1,8 +1,8 @@
 """
 Facebook/Meta tracking helpers
 
-- Surprisingly, the pixel endpoint is pretty slow. Can be 200-400ms per request. Throw this in a background thread
-  when possible.
+- Surprisingly, the pixel endpoint is pretty slow. Can be 200-400ms per request. Events are queued and sent in batches
+  from a background thread, see `facebook_batcher.py`.
 
 TODO
 
@@ -10,18 +10,24 @@ TODO
 """
 
 import hashlib
+import json
 import re
 import time
-from typing import Literal
+from typing import TYPE_CHECKING, Any, Literal
 
-from facebook_business.adobjects.adspixel import AdsPixel
-from facebook_business.api import FacebookAdsApi
-from fastapi import BackgroundTasks, Request
+from fastapi import Request
 from pydantic import BaseModel
 from structlog_config.fastapi_access_logger import client_ip_from_request
 
 from app import log
+from app.configuration.redis import redis_pipeline
 from app.env import env
+from app.utils.lazy import lazy_client
+
+from .facebook_batcher import ConversionEventBatcher
+
+if TYPE_CHECKING:
+    from facebook_business.adobjects.adspixel import AdsPixel
 
 META_PIXEL_ID = env.str("META_PIXEL_ID")
 META_PIXEL_KEY = env.str("META_PIXEL_KEY")
@@ -60,6 +66,26 @@ USER_AGENT_HEADER = "user-agent"
 # event payload constants
 ACTION_SOURCE_WEBSITE = "website"
 
+FACEBOOK_EVENT_BATCH_SIZE = 1000
+"the Conversions API maximum per request"
+
+FACEBOOK_EVENT_FLUSH_INTERVAL_SECONDS = 2.0
+
+FACEBOOK_DEAD_LETTER_KEY = "facebook:events:dead_letter"
+"""
+redis list of batches which could not be sent, newest first.
+
+Only for inspection and replay of recent failures: the client IP address and user agent are removed from each event
+(every other identifier is already hashed), and the list expires a week after the last failure.
+"""
+
+FACEBOOK_DEAD_LETTER_MAX_BATCHES = 100
+
+FACEBOOK_DEAD_LETTER_TTL_SECONDS = 60 * 60 * 24 * 7
+
+FACEBOOK_DEAD_LETTER_EXCLUDED_USER_DATA = ("client_ip_address", "client_user_agent")
+"unhashed personal data, which must not outlive the request in redis"
+
 
 class MetaUserData(BaseModel):
     fbp: str | None = None
@@ -104,7 +130,10 @@ MetaEventName = Literal[
 ]
 
 
-def get_facebook_pixel() -> AdsPixel:
+def _build_facebook_pixel() -> AdsPixel:
+    from facebook_business.adobjects.adspixel import AdsPixel
+    from facebook_business.api import FacebookAdsApi
+
     FacebookAdsApi.init(
         access_token=META_PIXEL_KEY,
         api_version=API_VERSION,
@@ -114,6 +143,14 @@ def get_facebook_pixel() -> AdsPixel:
     return AdsPixel(META_PIXEL_ID)
 
 
+# the SDK import is slow, and `FacebookAdsApi.init` replaces the global default API, so it's only done once
+facebook_pixel = lazy_client(_build_facebook_pixel)
+
+
+def get_facebook_pixel() -> AdsPixel:
+    return facebook_pixel
+
+
 def _sha256(value: str) -> str:
     return hashlib.sha256(value.encode("utf-8")).hexdigest()
 
@@ -280,7 +317,6 @@ def build_conversion_event_payload(
     last_name: str | None = None,
     full_name: str | None = None,
     event_id: str | None = None,
-    background_tasks: BackgroundTasks | None = None,
 ) -> dict:
     """Build a Facebook Pixel event payload.
 
@@ -323,23 +359,81 @@ def build_conversion_event_payload(
     if TEST_EVENT_CODE_OVERRIDE:
         payload["test_event_code"] = TEST_EVENT_CODE_OVERRIDE
 
-    # Send async if background_tasks provided, otherwise sync
-    if background_tasks:
-        background_tasks.add_task(_send_facebook_event, payload, event_name)
-    else:
-        _send_facebook_event(payload, event_name)
+    # queuing does not block, the batcher sends from its own thread
+    facebook_event_batcher.add(payload["data"][0], TEST_EVENT_CODE_OVERRIDE)
 
     return payload
 
 
-def _send_facebook_event(payload: dict, event_name: str) -> None:
-    """Send event to Facebook."""
+def _send_facebook_events(
+    events: list[dict[str, Any]], test_event_code: str | None
+) -> None:
+    params: dict[str, Any] = {"data": events}
+
+    if test_event_code:
+        params["test_event_code"] = test_event_code
+
+    get_facebook_pixel().create_event(params=params)
+
+
+def _is_retryable_facebook_error(error: Exception) -> bool:
+    from facebook_business.exceptions import FacebookRequestError
+
+    if not isinstance(error, FacebookRequestError):
+        # connection errors and timeouts
+        return True
+
+    # a 4xx rejects the whole batch (invalid parameters, expired token), retrying it gives the same answer
+    return error.api_transient_error() or (error.http_status() or 0) >= 500
+
+
+def _dead_letter_facebook_events(
+    events: list[dict[str, Any]], test_event_code: str | None, error: Exception
+) -> None:
+    "keep recent failed batches in redis for inspection and replay, see `FACEBOOK_DEAD_LETTER_KEY`"
+
+    stripped_events = [
+        event
+        | {
+            "user_data": {
+                key: value
+                for key, value in event.get("user_data", {}).items()
+                if key not in FACEBOOK_DEAD_LETTER_EXCLUDED_USER_DATA
+            }
+        }
+        for event in events
+    ]
+
     try:
-        pixel = get_facebook_pixel()
-        pixel.create_event(params=payload)
+        with redis_pipeline() as pipe:
+            pipe.lpush(
+                FACEBOOK_DEAD_LETTER_KEY,
+                json.dumps(
+                    {
+                        "events": stripped_events,
+                        "test_event_code": test_event_code,
+                        "error": str(error),
+                        "failed_at": int(time.time()),
+                    }
+                ),
+            )
+            pipe.ltrim(
+                FACEBOOK_DEAD_LETTER_KEY, 0, FACEBOOK_DEAD_LETTER_MAX_BATCHES - 1
+            )
+            pipe.expire(FACEBOOK_DEAD_LETTER_KEY, FACEBOOK_DEAD_LETTER_TTL_SECONDS)
+            pipe.execute()
     except Exception as e:  # noqa: BLE001
         log.exception(
-            "facebook pixel event send failed",
+            "facebook event dead letter failed",
             error=str(e),
-            event_name=payload["data"][0]["event_name"],
+            event_names=[event["event_name"] for event in events],
         )
+
+
+facebook_event_batcher = ConversionEventBatcher(
+    send=_send_facebook_events,
+    dead_letter=_dead_letter_facebook_events,
+    is_retryable=_is_retryable_facebook_error,
+    max_batch_size=FACEBOOK_EVENT_BATCH_SIZE,
+    flush_interval_seconds=FACEBOOK_EVENT_FLUSH_INTERVAL_SECONDS,
+)
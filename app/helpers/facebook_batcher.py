@@ -0,0 +1,226 @@
+"""
+Background batching for Conversions API events.
+
+Each Conversions API request takes 200-400ms, and accepts up to 1000 events. Events are queued in-process and a
+background thread sends them in batches once `max_batch_size` events are queued or `flush_interval_seconds` after the
+first queued event, so request and background task threads never wait on the network.
+
+- Failed batches are retried with exponential backoff when `is_retryable` says so, then handed to `dead_letter`
+- Events are grouped by test event code, which is set per request rather than per event
+- Queued events are flushed when the process exits (`flush_batchers`). A hard kill loses at most one interval of
+  events. Celery prefork children exit with `os._exit`, which skips `atexit`, so the celery worker calls
+  `flush_batchers` on `worker_process_shutdown`.
+- The queue is reset in forked children (celery prefork, gunicorn), the parent's thread does not exist there
+- `close` stops the thread, for batchers which do not live as long as the process (tests)
+"""
+
+import atexit
+import os
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from typing import Any
+
+from app import log
+
+type SendBatch = Callable[[list[dict[str, Any]], str | None], None]
+type DeadLetter = Callable[[list[dict[str, Any]], str | None, Exception], None]
+
+_batchers = weakref.WeakSet["ConversionEventBatcher"]()
+"open batchers, flushed on exit and reset after a fork"
+
+
+def flush_batchers() -> None:
+    "send every event queued by any open batcher, on the calling thread"
+
+    for batcher in list(_batchers):
+        batcher.flush()
+
+
+def _reset_batchers() -> None:
+    for batcher in list(_batchers):
+        batcher._reset()
+
+
+# registered once for the process, there is no way to unregister a fork handler
+atexit.register(flush_batchers)
+os.register_at_fork(after_in_child=_reset_batchers)
+
+
+class ConversionEventBatcher:
+    def __init__(
+        self,
+        send: SendBatch,
+        dead_letter: DeadLetter,
+        *,
+        is_retryable: Callable[[Exception], bool] = lambda _: True,
+        max_batch_size: int = 1000,
+        flush_interval_seconds: float = 2.0,
+        max_attempts: int = 3,
+        retry_backoff_seconds: float = 1.0,
+        max_queue_size: int = 10_000,
+    ):
+        self.send = send
+        self.dead_letter = dead_letter
+        self.is_retryable = is_retryable
+        self.max_batch_size = max_batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_queue_size = max_queue_size
+
+        self._closed = False
+        self._reset()
+        _batchers.add(self)
+
+    def _reset(self) -> None:
+        self._condition = threading.Condition()
+        # events by test event code
+        self._queues: dict[str | None, list[dict[str, Any]]] = {}
+        self._queued = 0
+        self._first_queued_at: float | None = None
+        self._thread: threading.Thread | None = None
+        # batches are sent one at a time, in the order they were queued
+        self._send_lock = threading.Lock()
+
+    def add(self, event: dict[str, Any], test_event_code: str | None = None) -> None:
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("facebook event batcher is closed")
+
+            if self._queued >= self.max_queue_size:
+                # the API is down or much slower than the event rate, memory must not grow without bound
+                log.error(
+                    "facebook event queue full, dropping event",
+                    event_name=event.get("event_name"),
+                    queued=self._queued,
+                )
+                return
+
+            self._queues.setdefault(test_event_code, []).append(event)
+            self._queued += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="facebook_event_batcher", daemon=True
+                )
+                self._thread.start()
+
+            # wake the thread to start the flush timer, or to send a full batch
+            if self._first_queued_at is None:
+                self._first_queued_at = time.monotonic()
+                self._condition.notify()
+            elif self._queued >= self.max_batch_size:
+                self._condition.notify()
+
+    def flush(self) -> None:
+        "send every queued event now, on the calling thread"
+
+        while batches := self._take_batches(force=True):
+            self._send_batches(batches)
+
+    def close(self) -> None:
+        "stop the background thread and send every queued event, events can't be added afterwards"
+
+        with self._condition:
+            self._closed = True
+            thread = self._thread
+            self._condition.notify()
+
+        if thread is not None:
+            thread.join()
+
+        self.flush()
+        _batchers.discard(self)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queued and not self._closed:
+                    self._condition.wait()
+
+                self._condition.wait_for(
+                    lambda: self._closed or self._is_due(),
+                    timeout=self._seconds_until_due(),
+                )
+
+                # `close` sends what is left
+                if self._closed:
+                    return
+
+            try:
+                if batches := self._take_batches(force=False):
+                    self._send_batches(batches)
+            except Exception as e:  # noqa: BLE001
+                # `add` starts the thread only once, an exception escaping here would stop all sending
+                log.exception("facebook event batcher failed", error=str(e))
+
+    def _is_due(self) -> bool:
+        return self._queued >= self.max_batch_size or (
+            self._first_queued_at is not None
+            and time.monotonic() - self._first_queued_at >= self.flush_interval_seconds
+        )
+
+    def _seconds_until_due(self) -> float:
+        if self._first_queued_at is None:
+            return 0.0
+
+        return max(
+            0.0,
+            self._first_queued_at + self.flush_interval_seconds - time.monotonic(),
+        )
+
+    def _take_batches(
+        self, force: bool
+    ) -> list[tuple[str | None, list[dict[str, Any]]]]:
+        with self._condition:
+            if not self._queued or not (force or self._is_due()):
+                return []
+
+            batches = []
+
+            for test_event_code, events in self._queues.items():
+                for start in range(0, len(events), self.max_batch_size):
+                    batches.append(
+                        (test_event_code, events[start : start + self.max_batch_size])
+                    )
+
+            self._queues = {}
+            self._queued = 0
+            self._first_queued_at = None
+
+            return batches
+
+    def _send_batches(
+        self, batches: list[tuple[str | None, list[dict[str, Any]]]]
+    ) -> None:
+        with self._send_lock:
+            for test_event_code, events in batches:
+                self._send_with_retry(events, test_event_code)
+
+    def _send_with_retry(
+        self, events: list[dict[str, Any]], test_event_code: str | None
+    ) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.send(events, test_event_code)
+                return
+            except Exception as e:  # noqa: BLE001
+                if attempt == self.max_attempts or not self.is_retryable(e):
+                    log.exception(
+                        "facebook event batch failed",
+                        error=str(e),
+                        event_count=len(events),
+                        attempts=attempt,
+                    )
+                    self.dead_letter(events, test_event_code, e)
+                    return
+
+                log.warning(
+                    "facebook event batch failed, retrying",
+                    error=str(e),
+                    event_count=len(events),
+                    attempt=attempt,
+                )
+                time.sleep(self.retry_backoff_seconds * 2 ** (attempt - 1))
@@ -8,8 +8,10 @@ from clerk_backend_api.models import ClerkBaseError
 from app import log
 from app.celery import celery_app
 from app.configuration.clerk import clerk
+from app.configuration.database_replica import replica_session
 
 from app.models.user import User
+from sqlalchemy import select
 
 
 def perform() -> None:
@@ -19,24 +21,35 @@ def perform() -> None:
 
     # TODO support deleted flag in clerk
 
-    for user in User.all():
+    # the user list is read from the replica, only users whose email changed are loaded and written on the primary
+    with replica_session() as session:
+        rows = session.execute(select(User.id, User.clerk_id, User.email)).all()
+
+    for row in rows:
         try:
-            clerk_user = clerk.users.get(user_id=user.clerk_id)
+            clerk_user = clerk.users.get(user_id=row.clerk_id)
         except ClerkBaseError:
-            log.warning("no clerk user found for user", user=user)
+            log.warning("no clerk user found for user", user_id=row.id)
             continue
 
         assert clerk_user
 
         if not clerk_user.email_addresses:
-            log.warning("no email addresses found for clerk user", user=user)
+            log.warning("no email addresses found for clerk user", user_id=row.id)
             continue
 
         if len(clerk_user.email_addresses) > 1:
-            log.info("multiple email addresses found for clerk user", user=user)
+            log.info("multiple email addresses found for clerk user", user_id=row.id)
 
         user_email = clerk_user.email_addresses[0].email_address
 
+        if user_email == row.email:
+            continue
+
+        # deleted since the replica read
+        if not (user := User.get(row.id)):
+            continue
+
         user.email = user_email
         user.save()
 
@@ -0,0 +1,120 @@
+"""
+Redis-backed GCRA (generic cell rate algorithm) rate limiter.
+
+GCRA stores a single "theoretical arrival time" (TAT) per key instead of a log of request timestamps, so a check is one
+key read + write regardless of the limit size. The check, the TAT update, and the usage counter increment all happen in
+a single Lua script so concurrent workers cannot race each other and each request costs exactly one Redis round trip.
+
+Time is sourced from Redis (`TIME`) rather than the calling process so clock drift across containers does not matter.
+
+- https://brandur.org/rate-limiting
+"""
+
+import time
+
+from pydantic import BaseModel
+from redis.commands.core import Script
+
+from app.configuration.redis import get_redis
+
+RATE_LIMIT_KEY_PREFIX = "rate_limit"
+USAGE_KEY_PREFIX = "api_usage"
+
+USAGE_TTL_SECONDS = 60 * 60 * 24 * 40
+"keep daily usage counters around long enough for a monthly billing run to aggregate them"
+
+# KEYS[1] = TAT key, KEYS[2] = usage counter key
+# ARGV[1] = emission interval (ms), ARGV[2] = burst tolerance (ms), ARGV[3] = usage counter TTL (s)
+_GCRA_LUA = """
+local emission_interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+
+local redis_time = redis.call("TIME")
+local now = tonumber(redis_time[1]) * 1000 + math.floor(tonumber(redis_time[2]) / 1000)
+
+local tat = tonumber(redis.call("GET", KEYS[1]))
+if tat == nil or tat < now then
+  tat = now
+end
+
+local new_tat = tat + emission_interval
+local allow_at = new_tat - tolerance
+
+if now < allow_at then
+  return {0, 0, allow_at - now, tat - now}
+end
+
+redis.call("SET", KEYS[1], new_tat, "PX", new_tat - now)
+
+redis.call("INCR", KEYS[2])
+redis.call("EXPIRE", KEYS[2], tonumber(ARGV[3]))
+
+local remaining = math.floor((tolerance - (new_tat - now)) / emission_interval)
+return {1, remaining, 0, new_tat - now}
+"""
+
+_gcra_script: Script | None = None
+
+
+class RateLimitResult(BaseModel):
+    allowed: bool
+    limit: int
+    remaining: int
+    "requests that can be made right now before being throttled"
+    retry_after_ms: int
+    "when throttled, how long until the next request will be allowed"
+    reset_ms: int
+    "how long until the full limit is available again"
+
+
+def _get_gcra_script() -> Script:
+    global _gcra_script
+
+    # `register_script` uses EVALSHA and transparently falls back to EVAL if the script is not cached on the server
+    if _gcra_script is None:
+        _gcra_script = get_redis().register_script(_GCRA_LUA)
+
+    return _gcra_script
+
+
+def usage_key(identifier: str, day: str | None = None) -> str:
+    "daily (UTC) usage counter key for billing aggregation"
+
+    if day is None:
+        day = time.strftime("%Y-%m-%d", time.gmtime())
+
+    return f"{USAGE_KEY_PREFIX}:{identifier}:{day}"
+
+
+def hit(identifier: str, *, limit: int, period_seconds: int) -> RateLimitResult:
+    """
+    Record a request for `identifier` and determine if it should be allowed.
+
+    `limit` requests are allowed in a burst, and capacity is replenished evenly across `period_seconds`. Only allowed
+    requests are counted towards usage.
+    """
+
+    assert limit > 0, "rate limit must be positive"
+
+    emission_interval_ms = period_seconds * 1000 // limit
+    tolerance_ms = emission_interval_ms * limit
+
+    allowed, remaining, retry_after_ms, reset_ms = _get_gcra_script()(
+        keys=[f"{RATE_LIMIT_KEY_PREFIX}:{identifier}", usage_key(identifier)],
+        args=[emission_interval_ms, tolerance_ms, USAGE_TTL_SECONDS],
+    )  # type: ignore[misc]
+
+    return RateLimitResult(
+        allowed=bool(allowed),
+        limit=limit,
+        remaining=max(int(remaining), 0),
+        retry_after_ms=int(retry_after_ms),
+        reset_ms=int(reset_ms),
+    )
+
+
+def usage_for_day(identifier: str, day: str) -> int:
+    "number of allowed requests recorded for `identifier` on a UTC `YYYY-MM-DD` day"
+
+    count = get_redis().get(usage_key(identifier, day))
+    return int(count) if count else 0  # type: ignore[arg-type]
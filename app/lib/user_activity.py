@@ -0,0 +1,96 @@
+"""
+Maintain a "most recent user activity" watermark so checking for recent activity is a single redis read instead of a
+range scan over `user.last_active_at`.
+
+- The activity path (`inject_user_record`) pushes the watermark forward, throttled per-process.
+- If the watermark is missing (redis flushed, fresh deploy), it is rebuilt from `max(user.last_active_at)`, which is
+  answered from the `last_active_at` index without scanning the table.
+"""
+
+import time
+
+from redis.exceptions import RedisError
+
+from app import log
+from app.configuration.database_replica import replica_session
+from app.configuration.redis import get_redis
+
+from app.models.user import User
+from sqlalchemy import func, select
+
+ACTIVITY_WATERMARK_KEY = "user_activity:last_active_at"
+
+WATERMARK_WRITE_INTERVAL_SECONDS = 30
+"the watermark only needs to be roughly accurate, skip writes when this process recently pushed it forward"
+
+# Lua to only move the watermark forward, out-of-order writes from slower workers are ignored
+_ADVANCE_WATERMARK_LUA = """
+local current = tonumber(redis.call("GET", KEYS[1]))
+if current == nil or current < tonumber(ARGV[1]) then
+  redis.call("SET", KEYS[1], ARGV[1])
+end
+"""
+
+_last_written_at: float = 0
+
+
+def _advance_watermark(timestamp: float) -> None:
+    get_redis().eval(_ADVANCE_WATERMARK_LUA, 1, ACTIVITY_WATERMARK_KEY, timestamp)
+
+
+def record_user_activity(timestamp: float | None = None) -> None:
+    "advance the activity watermark, failures are logged and ignored since this is on the request path"
+
+    global _last_written_at
+
+    if timestamp is None:
+        timestamp = time.time()
+
+    if timestamp - _last_written_at < WATERMARK_WRITE_INTERVAL_SECONDS:
+        return
+
+    try:
+        _advance_watermark(timestamp)
+    except RedisError as e:
+        log.warning("failed to record user activity watermark", error=str(e))
+        return
+
+    _last_written_at = timestamp
+
+
+def reset_user_activity_throttle() -> None:
+    "helpful for tests, which flush redis between runs"
+
+    global _last_written_at
+    _last_written_at = 0
+
+
+def _last_activity_from_database() -> float | None:
+    # a few seconds of replica lag does not matter for a day-long activity window
+    with replica_session() as session:
+        epoch = session.scalar(
+            select(func.extract("epoch", func.max(User.last_active_at)))
+        )
+
+    return float(epoch) if epoch is not None else None
+
+
+def last_user_activity() -> float | None:
+    "unix timestamp of the most recent user activity, or None if no user has ever been active"
+
+    try:
+        if (watermark := get_redis().get(ACTIVITY_WATERMARK_KEY)) is not None:
+            return float(watermark)  # type: ignore[arg-type]
+    except RedisError as e:
+        log.warning("failed to read user activity watermark", error=str(e))
+        return _last_activity_from_database()
+
+    timestamp = _last_activity_from_database()
+
+    if timestamp is not None:
+        try:
+            _advance_watermark(timestamp)
+        except RedisError as e:
+            log.warning("failed to seed user activity watermark", error=str(e))
+
+    return timestamp
@@ -0,0 +1,91 @@
+"""
+Model mixins which are not provided by activemodel.
+"""
+
+from collections.abc import Sequence
+from typing import Any, Self
+
+from app.configuration.database_async import get_async_session
+
+from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
+
+
+class AsyncQueryMixin:
+    """
+    Async counterparts of the activemodel query helpers, for `async def` routes. See `database_async.py`.
+
+    Filters and the positional primary key are handled like the sync helpers, and loaded records run the same
+    `after_find` and `after_initialize` hooks.
+
+    Mix into an activemodel `BaseModel`:
+
+    >>> class User(BaseModel, AsyncQueryMixin, table=True): ...
+    >>> user = await User.aget(clerk_id="user_123")
+    """
+
+    @classmethod
+    def _afilter(cls, *args: Any, **kwargs: Any) -> SelectOfScalar[Self]:
+        "a single positional primary key (int, TypeID, str or UUID) is expanded by `__process_filter_args__`"
+
+        args, kwargs = cls.__process_filter_args__(*args, **kwargs)  # type: ignore[attr-defined]
+        return select(cls).filter(*args).filter_by(**kwargs)
+
+    @classmethod
+    async def aget(cls, *args: Any, **kwargs: Any) -> Self | None:
+        "`get`: a single record (or None), pass a primary key or filters"
+
+        async with get_async_session() as session:
+            result = (await session.exec(cls._afilter(*args, **kwargs))).first()
+
+        return cls._run_after_load_hooks(result)  # type: ignore[attr-defined]
+
+    @classmethod
+    async def aone_or_none(cls, *args: Any, **kwargs: Any) -> Self | None:
+        "`one_or_none`: raises if more than one record matches"
+
+        async with get_async_session() as session:
+            result = (await session.exec(cls._afilter(*args, **kwargs))).one_or_none()
+
+        return cls._run_after_load_hooks(result)  # type: ignore[attr-defined]
+
+    @classmethod
+    async def aone(cls, *args: Any, **kwargs: Any) -> Self:
+        "`one`: raises unless exactly one record matches"
+
+        async with get_async_session() as session:
+            result = (await session.exec(cls._afilter(*args, **kwargs))).one()
+
+        return cls._run_after_load_hooks(result)  # type: ignore[attr-defined]
+
+    @classmethod
+    async def awhere(cls, *args: Any, **kwargs: Any) -> Sequence[Self]:
+        "every matching record, loaded into a list"
+
+        async with get_async_session() as session:
+            results = (await session.exec(cls._afilter(*args, **kwargs))).all()
+
+        return [cls._run_after_load_hooks(result) for result in results]  # type: ignore[attr-defined]
+
+    async def asave(self) -> Self:
+        """
+        `save`: persist the record and refresh server generated columns (timestamps, etc).
+
+        Hooks run like they do in `save`, on the event loop, so they must not do IO. `around_save` is not supported.
+        """
+
+        is_new = self.is_new()  # type: ignore[attr-defined]
+
+        async with get_async_session() as session:
+            session.add(self)
+
+            self._call_hook("before_create" if is_new else "before_update")  # type: ignore[attr-defined]
+            self._call_hook("before_save")  # type: ignore[attr-defined]
+
+            await session.commit()
+            await session.refresh(self)
+
+            self._call_hook("after_create" if is_new else "after_update")  # type: ignore[attr-defined]
+            self._call_hook("after_save")  # type: ignore[attr-defined]
+
+        return self
@@ -19,11 +19,14 @@ from activemodel.mixins import (
     TypeIDPrimaryKey,
 )
 from activemodel.types import TypeIDType
-from sqlmodel import Column, Field
+from app.models.mixins import AsyncQueryMixin
+from sqlmodel import Column, Field, Index
 
 # NOTE usr_ is used for non-clerk prefix to avoid confusion
 CLERK_OBJECT_PREFIX = "user"
 
+USER_ID_PREFIX = "usr"
+
 # let's do it Stripe style :)
 API_KEY_PREFIX = "sk_live"
 
@@ -34,8 +37,19 @@ class UserRole(StrEnum):
 
 
 # usr vs user is intentionally used to differentiate from the clerk model, which also uses a prefix ID
-class User(BaseModel, TimestampsMixin, SoftDeletionMixin, table=True):
-    id: TypeIDField[Literal["usr"]] = TypeIDPrimaryKey("usr")
+class User(BaseModel, TimestampsMixin, SoftDeletionMixin, AsyncQueryMixin, table=True):
+    __table_args__ = (
+        # keyset pagination for the admin user listing
+        Index("user_role_id_idx", "role", "id"),
+        # `text_pattern_ops` allows `LIKE 'prefix%'` email searches to use the index regardless of collation
+        Index(
+            "user_email_pattern_idx",
+            "email",
+            postgresql_ops={"email": "text_pattern_ops"},
+        ),
+    )
+
+    id: TypeIDField[Literal["usr"]] = TypeIDPrimaryKey(USER_ID_PREFIX)
 
     clerk_id: str = Field(unique=True, index=True)
     "external ID of the user in Clerk"
@@ -46,7 +60,7 @@ class User(BaseModel, TimestampsMixin, SoftDeletionMixin, table=True):
     role: UserRole = Field(default=UserRole.normal)
     "role of the user, primarily to support superuser switching"
 
-    last_active_at: ZonedDateTime | None = None
+    last_active_at: ZonedDateTime | None = Field(default=None, index=True)
     "last time the user had an active session"
 
     api_key: TypeID | None = Field(
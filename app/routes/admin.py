@@ -6,16 +6,28 @@ Admin-only routes:
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
 from pydantic import BaseModel as BasePydanticModel
 from pydantic import ConfigDict
 from starlette import status
 from typeid import TypeID
+from typeid.errors import TypeIDException
 
 from app import log
+from app.configuration.database_replica import replica_session
 from app.errors import ImpossibleStateError
-
-from app.models.user import User, UserRole
+from app.routes.errors import ClientError
+from app.routes.utils.json_response import ORJSONRoute, StreamingJSONResponse
+from app.routes.utils.pagination import (
+    CursorParams,
+    after_cursor,
+    decode_cursor,
+    encode_cursor,
+    stream_query,
+)
+
+from app.models.user import USER_ID_PREFIX, User, UserRole
+from sqlalchemy import or_, select
 
 SESSION_KEY_LOGIN_AS_USER = "login_as_user"
 
@@ -31,7 +43,9 @@ def require_admin(request: Request):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
 
-admin_api_app = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+admin_api_app = APIRouter(
+    route_class=ORJSONRoute, prefix="/admin", dependencies=[Depends(require_admin)]
+)
 
 
 class UserSwitchData(BasePydanticModel):
@@ -42,13 +56,52 @@ class UserSwitchData(BasePydanticModel):
     email: str | None
 
 
+def _like_prefix(value: str) -> str:
+    "a LIKE pattern known at plan time, so postgres can turn it into an index range scan"
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def _decode_user_cursor(cursor: str) -> tuple[UserRole, TypeID]:
+    "cursor values are converted here, a tampered value would otherwise fail when the query is executed"
+
+    role, user_id = decode_cursor(cursor, size=2)
+
+    try:
+        if not isinstance(role, str) or not isinstance(user_id, str):
+            raise TypeError("cursor values must be strings")
+
+        user_typeid = TypeID.from_string(user_id)
+
+        if user_typeid.prefix != USER_ID_PREFIX:
+            raise ValueError("cursor ID is not a user ID")
+
+        return UserRole(role), user_typeid
+    except (TypeError, ValueError, TypeIDException) as e:
+        raise ClientError(
+            "Invalid cursor.", code="INVALID_CURSOR", param="cursor"
+        ) from e
+
+
+class UserListParams(CursorParams):
+    search: str | None = None
+    "an exact clerk ID or an email prefix"
+
+
 class UserListResponse(BasePydanticModel):
     current_user: UserSwitchData | None
     users: list[UserSwitchData]
+    next_cursor: str | None
+    "pass as `cursor` to fetch the next page, None on the last page"
 
 
 @admin_api_app.get("/users")
-def user_list(request: Request) -> UserListResponse:
+def user_list(
+    request: Request,
+    pagination: Annotated[UserListParams, Query()],
+) -> UserListResponse:
+    # keyset pagination over `(role, id)` is answered from `user_role_id_idx` no matter how deep the page is
+
     # remember, these routes are protected from the login_as functionality
     login_as_user = None
 
@@ -56,13 +109,76 @@ def user_list(request: Request) -> UserListResponse:
         login_as_clerk_id = request.session[SESSION_KEY_LOGIN_AS_USER]
         login_as_user = User.get(clerk_id=login_as_clerk_id)
 
+    sort_columns = [User.role, User.id]
+
+    # only the projected columns are loaded, not full user records
+    query = (
+        select(User.clerk_id, User.email, User.id, User.role)
+        .where(User.role != UserRole.admin)
+        .order_by(*sort_columns)
+        # one extra row to determine if there is a next page
+        .limit(pagination.limit + 1)
+    )
+
+    if search := pagination.search:
+        # prefix LIKE is answered from `user_email_pattern_idx`, clerk IDs are matched from their unique index
+        query = query.where(
+            or_(
+                User.clerk_id == search,
+                User.email.like(_like_prefix(search)),  # type: ignore[union-attr]
+            )
+        )
+
+    if pagination.cursor:
+        query = query.where(
+            after_cursor(sort_columns, _decode_user_cursor(pagination.cursor))  # type: ignore[arg-type]
+        )
+
+    # the listing tolerates replica lag, `login_as_user` above is read from the primary
+    with replica_session() as session:
+        rows = session.execute(query).all()
+
+    next_cursor = None
+    if len(rows) > pagination.limit:
+        rows = rows[: pagination.limit]
+        next_cursor = encode_cursor(rows[-1].role, rows[-1].id)
+
     return UserListResponse(
         current_user=login_as_user,  # type: ignore
-        users=list(
-            User.select(User.clerk_id, User.email, User.id)
-            .where(User.role != UserRole.admin)
-            .all()
-        ),  # type: ignore
+        users=[UserSwitchData.model_validate(row) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+
+# excluded from the openapi spec, this is downloaded directly and not used by the generated client
+@admin_api_app.get("/users/export", tags=["private"])
+def user_export(
+    after: Annotated[
+        str | None,
+        Query(description="resume an interrupted export after this user ID"),
+    ] = None,
+) -> StreamingJSONResponse:
+    "every non-admin user as NDJSON, ordered by ID. Streamed from a server-side cursor so memory use is constant."
+
+    query = (
+        select(User.clerk_id, User.email, User.id)
+        .where(User.role != UserRole.admin)
+        .order_by(User.id)
+    )
+
+    if after:
+        try:
+            after_id = TypeID.from_string(after)
+        except TypeIDException as e:
+            raise ClientError(
+                "Invalid user ID.", param="after", code="INVALID_CURSOR"
+            ) from e
+
+        query = query.where(after_cursor([User.id], [after_id]))  # type: ignore[list-item]
+
+    return StreamingJSONResponse(
+        (UserSwitchData.model_validate(row) for row in stream_query(query)),
+        ndjson=True,
     )
 
 
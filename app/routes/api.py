@@ -10,10 +10,21 @@ from starlette_context import context
 from typeid import TypeID
 from typeid.errors import TypeIDException
 
+from app.env import env
+
 from app.models.user import API_KEY_PREFIX, User
 
+from .dependencies.rate_limit import RateLimitAPIRequest
+from .utils.json_response import ORJSONRoute
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+API_RATE_LIMIT = env.int("API_RATE_LIMIT", 600)
+"number of requests an API user can burst before being throttled"
+
+API_RATE_LIMIT_PERIOD_SECONDS = env.int("API_RATE_LIMIT_PERIOD_SECONDS", 60)
+"window over which `API_RATE_LIMIT` capacity is replenished"
+
 UNAUTHORIZED_EXCEPTION = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail="Invalid key",
@@ -49,8 +60,19 @@ def authenticate_api_request_middleware(
     sentry_sdk.set_extra("api_user", True)
 
 
+# extract into variable for test import to easily override the limits
+rate_limit_api_request = RateLimitAPIRequest(
+    limit=API_RATE_LIMIT, period_seconds=API_RATE_LIMIT_PERIOD_SECONDS
+)
+
 external_api_app = APIRouter(
-    prefix="/external/v1", dependencies=[Depends(authenticate_api_request_middleware)]
+    route_class=ORJSONRoute,
+    prefix="/external/v1",
+    dependencies=[
+        Depends(authenticate_api_request_middleware),
+        # must come after authentication, limits are keyed by the API user
+        Depends(rate_limit_api_request),
+    ],
 )
 
 
@@ -5,23 +5,27 @@ Routes that are authenticated against a Clerk user session.
 from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 
-from activemodel.session_manager import aglobal_session
-
 from ..configuration.clerk import clerk
+from ..configuration.database_async import aglobal_async_session
 from .admin import admin_api_app
 from .dependencies.clerk import AuthenticateClerkRequest
+from .dependencies.database import instrumented_global_session
 from .dependencies.login_as import login_as
 from .dependencies.user import inject_user_record
+from .utils.json_response import ORJSONRoute
 
 # extract into variable for test import to easily override dependencies
 authenticate_clerk_request_middleware = AuthenticateClerkRequest(clerk)
 
 authenticated_api_app = APIRouter(
+    route_class=ORJSONRoute,
     prefix="/internal/v1",
     # think of dependencies as middleware
     dependencies=[
         # NOTE this line could not be more important, look at the underlying implementation!
-        Depends(aglobal_session),
+        Depends(instrumented_global_session),
+        # and the async session, shared by the `a*` model helpers in `async def` routes
+        Depends(aglobal_async_session),
         # make sure the user is auth'd via clerk to this endpoint
         Depends(authenticate_clerk_request_middleware),
         # inject a user record into the request state
@@ -46,7 +50,8 @@ def external_api_ping():
     return {"status": "ok"}
 
 
+# no IO, so there is no reason to run this in the threadpool
 @authenticated_api_app.get("/")
-def application_data(request: Request) -> AppData:
+async def application_data(request: Request) -> AppData:
     "example route to return the user ID that is attached to the request containing a clerk login"
     return AppData(user_id=str(request.state.user.id))
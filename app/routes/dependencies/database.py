@@ -0,0 +1,26 @@
+from contextlib import asynccontextmanager
+
+from fastapi import Request
+from starlette_context import context
+
+from app.configuration.database_instrumentation import log_query_budget, track_queries
+
+from activemodel.session_manager import aglobal_session
+
+
+async def instrumented_global_session(request: Request):
+    """
+    `aglobal_session`, plus query stats for the request, see `database_instrumentation`.
+
+    Dependency teardown runs after the response is sent, which is after the access log is written. The counts are
+    written to the starlette context as statements execute so the access log includes them.
+    """
+
+    log_context = context.data if context.exists() else None
+
+    with track_queries(log_context) as stats:
+        async with asynccontextmanager(aglobal_session)():
+            yield
+
+    route = request.scope.get("route")
+    log_query_budget(stats, route=getattr(route, "name", None))
@@ -0,0 +1,61 @@
+import math
+
+from fastapi import Request, Response, status
+from redis.exceptions import RedisError
+
+from app import log
+from app.lib import rate_limit
+from app.routes.errors import ClientError
+
+
+def _rate_limit_headers(result: rate_limit.RateLimitResult) -> dict[str, str]:
+    "https://datatracker.ietf.org/doc/draft-ietf-httpapi-ratelimit-headers/"
+
+    return {
+        "RateLimit-Limit": str(result.limit),
+        "RateLimit-Remaining": str(result.remaining),
+        "RateLimit-Reset": str(math.ceil(result.reset_ms / 1000)),
+    }
+
+
+class RateLimitAPIRequest:
+    """
+    Throttle external API requests per API user. Must run *after* API authentication, since the limit is keyed off of
+    `request.state.api_user`:
+
+    >>> external_api_app = APIRouter(
+    >>>    dependencies=[Depends(authenticate_api_request_middleware), Depends(RateLimitAPIRequest(600, 60))],
+    >>> )
+
+    If redis is unavailable, requests are allowed through: a broken limiter should not take down the API.
+    """
+
+    def __init__(self, limit: int, period_seconds: int):
+        self.limit = limit
+        self.period_seconds = period_seconds
+
+    def __call__(self, request: Request, response: Response) -> None:
+        api_user = request.state.api_user
+
+        try:
+            result = rate_limit.hit(
+                str(api_user.id), limit=self.limit, period_seconds=self.period_seconds
+            )
+        except RedisError as e:
+            log.warning("rate limit check failed, allowing request", error=str(e))
+            return
+
+        headers = _rate_limit_headers(result)
+
+        if not result.allowed:
+            raise ClientError(
+                "Rate limit exceeded.",
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                code="RATE_LIMITED",
+                internal_details={"api_user_id": str(api_user.id)},
+                headers=headers
+                | {"Retry-After": str(math.ceil(result.retry_after_ms / 1000))},
+            )
+
+        # headers set on the injected response are merged into the final route response
+        response.headers.update(headers)
@@ -3,6 +3,8 @@ from fastapi import HTTPException, Request, status
 from starlette_context import context
 from whenever import Instant
 
+from app.lib.user_activity import record_user_activity
+
 from app.models.user import User
 
 
@@ -13,17 +15,22 @@ def inject_user_record(request: Request):
     """
 
     clerk_id = request.state.auth_state.payload["sub"]
+    now = Instant.now()
+
     # upsert to avoid race condition on first load
     user = User.upsert(
         data={
             "clerk_id": clerk_id,
-            "last_active_at": Instant.now().to_system_tz(),
+            "last_active_at": now.to_system_tz(),
             # upsert does not automatically update timestamps
-            "updated_at": Instant.now().to_system_tz(),
+            "updated_at": now.to_system_tz(),
         },
         unique_by="clerk_id",
     )
 
+    # keeps the /status probe from having to scan users for recent activity
+    record_user_activity(now.timestamp())
+
     if user.deleted_at:
         raise HTTPException(
             status_code=status.HTTP_410_GONE, detail="Your Account has Been Disabled"
@@ -73,6 +73,8 @@ class ClientError(Exception):
             "info" since these are expected, in-spec errors. Bump to
             "warning" or "error" for cases that suggest client/server
             contract drift or genuinely unexpected business-rule misses.
+        headers: Additional HTTP headers to include on the response, such as
+            `Retry-After` on a 429. Defaults to None.
 
     Raises:
         AssertionError: If status_code is not in the 4xx range.
@@ -88,6 +90,7 @@ class ClientError(Exception):
         details: dict[str, t.Any] | None = None,
         internal_details: dict[str, t.Any] | None = None,
         level: LogLevel = "info",
+        headers: dict[str, str] | None = None,
     ):
         assert 400 <= status_code < 500, (
             f"ClientError status_code must be 4xx, got {status_code}"
@@ -100,6 +103,7 @@ class ClientError(Exception):
         self.details = details
         self.internal_details = internal_details
         self.level = level
+        self.headers = headers
 
         super().__init__(self.message)
 
@@ -230,4 +234,5 @@ def register_exception_handlers(app: FastAPI):
                     details=exc.details,
                 )
             ).model_dump(exclude_none=True),
+            headers=exc.headers,
         )
@@ -1,12 +1,15 @@
 # TODO this needs to be integrated into the application
 
+import time
+
 from fastapi import APIRouter, HTTPException
 from starlette import status
-from whenever import Instant
 
-from app.models.user import User
+from app.lib.user_activity import last_user_activity
+from app.routes.utils.cache import cache_response
+from app.routes.utils.json_response import ORJSONRoute
 
-healthcheck_api_app = APIRouter(tags=["private"])
+healthcheck_api_app = APIRouter(route_class=ORJSONRoute, tags=["private"])
 
 
 @healthcheck_api_app.get("/healthcheck")
@@ -15,14 +18,15 @@ async def healthcheck():
     return {"status": "ok"}
 
 
+# uptime monitors poll this from multiple regions, there's no need to hit the database on every probe
 @healthcheck_api_app.get("/status")
-async def active_user_status():
+@cache_response(ttl=10)
+def active_user_status():
     "check if users have logged in within the last day"
 
-    last_24_hours = Instant.now().to_system_tz().subtract(hours=24)
-    active_users = User.where(User.last_active_at > last_24_hours).count()  # type: ignore
+    last_activity = last_user_activity()
 
-    if active_users == 0:
+    if last_activity is None or last_activity < time.time() - 24 * 60 * 60:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
         )
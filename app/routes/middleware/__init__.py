@@ -1,18 +1,17 @@
-import re
+from collections.abc import Collection
+from typing import Literal, get_args
 
 from fastapi import FastAPI
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from secure import ContentSecurityPolicy, Secure
-from secure.middleware import SecureASGIMiddleware
-from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
-from structlog_config import fastapi_access_logger
 
 from app import log
 from app.env import env
 from app.environments import is_development
 
-from . import logging_context
+from .access_log import AccessLogMiddleware
+from .cors import CORSPolicy
+from .pipeline import RequestPipelineMiddleware
+from .session import LazySessionMiddleware
 
 SESSION_SECRET_KEY = env.str("SESSION_SECRET_KEY")
 
@@ -34,6 +33,15 @@ DEVELOPMENT_HOSTS = [
 """
 
 
+type MiddlewareLayer = Literal["access_logger", "cors", "session", "request_pipeline"]
+"""
+Layers which can be individually disabled, see `add_middleware`. CORS is applied by the request pipeline, so skipping
+`request_pipeline` disables CORS as well.
+"""
+
+MIDDLEWARE_LAYERS: tuple[MiddlewareLayer, ...] = get_args(MiddlewareLayer.__value__)
+
+
 def allowed_hosts(with_scheme: bool = False) -> list[str]:
     """
     Returns a list of allowed hosts for this service.
@@ -47,7 +55,7 @@ def allowed_hosts(with_scheme: bool = False) -> list[str]:
     This function is used by:
 
     - CORS configuration (origins must include scheme and, for dev, may include ports)
-    - Trusted host protection (FastAPI `TrustedHostMiddleware`)
+    - Trusted host protection (`RequestPipelineMiddleware`)
     - Session/cookie domain selection (the first host in the list)
 
     Notes:
@@ -55,7 +63,7 @@ def allowed_hosts(with_scheme: bool = False) -> list[str]:
     - `ALLOWED_HOST_LIST` must contain bare hostnames only (no scheme, no path).
       If an entry begins with `http://`, it will be ignored and a warning logged.
     - Local development servers often run on arbitrary ports; CORS handling augments these
-      values with a regex to allow any port for development hosts.
+      values to allow any port for development hosts.
     """
 
     raw_hosts = list(ALLOWED_HOST_LIST)
@@ -94,53 +102,47 @@ def allowed_hosts(with_scheme: bool = False) -> list[str]:
     return list(dict.fromkeys(hosts_with_scheme))
 
 
-def add_middleware(app: FastAPI):
+def add_middleware(app: FastAPI, skip: Collection[MiddlewareLayer] = ()):
     """
     Entrypoint to add all middleware for the root router:
 
     - Not requiring HTTPS here since it is assumed we'll be behind a proxy server
     - Looks like middleware is processed outside in, so the order here is important
+    - `skip` disables individual layers, which is only used to benchmark the cost of each layer
     """
 
     # replace the default fastapi logger with something nicer
-    fastapi_access_logger.add_middleware(app)
-
-    # this adds `context`, which access logs require
-    logging_context.add_middleware(app)
+    # access logs require the starlette `context` which is created by `RequestPipelineMiddleware` below
+    if "access_logger" not in skip:
+        app.add_middleware(AccessLogMiddleware)
 
     # CORS require that a specific scheme is used for the request
     allowed_hosts_with_schemes = allowed_hosts(True)
 
     # In development, browsers include the dynamic port in the Origin for local servers
     # (e.g. Vite, Playwright, etc.). Since we don't know the port, allow any port for
-    # known development hosts via a regex while still enumerating explicit origins.
-    allow_origin_regex: str | None = None
+    # known development hosts while still enumerating explicit origins.
+    any_port_origins: list[str] = []
     if is_development():
-        dev_hosts_pattern = "|".join(re.escape(h) for h in DEVELOPMENT_HOSTS)
-        allow_origin_regex = rf"^http://(?:{dev_hosts_pattern})(?::\\d+)?$"
+        any_port_origins = [
+            f"http://[{h}]" if ":" in h else f"http://{h}" for h in DEVELOPMENT_HOSTS
+        ]
 
     log.info("allowed_origins", allowed_origins=allowed_hosts_with_schemes)
 
     # even in development, CORS is required, especially since we are using separate domains for API & frontend
     # `http OPTIONS https://web.localhost` to test configuration here
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=allowed_hosts_with_schemes,
-        allow_origin_regex=allow_origin_regex,
-        # tells browsers to expose and include credentials (such as cookies, client-side certificates, and authorization headers) in cross-origin requests.
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+    # CORS is applied by `RequestPipelineMiddleware` below, so it runs before the session middleware like it used to
+    cors = (
+        CORSPolicy(
+            allowed_origins=allowed_hosts_with_schemes,
+            any_port_origins=any_port_origins,
+        )
+        if "cors" not in skip
+        else None
     )
 
-    # trusted hosts are not required for development, but reduces delta between prod & dev
-    # include the API host in your trusted host list, this will be used as the `Host` when HTTP/2 is used (which does
-    # not specify the `Host` header explicitly, it's inferred from `:authority` pseudo-header)
-    # when this check fails, you'll get a plain "Invalid host header" response with a 400 status code. No logs.
     allowed_hosts_without_scheme = allowed_hosts(False)
-    app.add_middleware(
-        TrustedHostMiddleware, allowed_hosts=allowed_hosts_without_scheme
-    )
 
     cookie_domain = allowed_hosts_without_scheme[0]
     log.info("cookie_domain", cookie_domain=cookie_domain)
@@ -148,14 +150,15 @@ def add_middleware(app: FastAPI):
     # note that `domain_cookie` and `https_only` will cause issues if you are not using
     # domains + localias (for local https) for testing. If cookie-related route + integration tests
     # fail, this code is probably to blame.
-    # https://www.starlette.io/middleware/#sessionmiddleware
-    app.add_middleware(
-        SessionMiddleware,
-        secret_key=SESSION_SECRET_KEY,
-        https_only=True,
-        domain=cookie_domain,
-        # same_site="Lax", is defined by default
-    )
+    # the session is only decoded on first access, since very few routes use it
+    if "session" not in skip:
+        app.add_middleware(
+            LazySessionMiddleware,
+            secret_key=SESSION_SECRET_KEY,
+            https_only=True,
+            domain=cookie_domain,
+            # same_site="Lax", is defined by default
+        )
 
     if is_development() and env.bool("FASTAPI_DEBUG", False):
         from app.utils.debug import PdbMiddleware
@@ -173,6 +176,23 @@ def add_middleware(app: FastAPI):
         for h in secure_headers.headers_list
         if not isinstance(h, ContentSecurityPolicy)
     ]
-    app.add_middleware(SecureASGIMiddleware, secure=secure_headers)
+
+    # added last, so it is the outermost middleware. In a single pass, this:
+    #
+    # - rejects untrusted hosts. Trusted hosts are not required for development, but reduces delta between prod & dev.
+    #   Include the API host in your trusted host list, this will be used as the `Host` when HTTP/2 is used (which does
+    #   not specify the `Host` header explicitly, it's inferred from `:authority` pseudo-header). When this check fails,
+    #   you'll get a plain "Invalid host header" response with a 400 status code. No logs.
+    # - answers CORS preflights and adds `Access-Control-*` headers. Credentials (cookies, client-side certificates, and
+    #   authorization headers) are allowed in cross-origin requests.
+    # - creates the starlette `context` + request ID and tags sentry with it
+    # - adds security headers to every response
+    if "request_pipeline" not in skip:
+        app.add_middleware(
+            RequestPipelineMiddleware,
+            allowed_hosts=allowed_hosts_without_scheme,
+            security_headers=secure_headers.headers,
+            cors=cors,
+        )
 
     return app
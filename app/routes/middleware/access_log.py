@@ -0,0 +1,65 @@
+"""
+Pure-ASGI port of `structlog_config.fastapi_access_logger`, which registers an `@app.middleware("http")`. That is a
+`BaseHTTPMiddleware`, which runs the rest of the stack in a separate task and streams the response body through a
+memory channel on every request.
+
+The log line and its fields are unchanged. The duration now includes sending the response body, since the line is
+logged once the app has finished instead of when the response starts.
+"""
+
+from time import perf_counter
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from structlog_config.fastapi_access_logger import (
+    client_ip_from_request,
+    get_path_with_query_string,
+    get_route_name,
+    is_static_assets_request,
+)
+
+from app import log
+
+
+class AccessLogMiddleware:
+    "log one line per HTTP request, static assets are logged at debug so they do not drown out the rest"
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_name = get_route_name(scope["app"], scope)
+        status_code: int | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        start = perf_counter()
+        await self.app(scope, receive, send_wrapper)
+        elapsed = perf_counter() - start
+
+        # like the original, a request which raised before responding is not logged here, the error is logged instead
+        if status_code is None:
+            return
+
+        log_method = log.debug if is_static_assets_request(scope) else log.info
+
+        log_method(
+            f"{status_code} {scope['method']} {get_path_with_query_string(scope)}",
+            time=round(elapsed * 1000),
+            status=status_code,
+            method=scope["method"],
+            path=scope["path"],
+            query=scope["query_string"].decode(),
+            client_ip=client_ip_from_request(Request(scope)),
+            route=route_name,
+        )
@@ -0,0 +1,154 @@
+"""
+CORS decisions precomputed at startup, applied by `RequestPipelineMiddleware`.
+
+Behaves like starlette's `CORSMiddleware` configured with explicit origins, `allow_credentials=True`, and all methods
+and headers allowed, but:
+
+- Origins are checked against frozen sets of encoded origins instead of a list scan + `allow_origin_regex`
+- Preflight (and simple response) headers are encoded once per origin and reused, the only per-request work for a
+  preflight is mirroring `Access-Control-Request-Headers`
+- Preflights are answered directly with raw ASGI messages, without building a `Response`
+
+Preflights are a large share of API traffic since the API and frontend are on separate origins.
+"""
+
+from collections.abc import Iterable
+
+from cachetools import LRUCache
+
+type HeaderList = tuple[tuple[bytes, bytes], ...]
+
+ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+
+PREFLIGHT_MAX_AGE_SECONDS = 600
+"matches the `CORSMiddleware` default"
+
+PREFLIGHT_RESPONSE_BODY = b"OK"
+
+ALLOW_ORIGIN_HEADER = b"access-control-allow-origin"
+ALLOW_CREDENTIALS_HEADER = b"access-control-allow-credentials"
+ALLOW_HEADERS_HEADER = b"access-control-allow-headers"
+VARY_HEADER = b"vary"
+
+SIMPLE_RESPONSE_HEADER_NAMES = frozenset(
+    {ALLOW_ORIGIN_HEADER, ALLOW_CREDENTIALS_HEADER}
+)
+"headers which replace any header with the same name on the route response"
+
+
+def _origin_without_port(origin: bytes) -> bytes:
+    scheme_and_host, separator, port = origin.rpartition(b":")
+
+    # `http://localhost` partitions on the scheme separator, which leaves `//localhost` as the "port"
+    if separator and port.isdigit():
+        return scheme_and_host
+
+    return origin
+
+
+class CORSPolicy:
+    """
+    - `allowed_origins` must match the request `Origin` exactly, including scheme and port
+    - `any_port_origins` match with or without a port. In development, local servers (vite, playwright, etc) run on
+      arbitrary ports which we cannot enumerate.
+    """
+
+    def __init__(
+        self,
+        *,
+        allowed_origins: Iterable[str],
+        any_port_origins: Iterable[str] = (),
+    ):
+        self.allowed_origins = frozenset(
+            origin.encode("latin-1") for origin in allowed_origins
+        )
+        self.any_port_origins = frozenset(
+            origin.encode("latin-1") for origin in any_port_origins
+        )
+        self.allowed_methods = frozenset(method.encode() for method in ALL_METHODS)
+
+        # sent on every preflight, including rejected ones
+        self.preflight_base_headers: HeaderList = (
+            (VARY_HEADER, b"Origin"),
+            (b"access-control-allow-methods", ", ".join(ALL_METHODS).encode()),
+            (b"access-control-max-age", str(PREFLIGHT_MAX_AGE_SECONDS).encode()),
+            (ALLOW_CREDENTIALS_HEADER, b"true"),
+        )
+
+        self.disallowed_origin_headers: HeaderList = (
+            (ALLOW_CREDENTIALS_HEADER, b"true"),
+        )
+
+        # any-port origins are added as they are seen, bounded so random ports cannot grow memory without limit
+        self._preflight_headers: LRUCache[bytes, HeaderList] = LRUCache(maxsize=256)
+        self._simple_headers: LRUCache[bytes, HeaderList] = LRUCache(maxsize=256)
+
+        for origin in self.allowed_origins | self.any_port_origins:
+            self._cache_origin(origin)
+
+    def is_allowed_origin(self, origin: bytes) -> bool:
+        if origin in self._simple_headers or origin in self.allowed_origins:
+            return True
+
+        return bool(self.any_port_origins) and (
+            _origin_without_port(origin) in self.any_port_origins
+        )
+
+    def _cache_origin(self, origin: bytes) -> None:
+        self._preflight_headers[origin] = (
+            *self.preflight_base_headers,
+            (ALLOW_ORIGIN_HEADER, origin),
+        )
+        self._simple_headers[origin] = (
+            (ALLOW_CREDENTIALS_HEADER, b"true"),
+            (ALLOW_ORIGIN_HEADER, origin),
+        )
+
+    def simple_response_headers(self, origin: bytes) -> tuple[HeaderList, bool]:
+        "headers to add to a non-preflight response, and whether `Origin` should be added to `Vary`"
+
+        if (headers := self._simple_headers.get(origin)) is not None:
+            return headers, True
+
+        if not self.is_allowed_origin(origin):
+            return self.disallowed_origin_headers, False
+
+        self._cache_origin(origin)
+        return self._simple_headers[origin], True
+
+    def preflight_response(
+        self,
+        origin: bytes,
+        requested_method: bytes,
+        requested_headers: bytes | None,
+    ) -> tuple[int, bytes, list[tuple[bytes, bytes]]]:
+        "status, body, and headers for a preflight request"
+
+        failures: list[str] = []
+
+        headers = self._preflight_headers.get(origin)
+        if headers is None:
+            if self.is_allowed_origin(origin):
+                self._cache_origin(origin)
+                headers = self._preflight_headers[origin]
+            else:
+                headers = self.preflight_base_headers
+                failures.append("origin")
+
+        if requested_method not in self.allowed_methods:
+            failures.append("method")
+
+        response_headers = list(headers)
+
+        # all headers are allowed, so whatever the browser asks for is mirrored back
+        if requested_headers is not None:
+            response_headers.append((ALLOW_HEADERS_HEADER, requested_headers))
+
+        if failures:
+            return (
+                400,
+                f"Disallowed CORS {', '.join(failures)}".encode(),
+                response_headers,
+            )
+
+        return 200, PREFLIGHT_RESPONSE_BODY, response_headers
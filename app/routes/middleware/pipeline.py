@@ -0,0 +1,222 @@
+"""
+Single pure-ASGI middleware which replaces a stack of independent middleware that each ran on every request:
+
+- `TrustedHostMiddleware`: reject requests with a `Host` header which is not in the allowed host list
+- `RawContextMiddleware` + `RequestIdPlugin`: starlette-context request ID, used in every log line
+- `@app.middleware("http")` sentry tagging: a `BaseHTTPMiddleware`, which adds task hops and wraps the response body
+- `SecureASGIMiddleware`: security headers on every response
+- `CORSMiddleware`: preflight responses and `Access-Control-*` headers, see `CORSPolicy`
+
+Everything that can be computed at startup (host and origin lookup tables, encoded header tuples) is, so the
+per-request work is a single pass over the request headers and a single rewrite of the response start message.
+
+If a structlog contextvar approach is used, it's possible for context to be lost since fastapi/starlette
+can run threaded, forked, and async code. This is why starlette-context is still used to hold the request context,
+we just create that context here instead of through `RawContextMiddleware`.
+
+References:
+
+- https://pypi.org/project/fastapi-structlog/0.5.0/ (https://github.com/iloveitaly/fastapi-logger)
+- https://pypi.org/project/asgi-correlation-id/ - used to generate a request ID that is added to all logs
+- https://gist.github.com/nymous/f138c7f06062b7c43c060bf03759c29e
+- https://github.com/tomwojcik/starlette-context
+- https://github.com/snok/asgi-correlation-id/blob/ed006dcc119447bf68a170bd1557f6015427213d/asgi_correlation_id/extensions/sentry.py#L18-L33
+- https://blog.sentry.io/trace-errors-through-stack-using-unique-identifiers-in-sentry/
+"""
+
+import uuid
+from collections.abc import Iterable, Mapping
+
+import sentry_sdk
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette_context import request_cycle_context
+from starlette_context.header_keys import HeaderKeys
+
+from .cors import SIMPLE_RESPONSE_HEADER_NAMES, VARY_HEADER, CORSPolicy
+
+REQUEST_ID_HEADER = HeaderKeys.request_id.lower().encode("latin-1")
+
+INVALID_HOST_RESPONSE_BODY = "Invalid host header"
+"matches TrustedHostMiddleware so clients and monitors see the same response"
+
+
+def _encode_headers(headers: Mapping[str, str]) -> tuple[tuple[bytes, bytes], ...]:
+    return tuple(
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in headers.items()
+    )
+
+
+class RequestPipelineMiddleware:
+    """
+    - Host checks support exact hosts, `*.domain.com` wildcards, and `*` to allow any host
+    - A valid UUID `X-Request-ID` header is reused, otherwise a new request ID is generated. Unlike `RequestIdPlugin`,
+      an invalid request ID does not fail the request.
+    - Security headers replace any existing header with the same name, mirroring `SecureASGIMiddleware`
+    - When a `cors` policy is provided, requests with an `Origin` header are handled like `CORSMiddleware`. Rejected
+      hosts are rejected before any CORS handling.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        allowed_hosts: Iterable[str],
+        security_headers: Mapping[str, str],
+        cors: CORSPolicy | None = None,
+    ):
+        self.app = app
+        self.cors = cors
+
+        hosts = [host.lower() for host in allowed_hosts]
+        self.allow_any_host = "*" in hosts
+        self.exact_hosts = frozenset(host for host in hosts if not host.startswith("*"))
+        self.wildcard_host_suffixes = tuple(
+            host[1:] for host in hosts if host.startswith("*.")
+        )
+
+        self.security_headers = _encode_headers(security_headers)
+        self.security_header_names = frozenset(
+            name for name, _ in self.security_headers
+        )
+
+    def is_allowed_host(self, host: bytes | None) -> bool:
+        if self.allow_any_host:
+            return True
+
+        if not host:
+            return False
+
+        hostname = host.decode("latin-1").split(":")[0].lower()
+
+        return hostname in self.exact_hosts or hostname.endswith(
+            self.wildcard_host_suffixes
+        )
+
+    def add_response_headers(
+        self,
+        message: Message,
+        request_id: bytes,
+        cors_headers: tuple[tuple[bytes, bytes], ...] = (),
+        vary_origin: bool = False,
+    ) -> None:
+        headers: list[tuple[bytes, bytes]] = []
+        vary: bytes | None = None
+
+        for header in message.get("headers", ()):
+            name = header[0].lower()
+
+            if name in self.security_header_names:
+                continue
+
+            if cors_headers and name in SIMPLE_RESPONSE_HEADER_NAMES:
+                continue
+
+            if vary_origin and name == VARY_HEADER:
+                vary = header[1] if vary is None else vary + b", " + header[1]
+                continue
+
+            headers.append(header)
+
+        headers.extend(self.security_headers)
+        headers.append((REQUEST_ID_HEADER, request_id))
+        headers.extend(cors_headers)
+
+        if vary_origin:
+            headers.append(
+                (VARY_HEADER, b"Origin" if vary is None else vary + b", Origin")
+            )
+
+        message["headers"] = headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        host: bytes | None = None
+        raw_request_id: bytes | None = None
+        origin: bytes | None = None
+        requested_method: bytes | None = None
+        requested_headers: bytes | None = None
+
+        for name, value in scope["headers"]:
+            if name == b"host":
+                host = value
+            elif name == REQUEST_ID_HEADER:
+                raw_request_id = value
+            elif name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                requested_method = value
+            elif name == b"access-control-request-headers":
+                requested_headers = value
+
+        request_id = _request_id(raw_request_id)
+        encoded_request_id = request_id.encode("latin-1")
+
+        cors_headers: tuple[tuple[bytes, bytes], ...] = ()
+        vary_origin = False
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                self.add_response_headers(
+                    message, encoded_request_id, cors_headers, vary_origin
+                )
+
+            await send(message)
+
+        if not self.is_allowed_host(host):
+            response = PlainTextResponse(INVALID_HOST_RESPONSE_BODY, status_code=400)
+            await response(scope, receive, send_wrapper)
+            return
+
+        if self.cors and origin is not None and scope["type"] == "http":
+            if scope["method"] == "OPTIONS" and requested_method is not None:
+                await self.send_preflight_response(
+                    send_wrapper, origin, requested_method, requested_headers
+                )
+                return
+
+            cors_headers, vary_origin = self.cors.simple_response_headers(origin)
+
+        # the transaction-id tag corresponds to the request ID in our logs, so sentry errors can be correlated
+        sentry_sdk.get_isolation_scope().set_tag("transaction_id", request_id)
+
+        with request_cycle_context({HeaderKeys.request_id: request_id}):
+            await self.app(scope, receive, send_wrapper)
+
+    async def send_preflight_response(
+        self,
+        send: Send,
+        origin: bytes,
+        requested_method: bytes,
+        requested_headers: bytes | None,
+    ) -> None:
+        assert self.cors
+
+        status, body, headers = self.cors.preflight_response(
+            origin, requested_method, requested_headers
+        )
+
+        headers.append((b"content-type", b"text/plain; charset=utf-8"))
+        headers.append((b"content-length", str(len(body)).encode()))
+
+        await send(
+            {"type": "http.response.start", "status": status, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def _request_id(raw_request_id: bytes | None) -> str:
+    if raw_request_id:
+        request_id = raw_request_id.decode("latin-1")
+
+        try:
+            uuid.UUID(request_id)
+            return request_id
+        except ValueError:
+            pass
+
+    return uuid.uuid4().hex
@@ -0,0 +1,245 @@
+"""
+Signed cookie sessions which only cost something on requests that actually use the session.
+
+Drop-in replacement for starlette's `SessionMiddleware` (`request.session` works the same way), except:
+
+- The cookie is only verified and decoded the first time `request.session` is read or written. Almost no routes use
+  the session, so most requests only pay for finding the cookie header.
+- The cookie is only re-issued when the session is modified, or when it is past half of its `max_age`. Starlette signs
+  and sets the cookie on every response.
+- The cookie is a single url-safe base64 blob of `version | issued_at | orjson payload | truncated HMAC-SHA256`,
+  instead of itsdangerous' `base64(json).base64(timestamp).base64(sha1 signature)`.
+
+The session is signed, not encrypted: don't put anything in it which the user should not be able to read.
+"""
+
+import base64
+import hashlib
+import hmac
+import struct
+import time
+from collections.abc import Iterator, MutableMapping
+from typing import Any
+
+import orjson
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SESSION_COOKIE_VERSION = 1
+
+SESSION_MAX_AGE_SECONDS = 14 * 24 * 60 * 60
+"matches the `SessionMiddleware` default"
+
+_HEADER = struct.Struct("!BI")
+"cookie version + issued at (unix seconds)"
+
+_SIGNATURE_SIZE = 16
+"HMAC-SHA256 truncated to 128 bits"
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+class SessionSerializer:
+    def __init__(self, secret_key: str, max_age: int = SESSION_MAX_AGE_SECONDS):
+        # derived so the raw secret is never used directly as an HMAC key if it is shared with other signers
+        self.signing_key = hashlib.sha256(
+            b"session-cookie:" + secret_key.encode()
+        ).digest()
+        self.max_age = max_age
+
+    def _sign(self, value: bytes) -> bytes:
+        return hmac.digest(self.signing_key, value, "sha256")[:_SIGNATURE_SIZE]
+
+    def dumps(self, session: dict[str, Any], issued_at: int | None = None) -> str:
+        if issued_at is None:
+            issued_at = int(time.time())
+
+        signed = _HEADER.pack(SESSION_COOKIE_VERSION, issued_at) + orjson.dumps(session)
+        return _b64encode(signed + self._sign(signed))
+
+    def loads(self, cookie: str) -> tuple[dict[str, Any], int] | None:
+        "session and the time it was issued, or None if the cookie is invalid or expired"
+
+        try:
+            raw = _b64decode(cookie)
+        except ValueError:
+            return None
+
+        if len(raw) < _HEADER.size + _SIGNATURE_SIZE:
+            return None
+
+        signed, signature = raw[:-_SIGNATURE_SIZE], raw[-_SIGNATURE_SIZE:]
+
+        if not hmac.compare_digest(signature, self._sign(signed)):
+            return None
+
+        version, issued_at = _HEADER.unpack_from(signed)
+
+        if version != SESSION_COOKIE_VERSION or time.time() - issued_at > self.max_age:
+            return None
+
+        try:
+            session = orjson.loads(signed[_HEADER.size :])
+        except orjson.JSONDecodeError:
+            return None
+
+        if not isinstance(session, dict):
+            return None
+
+        return session, issued_at
+
+
+class LazySession(MutableMapping[str, Any]):
+    "`request.session`, the cookie is decoded on first access and writes are tracked"
+
+    def __init__(self, serializer: SessionSerializer, cookie: str | None):
+        self._serializer = serializer
+        self._cookie = cookie
+        self._data: dict[str, Any] | None = None
+
+        self.issued_at: int | None = None
+        self.modified = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def data(self) -> dict[str, Any]:
+        if self._data is None:
+            self._data = {}
+
+            if self._cookie and (decoded := self._serializer.loads(self._cookie)):
+                self._data, self.issued_at = decoded
+
+        return self._data
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key: str) -> None:
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"LazySession({self.data!r})"
+
+    def clear(self) -> None:
+        if self.data:
+            self.modified = True
+
+        self.data.clear()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:  # type: ignore[override]
+        self.data.update(*args, **kwargs)
+        self.modified = True
+
+
+class LazySessionMiddleware:
+    """
+    Accepts the same arguments as `SessionMiddleware`:
+
+    >>> app.add_middleware(LazySessionMiddleware, secret_key=..., https_only=True, domain=...)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        secret_key: str,
+        session_cookie: str = "session",
+        max_age: int = SESSION_MAX_AGE_SECONDS,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+        domain: str | None = None,
+    ):
+        self.app = app
+        self.serializer = SessionSerializer(secret_key, max_age)
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+
+        security_flags = f"httponly; samesite={same_site}"
+        if https_only:
+            security_flags += "; secure"
+        if domain is not None:
+            security_flags += f"; domain={domain}"
+
+        self.cookie_attributes = f"path={path}; Max-Age={max_age}; {security_flags}"
+        self.clear_cookie_header = (
+            f"{session_cookie}=null; path={path}; "
+            f"expires=Thu, 01 Jan 1970 00:00:00 GMT; {security_flags}"
+        )
+
+    def _session_cookie(self, scope: Scope) -> str | None:
+        "find the raw cookie value without parsing every cookie in the header unless the name is present"
+
+        prefix = self.session_cookie.encode("latin-1") + b"="
+
+        for name, value in scope["headers"]:
+            if name != b"cookie" or prefix not in value:
+                continue
+
+            if cookie := cookie_parser(value.decode("latin-1")).get(
+                self.session_cookie
+            ):
+                return cookie
+
+        return None
+
+    def _set_cookie_header(self, session: LazySession) -> str | None:
+        if not session.loaded:
+            return None
+
+        if session.data:
+            needs_refresh = (
+                session.issued_at is not None
+                and time.time() - session.issued_at > self.max_age / 2
+            )
+
+            if not session.modified and not needs_refresh:
+                return None
+
+            value = self.serializer.dumps(session.data)
+            return f"{self.session_cookie}={value}; {self.cookie_attributes}"
+
+        # the session was emptied, remove the cookie it was loaded from
+        if session.issued_at is not None:
+            return self.clear_cookie_header
+
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        session = LazySession(self.serializer, self._session_cookie(scope))
+        scope["session"] = session
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and (
+                cookie_header := self._set_cookie_header(session)
+            ):
+                headers = MutableHeaders(scope=message)
+                headers.append("Set-Cookie", cookie_header)
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -7,13 +7,18 @@ route paths in automated unit tests.
 
 from fastapi import APIRouter, Depends
 
-from activemodel.session_manager import aglobal_session
+from ..configuration.database_async import aglobal_async_session
+from .dependencies.database import instrumented_global_session
+from .utils.json_response import ORJSONRoute
 
 unauthenticated_api = APIRouter(
+    route_class=ORJSONRoute,
     prefix="/unauthenticated",
     dependencies=[
         # NOTE this line could not be more important, look at the underlying implementation!
-        Depends(aglobal_session),
+        Depends(instrumented_global_session),
+        # and the async session, shared by the `a*` model helpers in `async def` routes
+        Depends(aglobal_async_session),
     ],
 )
 
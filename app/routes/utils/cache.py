@@ -0,0 +1,252 @@
+"""
+Declarative response caching for FastAPI routes.
+
+>>> @router.get("/status")
+>>> @cache_response(ttl=5, stale_ttl=30)
+>>> async def status(): ...
+
+- Two tiers: a bounded in-process LRU checked first, backed by redis so all workers share a computed response.
+- Responses are cached *rendered* (the exact `ORJSONSortedResponse` bytes), so a hit skips route logic, validation,
+  and serialization entirely.
+- Only successful responses are cached. Exceptions (HTTPException, ClientError, etc) propagate untouched.
+- `per_user=True` keys the cache on `request.state.user`, which requires `inject_user_record` upstream.
+- Concurrent misses for the same key within a process are coalesced into a single route execution.
+- During the `stale_ttl` window after expiration, the stale response is served immediately and a single background
+  refresh is kicked off.
+
+The background refresh runs outside of the original request: it gets a fresh database session, but starlette-context
+and other request-scoped state are *not* available. Don't use `stale_ttl` on routes which depend on those.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import struct
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from cachetools import LRUCache
+from fastapi import Request, Response
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from app import log
+from app.configuration.redis import get_redis, redis_pipeline
+from app.routes.utils.json_response import ORJSONSortedResponse
+
+from activemodel.session_manager import global_session
+
+CACHE_KEY_PREFIX = "route_cache"
+CACHE_STATUS_HEADER = "X-Cache"
+
+# (fresh_until, stale_until, rendered body)
+type CacheEntry = tuple[float, float, bytes]
+
+# Arbitrary bound so per-user keys cannot grow memory without limit.
+_memory_cache: LRUCache[str, CacheEntry] = LRUCache(maxsize=1024)
+
+_in_flight: dict[str, asyncio.Future[bytes]] = {}
+"single-flight registry, only one computation per key at a time in this process"
+
+_background_refreshes: set[asyncio.Task] = set()
+"the event loop only holds weak references to tasks, keep them alive until they finish"
+
+_REDIS_HEADER = struct.Struct("!d")
+"redis values are the packed `fresh_until` timestamp followed by the rendered body"
+
+
+def clear_response_cache() -> None:
+    "clear the in-process tier, redis is cleared separately"
+    _memory_cache.clear()
+
+
+def _serialize(result: Any) -> bytes:
+    return ORJSONSortedResponse(result).body
+
+
+def _cached_response(body: bytes, cache_status: str) -> Response:
+    return Response(
+        content=body,
+        media_type=ORJSONSortedResponse.media_type,
+        headers={CACHE_STATUS_HEADER: cache_status},
+    )
+
+
+def _cache_key(namespace: str, request: Request, per_user: bool) -> str:
+    parts = [CACHE_KEY_PREFIX, namespace, request.url.path]
+
+    if request.url.query:
+        parts.append(str(sorted(request.query_params.multi_items())))
+
+    if per_user:
+        parts.append(str(request.state.user.id))
+
+    return ":".join(parts)
+
+
+def _redis_get(key: str) -> CacheEntry | None:
+    try:
+        # no MULTI/EXEC, a key expiring between the two reads is returned as a miss
+        raw, ttl_ms = redis_pipeline().get(key).pttl(key).execute()
+    except RedisError as e:
+        log.warning("response cache read failed", key=key, error=str(e))
+        return None
+
+    if not isinstance(raw, bytes) or not isinstance(ttl_ms, int) or ttl_ms <= 0:
+        return None
+
+    try:
+        (fresh_until,) = _REDIS_HEADER.unpack_from(raw)
+    except struct.error:
+        # shorter than the header, written by something other than `_redis_set`
+        log.warning("response cache entry invalid", key=key)
+        return None
+
+    return fresh_until, time.time() + ttl_ms / 1000, raw[_REDIS_HEADER.size :]
+
+
+def _redis_set(key: str, entry: CacheEntry) -> None:
+    fresh_until, stale_until, body = entry
+    ttl_ms = int((stale_until - time.time()) * 1000)
+
+    if ttl_ms <= 0:
+        return
+
+    try:
+        get_redis().set(key, _REDIS_HEADER.pack(fresh_until) + body, px=ttl_ms)
+    except RedisError as e:
+        log.warning("response cache write failed", key=key, error=str(e))
+
+
+async def _single_flight(key: str, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+    if (existing := _in_flight.get(key)) is not None:
+        return await asyncio.shield(existing)
+
+    future = asyncio.ensure_future(compute())
+    _in_flight[key] = future
+
+    try:
+        # shielded so a disconnecting client does not cancel the computation other requests are waiting on
+        return await asyncio.shield(future)
+    finally:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+
+
+def cache_response(
+    *,
+    ttl: float,
+    stale_ttl: float = 0,
+    per_user: bool = False,
+) -> Callable[[Callable[..., Any]], Callable[..., Awaitable[Response]]]:
+    """
+    Cache a JSON route response for `ttl` seconds, and optionally serve it stale for an additional `stale_ttl` seconds
+    while it is refreshed in the background. Must be applied *below* the router decorator.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Awaitable[Response]]:
+        namespace = f"{func.__module__}.{func.__qualname__}"
+        is_coroutine = inspect.iscoroutinefunction(func)
+
+        # `request` is required to build the cache key, inject it into the signature if the route does not ask for it
+        signature = inspect.signature(func)
+        request_param_name = next(
+            (
+                name
+                for name, param in signature.parameters.items()
+                if param.annotation is Request
+            ),
+            None,
+        )
+        injected_request = request_param_name is None
+
+        if injected_request:
+            request_param_name = "__cache_request"
+            signature = signature.replace(
+                parameters=[
+                    *signature.parameters.values(),
+                    inspect.Parameter(
+                        request_param_name,
+                        inspect.Parameter.KEYWORD_ONLY,
+                        annotation=Request,
+                    ),
+                ]
+            )
+
+        async def call_route(kwargs: dict[str, Any]) -> Any:
+            if is_coroutine:
+                return await func(**kwargs)
+
+            return await run_in_threadpool(func, **kwargs)
+
+        def store(key: str, body: bytes) -> CacheEntry:
+            now = time.time()
+            entry = (now + ttl, now + ttl + stale_ttl, body)
+            _memory_cache[key] = entry
+            return entry
+
+        async def compute(key: str, kwargs: dict[str, Any]) -> bytes:
+            body = _serialize(await call_route(kwargs))
+            await run_in_threadpool(_redis_set, key, store(key, body))
+            return body
+
+        async def refresh(key: str, kwargs: dict[str, Any]) -> None:
+            "runs in an empty context, so the request's (closed) database session is not reused"
+
+            async def compute_with_session() -> bytes:
+                if is_coroutine:
+                    with global_session():
+                        return await compute(key, kwargs)
+
+                def run_sync() -> Any:
+                    with global_session():
+                        return func(**kwargs)
+
+                body = _serialize(await run_in_threadpool(run_sync))
+                await run_in_threadpool(_redis_set, key, store(key, body))
+                return body
+
+            try:
+                await _single_flight(key, compute_with_session)
+            except Exception:  # noqa: BLE001
+                log.exception("response cache refresh failed", key=key)
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs: Any) -> Response:
+            request: Request = kwargs[request_param_name]
+            if injected_request:
+                del kwargs[request_param_name]
+
+            key = _cache_key(namespace, request, per_user)
+            now = time.time()
+
+            entry = _memory_cache.get(key)
+            if entry is None or entry[1] <= now:
+                entry = await run_in_threadpool(_redis_get, key)
+
+                if entry is not None:
+                    _memory_cache[key] = entry
+
+            if entry is not None and now < entry[0]:
+                return _cached_response(entry[2], "HIT")
+
+            if entry is not None and now < entry[1]:
+                if key not in _in_flight:
+                    task = asyncio.get_running_loop().create_task(
+                        refresh(key, kwargs), context=contextvars.Context()
+                    )
+                    _background_refreshes.add(task)
+                    task.add_done_callback(_background_refreshes.discard)
+
+                return _cached_response(entry[2], "STALE")
+
+            body = await _single_flight(key, lambda: compute(key, kwargs))
+            return _cached_response(body, "MISS")
+
+        # FastAPI inspects this to resolve dependencies and the response model for the openapi spec
+        wrapper.__signature__ = signature  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
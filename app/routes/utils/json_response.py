@@ -1,7 +1,27 @@
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator, Mapping
+from itertools import batched
 from typing import Any
 
 import orjson
-from fastapi.responses import JSONResponse
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _orjson_default(value: Any) -> Any:
+    "called by orjson for any type it does not natively support"
+
+    if isinstance(value, BaseModel):
+        return value.__pydantic_serializer__.to_python(
+            value, mode="json", by_alias=True
+        )
+
+    return jsonable_encoder(value)
 
 
 class ORJSONSortedResponse(JSONResponse):
@@ -10,7 +30,134 @@ class ORJSONSortedResponse(JSONResponse):
     not respect the order of the keys:
 
     https://stackoverflow.com/questions/64408092/how-to-set-response-class-in-fastapi
+
+    Pydantic models can be passed directly and are serialized straight to bytes by pydantic-core, which keeps the model
+    field order and aliases like FastAPI does, instead of being converted to a dict by `jsonable_encoder` first. Models
+    nested inside of other content are converted as orjson encounters them.
     """
 
     def render(self, content: Any) -> bytes:
-        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content, by_alias=True)
+
+        return orjson.dumps(
+            content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS
+        )
+
+
+class ORJSONRoute(APIRoute):
+    """
+    Renders routes without a response model (plain dicts and lists) with `ORJSONSortedResponse`.
+
+    Setting `default_response_class` on the app or a router is not the same: any explicit response class disables
+    FastAPI's fast path for routes with a response model, which serializes straight to JSON bytes with the route's
+    pydantic serializer. The response class is kept as a default here, so FastAPI still takes the fast path when it can
+    and falls back to `ORJSONSortedResponse` otherwise. Use as the `route_class` of every router.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        endpoint: Any,
+        *,
+        response_class: Any = Default(ORJSONSortedResponse),
+        **kwargs: Any,
+    ):
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = Default(ORJSONSortedResponse)
+
+        super().__init__(path, endpoint, response_class=response_class, **kwargs)
+
+
+def _render_item(item: Any) -> bytes:
+    if isinstance(item, BaseModel):
+        return item.__pydantic_serializer__.to_json(item, by_alias=True)
+
+    return orjson.dumps(item, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _render_batch(batch: Iterable[Any], ndjson: bool, first: bool) -> bytes:
+    rendered = [_render_item(item) for item in batch]
+
+    if ndjson:
+        return b"\n".join(rendered) + b"\n"
+
+    return (b"" if first else b",") + b",".join(rendered)
+
+
+def _encode_items(
+    items: Iterable[Any], ndjson: bool, batch_size: int
+) -> Iterator[bytes]:
+    if not ndjson:
+        yield b"["
+
+    for index, batch in enumerate(batched(items, batch_size, strict=False)):
+        yield _render_batch(batch, ndjson, first=index == 0)
+
+    if not ndjson:
+        yield b"]"
+
+
+async def _aencode_items(
+    items: AsyncIterable[Any], ndjson: bool, batch_size: int
+) -> AsyncIterator[bytes]:
+    if not ndjson:
+        yield b"["
+
+    first = True
+    batch: list[Any] = []
+
+    async for item in items:
+        batch.append(item)
+
+        if len(batch) >= batch_size:
+            yield _render_batch(batch, ndjson, first)
+            first = False
+            batch = []
+
+    if batch:
+        yield _render_batch(batch, ndjson, first)
+
+    if not ndjson:
+        yield b"]"
+
+
+class StreamingJSONResponse(StreamingResponse):
+    """
+    Stream a large list as a JSON array, or as NDJSON with `ndjson=True`, without holding the list in memory. Items are
+    rendered like `ORJSONSortedResponse` and sent in chunks of `batch_size` items.
+
+    `content` is consumed lazily *after* the route returns, pass a generator (e.g. `stream_query`) and not a list:
+
+    >>> return StreamingJSONResponse(stream_query(select(User)), ndjson=True)
+
+    Sync iterables are consumed in the threadpool, so a blocking database cursor is fine. The status and headers are
+    sent before the first item is rendered: if the iterable raises, the response is cut off and a JSON array will be
+    left unterminated, which clients should treat as a failed download.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Iterable[Any] | AsyncIterable[Any],
+        *,
+        ndjson: bool = False,
+        batch_size: int = 100,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        background: BackgroundTask | None = None,
+    ):
+        body = (
+            _aencode_items(content, ndjson, batch_size)
+            if isinstance(content, AsyncIterable)
+            else _encode_items(content, ndjson, batch_size)
+        )
+
+        super().__init__(
+            body,
+            status_code=status_code,
+            headers=headers,
+            media_type=NDJSON_MEDIA_TYPE if ndjson else self.media_type,
+            background=background,
+        )
@@ -0,0 +1,104 @@
+"""
+Cursor (keyset) pagination helpers.
+
+Offset pagination gets slower the deeper you page, since the database has to produce and discard every skipped row.
+Keyset pagination instead filters on the sort key of the last row returned, which is answered directly from an index no
+matter how deep the page is.
+
+Cursors are opaque to clients: the sort key values of the last row, orjson encoded and url-safe base64'd.
+"""
+
+import base64
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+import orjson
+from pydantic import BaseModel, Field
+
+from app.routes.errors import ClientError
+
+from activemodel.session_manager import get_session
+from sqlalchemy import ColumnElement, Select, literal, tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+STREAM_BATCH_SIZE = 500
+"rows fetched from the server-side cursor per round trip"
+
+
+class CursorParams(BaseModel):
+    """
+    Use as query parameters:
+
+    >>> def route(pagination: Annotated[CursorParams, Query()]): ...
+
+    FastAPI only expands a model into individual query parameters when it is the route's only query parameter.
+    Subclass it to add more, otherwise the model is expected as a single `pagination` parameter.
+    """
+
+    cursor: str | None = None
+    "`next_cursor` from the previous page, omit for the first page"
+    limit: int = Field(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+
+
+def encode_cursor(*values: Any) -> str:
+    return (
+        base64.urlsafe_b64encode(orjson.dumps(values, default=str))
+        .rstrip(b"=")
+        .decode("ascii")
+    )
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    "decode a cursor which should contain `size` values, raising a 400 if it was tampered with or is from another route"
+
+    try:
+        values = orjson.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+    except ValueError:
+        values = None
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ClientError("Invalid cursor.", code="INVALID_CURSOR", param="cursor")
+
+    return values
+
+
+def after_cursor(
+    columns: Sequence[ColumnElement[Any]], values: Sequence[Any]
+) -> ColumnElement[bool]:
+    "row value comparison, `(a, b) > (1, 2)`, which postgres answers with a single index range scan on `(a, b)`"
+
+    # cursor values are bound with the column type so custom types (TypeID, enums) are converted like any other filter
+    bound_values = [
+        literal(value, type_=column.type)
+        for column, value in zip(columns, values, strict=True)
+    ]
+
+    if len(columns) == 1:
+        return columns[0] > bound_values[0]
+
+    return tuple_(*columns) > tuple_(*bound_values)
+
+
+def stream_query(
+    statement: Select, batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[Any]:
+    """
+    Iterate over the results of `statement` using a server-side cursor, so only `batch_size` rows are held in memory at
+    a time. Selecting a single model or column yields scalars, otherwise rows are yielded.
+
+    Uses the request's global session, which stays open until the response has been sent.
+    """
+
+    statement = statement.execution_options(yield_per=batch_size)
+
+    with get_session() as session:
+        result = session.execute(statement)
+
+        if len(statement.selected_columns) == 1:
+            yield from result.scalars()
+        else:
+            yield from result
@@ -2,14 +2,34 @@
 TODO need to move to a better place
 
 Pydantic doesn't have great solutions for lists of objects
+
+Building a `TypeAdapter` compiles a new pydantic-core validator and serializer, which is much more expensive than the
+validation or serialization itself. Adapters are cached per model, bounded so dynamically created models cannot grow
+the cache without limit.
+
+The `iter_*` variants work on one element at a time, so large arrays in bulk import and export paths never need to be
+held in memory as a full list of models.
 """
 
+import functools
+import re
+from collections.abc import Iterable, Iterator
+from itertools import batched
+
 from pydantic import BaseModel, TypeAdapter
 
+ADAPTER_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=ADAPTER_CACHE_SIZE)
+def list_adapter[T: BaseModel](model: type[T]) -> TypeAdapter[list[T]]:
+    """Cached `TypeAdapter(list[model])`."""
+    return TypeAdapter(list[model])
+
 
 def validate_json_list[T: BaseModel](json_data: str | bytes, model: type[T]) -> list[T]:
     """Parse a JSON array into a list of `model` instances."""
-    return TypeAdapter(list[model]).validate_json(json_data)
+    return list_adapter(model).validate_json(json_data)
 
 
 def dump_json_list[T: BaseModel](items: list[T], model: type[T] | None = None) -> bytes:
@@ -18,7 +38,7 @@ def dump_json_list[T: BaseModel](items: list[T], model: type[T] | None = None) -
         if not items:
             return b"[]"
         model = type(items[0])
-    return TypeAdapter(list[model]).dump_json(items)
+    return list_adapter(model).dump_json(items)
 
 
 def dump_python_list[T: BaseModel](
@@ -29,4 +49,123 @@ def dump_python_list[T: BaseModel](
         if not items:
             return []
         model = type(items[0])
-    return TypeAdapter(list[model]).dump_python(items)
+    return list_adapter(model).dump_python(items)
+
+
+# the only bytes that matter when finding the boundaries between top-level array elements
+_JSON_STRUCTURE = re.compile(rb'[\[\]{},"\\]')
+
+
+class _JSONArraySplitter:
+    """
+    Incrementally split a JSON array into the raw bytes of each top-level element. Elements are not parsed here,
+    only their boundaries are found, so validation can be done by pydantic-core one element at a time.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.scan_from = 0
+        self.depth = 0
+        self.in_string = False
+        self.element_start: int | None = None
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        self.buffer += chunk
+        elements: list[bytes] = []
+
+        position = self.scan_from
+        while match := _JSON_STRUCTURE.search(self.buffer, position):
+            char = match.group()
+            position = match.end()
+
+            if self.in_string:
+                if char == b"\\":
+                    # the escaped character may not have arrived yet
+                    if position >= len(self.buffer):
+                        position -= 1
+                        break
+                    position += 1
+                elif char == b'"':
+                    self.in_string = False
+                continue
+
+            if self.finished:
+                raise ValueError("unexpected content after the end of the JSON array")
+
+            if char == b'"':
+                self.in_string = True
+            elif char in (b"[", b"{"):
+                self.depth += 1
+                if self.depth == 1:
+                    if char != b"[":
+                        raise ValueError("expected a JSON array")
+                    self.element_start = position
+            elif char in (b"]", b"}"):
+                if self.depth == 1:
+                    self._end_element(match.start(), elements)
+                    self.finished = True
+                self.depth -= 1
+            elif char == b"," and self.depth == 1:
+                self._end_element(match.start(), elements)
+                self.element_start = position
+        else:
+            position = len(self.buffer)
+
+        # drop everything which has already been split into elements
+        keep_from = self.element_start if self.element_start is not None else position
+        del self.buffer[:keep_from]
+        self.scan_from = position - keep_from
+        if self.element_start is not None:
+            self.element_start = 0
+
+        return elements
+
+    def _end_element(self, end: int, elements: list[bytes]) -> None:
+        assert self.element_start is not None
+
+        if element := bytes(self.buffer[self.element_start : end]).strip():
+            elements.append(element)
+
+    def close(self) -> None:
+        if not self.finished:
+            raise ValueError("JSON array was not terminated")
+
+
+def iter_validate_json_list[T: BaseModel](
+    chunks: Iterable[bytes], model: type[T]
+) -> Iterator[T]:
+    """
+    Validate a JSON array of `model` instances which arrives in chunks (a file opened in binary mode, an HTTP response
+    `iter_bytes()`, etc), yielding each model as soon as it is complete.
+
+    >>> with open("export.json", "rb") as f:
+    >>>     for user in iter_validate_json_list(iter(lambda: f.read(65536), b""), User): ...
+    """
+
+    splitter = _JSONArraySplitter()
+
+    for chunk in chunks:
+        for element in splitter.feed(chunk):
+            yield model.model_validate_json(element)
+
+    splitter.close()
+
+
+def iter_dump_json_list[T: BaseModel](
+    items: Iterable[T], model: type[T] | None = None, batch_size: int = 100
+) -> Iterator[bytes]:
+    """
+    Serialize models into a JSON array, yielding the array in chunks of `batch_size` models. `items` can be a
+    generator, such as a server-side cursor, so the full list is never materialized.
+    """
+
+    yield b"["
+
+    separator = b""
+    for batch in batched(items, batch_size, strict=False):
+        serializer = (model or type(batch[0])).__pydantic_serializer__
+        yield separator + b",".join(serializer.to_json(item) for item in batch)
+        separator = b","
+
+    yield b"]"
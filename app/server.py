@@ -10,20 +10,22 @@ JavaScript client which will use these methods.
 - APIRouters tagged "private" are excluded from OpenAPI spec dumps
 """
 
+import contextlib
 import typing as t
+from collections.abc import AsyncIterator, Collection
 
 from fastapi import FastAPI
 
 from app.constants import BUILD_COMMIT
 from app.routes.api import external_api_app
 from app.routes.errors import ErrorResponse, register_exception_handlers
-from app.routes.utils.json_response import ORJSONSortedResponse
 from app.routes.utils.openapi import simplify_operation_ids
 
+from .configuration.database_async import dispose_async_engine
 from .environments import is_productionish
 from .routes.authenticated import authenticated_api_app
 from .routes.healthcheck import healthcheck_api_app
-from .routes.middleware import add_middleware
+from .routes.middleware import MiddlewareLayer, add_middleware
 from .routes.static import mount_public_directory
 from .routes.unauthenticated import unauthenticated_api
 from .routes.unauthenticated_html import unauthenticated_html
@@ -63,33 +65,58 @@ This causes the definitions to end up in the openapi spec and properly typed on
 https://github.com/fastapi/fastapi/blob/master/fastapi/openapi/utils.py#L457-L477
 """
 
-# TODO not possible to type this properly :/ https://github.com/python/typing/discussions/1501
-# NOTE `api_app` and not `app` is used intentionally here to make imports more specific
-api_app = FastAPI(
-    **fast_api_args,  # type: ignore
-    default_response_class=ORJSONSortedResponse,
-    responses=COMMON_ERROR_RESPONSES,
-)
 
-# requires clerk authentication
-api_app.include_router(authenticated_api_app)
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+
+    # pooled async database connections belong to the server's event loop, close them before the loop is closed
+    await dispose_async_engine()
+
+
+def build_api_app(*, skip_middleware: Collection[MiddlewareLayer] = ()) -> FastAPI:
+    """
+    Build the root application. `skip_middleware` is only used to measure the cost of individual middleware layers, the
+    server should always run with the full stack.
+    """
+
+    # `default_response_class` is intentionally not set. When a route has a response model and no explicit response
+    # class, FastAPI serializes the return value straight to JSON bytes with the route's pydantic serializer, which keeps
+    # the model key order. Setting any response class (including `ORJSONSortedResponse`) forces a `model_dump` to a dict
+    # which is then encoded again. Routers use `ORJSONRoute` instead, so routes without a response model are still
+    # rendered by orjson.
+    # TODO not possible to type this properly :/ https://github.com/python/typing/discussions/1501
+    app = FastAPI(
+        **fast_api_args,  # type: ignore
+        responses=COMMON_ERROR_RESPONSES,
+        lifespan=lifespan,
+    )
 
-# requires api key authentication
-api_app.include_router(external_api_app)
+    # requires clerk authentication
+    app.include_router(authenticated_api_app)
 
-# public api, no authentication
-api_app.include_router(unauthenticated_api)
+    # requires api key authentication
+    app.include_router(external_api_app)
 
-api_app.include_router(unauthenticated_html)
+    # public api, no authentication
+    app.include_router(unauthenticated_api)
 
-# healthcheck endpoint, no authentication
-api_app.include_router(healthcheck_api_app)
+    app.include_router(unauthenticated_html)
 
-add_middleware(api_app)
-register_exception_handlers(api_app)
+    # healthcheck endpoint, no authentication
+    app.include_router(healthcheck_api_app)
 
-# important that this is done after all routes are added
-simplify_operation_ids(api_app)
+    add_middleware(app, skip=skip_middleware)
+    register_exception_handlers(app)
 
-# NOTE VERY IMPORTANT that this is done after all routes are added!!
-mount_public_directory(api_app)
+    # important that this is done after all routes are added
+    simplify_operation_ids(app)
+
+    # NOTE VERY IMPORTANT that this is done after all routes are added!!
+    mount_public_directory(app)
+
+    return app
+
+
+# NOTE `api_app` and not `app` is used intentionally here to make imports more specific
+api_app = build_api_app()
@@ -2,16 +2,32 @@
 Asking for trouble using a standard name like this :/
 """
 
+import functools
+import hashlib
 import importlib
+import importlib.util
 import inspect
+import json
 import logging
+import os
 import pkgutil
-from collections.abc import Callable
+import sys
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 from types import ModuleType
 
 logger = logging.getLogger(__name__)
 
+AUTOIMPORT_MANIFEST_PATH = (
+    Path(__file__).parent / "generated" / "autoimport_manifest.json"
+)
+"submodules discovered in each auto-imported package, so process startup does not need to walk the packages"
+
+AUTOIMPORT_PACKAGES = ("app.commands", "app.factories", "app.jobs", "app.models")
+"packages which call `autoimport_submodules`, recorded in the manifest"
+
 
 def get_root_path():
     return Path(__file__).parent.parent
@@ -56,12 +72,149 @@ def _public_members_from_module(module: ModuleType) -> list[tuple[str, object]]:
     return members
 
 
+def _directory_fingerprint(root: Path, directories: Iterable[str]) -> str | None:
+    """
+    Hash of the python files and subdirectories in each directory. Discovery only depends on file names, so listing
+    each directory once is enough to detect added, removed, or renamed modules and packages. None if a directory no
+    longer exists.
+    """
+    digest = hashlib.sha256()
+
+    for directory in directories:
+        try:
+            with os.scandir(root / directory) as entries:
+                names = sorted(
+                    entry.name
+                    for entry in entries
+                    if entry.name.endswith(".py")
+                    or (entry.is_dir() and entry.name != "__pycache__")
+                )
+        except OSError:
+            return None
+
+        digest.update(directory.encode() + b"\0" + "\0".join(names).encode() + b"\n")
+
+    return digest.hexdigest()
+
+
+def _walk_submodules(
+    package_name: str, package_path: Iterable[str]
+) -> list[tuple[str, bool]]:
+    "`(module name, is package)` for every submodule. Subpackages are imported to find their children."
+    return [
+        (module_info.name, module_info.ispkg)
+        for module_info in pkgutil.walk_packages(
+            package_path, prefix=f"{package_name}."
+        )
+    ]
+
+
+def _walked_directories(
+    package_name: str, submodules: list[tuple[str, bool]]
+) -> list[str]:
+    return ["."] + [
+        module_name.removeprefix(f"{package_name}.").replace(".", "/")
+        for module_name, is_package in submodules
+        if is_package
+    ]
+
+
+@functools.cache
+def _load_autoimport_manifest() -> dict[str, dict]:
+    try:
+        return json.loads(AUTOIMPORT_MANIFEST_PATH.read_text())
+    except OSError, ValueError:
+        return {}
+
+
+def _discover_submodules(
+    package_name: str, package_path: list[str]
+) -> list[tuple[str, bool]]:
+    "submodules from the manifest if it matches the package directory, otherwise walk the package"
+
+    entry = _load_autoimport_manifest().get(package_name)
+
+    if entry is not None and len(package_path) == 1:
+        fingerprint = _directory_fingerprint(
+            Path(package_path[0]), entry["directories"]
+        )
+
+        if fingerprint == entry["fingerprint"]:
+            return [(name, is_package) for name, is_package in entry["modules"]]
+
+    logger.debug("autoimport manifest is stale, walking package: %s", package_name)
+    return _walk_submodules(package_name, package_path)
+
+
+def write_autoimport_manifest(
+    package_names: Iterable[str] = AUTOIMPORT_PACKAGES,
+) -> None:
+    "record the submodules of each package, run by `just py_generate`"
+
+    manifest: dict[str, dict] = {}
+
+    for package_name in sorted(package_names):
+        spec = importlib.util.find_spec(package_name)
+        assert spec and spec.submodule_search_locations, (
+            f"{package_name} is not a package"
+        )
+
+        package_path = list(spec.submodule_search_locations)
+        assert len(package_path) == 1, f"{package_name} is a namespace package"
+
+        submodules = _walk_submodules(package_name, package_path)
+        directories = _walked_directories(package_name, submodules)
+
+        manifest[package_name] = {
+            "fingerprint": _directory_fingerprint(Path(package_path[0]), directories),
+            "directories": directories,
+            "modules": submodules,
+        }
+
+    AUTOIMPORT_MANIFEST_PATH.write_text(json.dumps(manifest, indent=2) + "\n")
+    _load_autoimport_manifest.cache_clear()
+
+
+def _defer_submodule_imports(
+    package: ModuleType,
+    module_names: list[str],
+    on_import: Callable[[str, ModuleType], None] | None,
+) -> None:
+    "import direct submodules on first attribute access on the package, using a module `__getattr__` (PEP 562)"
+
+    package_name = package.__name__
+    deferred = {
+        module_name.removeprefix(f"{package_name}."): module_name
+        for module_name in module_names
+        if "." not in module_name.removeprefix(f"{package_name}.")
+    }
+
+    def __getattr__(name: str) -> ModuleType:
+        if (module_name := deferred.get(name)) is None:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+
+        imported_module = importlib.import_module(module_name)
+
+        if on_import is not None:
+            on_import(module_name, imported_module)
+
+        return imported_module
+
+    def __dir__() -> list[str]:
+        return sorted({*vars(package), *deferred})
+
+    package.__getattr__ = __getattr__  # type: ignore[attr-defined]
+    package.__dir__ = __dir__  # type: ignore[attr-defined]
+
+
 def autoimport_submodules(
     strict: bool = True,
     *,
     include_packages: bool = False,
     on_import: Callable[[str, ModuleType], None] | None = None,
     collect_public_members: bool = False,
+    max_workers: int = 1,
+    deferred: bool = False,
 ) -> list[tuple[str, object]]:
     """
     Auto-import every Python module in the calling package and subpackages.
@@ -69,6 +222,9 @@ def autoimport_submodules(
     Call this from a package's `__init__.py` to ensure all submodules are loaded
     (useful for SQLModel metadata, Alembic, FastAPI routers, etc.).
 
+    Submodules are read from `AUTOIMPORT_MANIFEST_PATH` when the package directories still match it, otherwise the
+    package is walked with `pkgutil`.
+
     Args:
         strict: If True, halt on the first import failure. If False, log and continue.
         include_packages: When False, skip package modules (`__init__.py`) and only
@@ -77,7 +233,15 @@ def autoimport_submodules(
             `(module_name, module)`.
         collect_public_members: When True, return all public members discovered
             from imported modules.
+        max_workers: When greater than 1, submodules are imported concurrently in a thread pool. Only use this for
+            packages whose submodules do not import each other. Callbacks still run in discovery order.
+        deferred: When True, nothing is imported now. Direct submodules are imported (and passed to `on_import`) the
+            first time they are accessed as an attribute of the package.
     """
+    assert not (deferred and collect_public_members), (
+        "public members cannot be collected from deferred imports"
+    )
+
     current_frame = inspect.currentframe()
     caller_frame = current_frame.f_back if current_frame is not None else None
     if caller_frame is None:
@@ -86,40 +250,67 @@ def autoimport_submodules(
     # Explicitly remove stack-frame references to avoid leaks in long-lived processes
     # (e.g. hot reloaders and test runners) when import errors are caught/retried.
     try:
-        module = inspect.getmodule(caller_frame)
+        # the module being initialized is already in sys.modules, `inspect.getmodule` would scan every loaded module
+        module = sys.modules.get(caller_frame.f_globals.get("__name__", ""))
         if module is None or not hasattr(module, "__path__"):
             raise RuntimeError(
                 "autoimport_submodules() must be called from within a package __init__.py."
             )
 
         package_name = module.__name__
-        package_path = module.__path__
+        package_path = list(module.__path__)
         public_members: list[tuple[str, object]] = []
 
-        for module_info in pkgutil.walk_packages(
-            package_path, prefix=f"{package_name}."
-        ):
+        module_names = [
+            module_name
+            for module_name, is_package in _discover_submodules(
+                package_name, package_path
+            )
             # Package __init__ modules are optional to avoid recursive/redundant imports.
-            if module_info.ispkg and not include_packages:
-                continue
+            if include_packages or not is_package
+        ]
+
+        if deferred:
+            _defer_submodule_imports(module, module_names, on_import)
+            return public_members
+
+        executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="autoimport")
+            if max_workers > 1
+            else None
+        )
 
-            module_name = module_info.name
+        with executor or nullcontext():
+            # parallel imports are all submitted up front, results and failures are still handled in discovery order
+            if executor is not None:
+                importers = [
+                    executor.submit(importlib.import_module, module_name).result
+                    for module_name in module_names
+                ]
+            else:
+                importers = [
+                    functools.partial(importlib.import_module, module_name)
+                    for module_name in module_names
+                ]
 
-            try:
-                imported_module = importlib.import_module(module_name)
-                logger.debug("auto imported module: %s", module_name)
+            for module_name, import_module in zip(module_names, importers, strict=True):
+                try:
+                    imported_module = import_module()
+                    logger.debug("auto imported module: %s", module_name)
 
-                # Hook allows each package to enforce conventions after import.
-                if on_import is not None:
-                    on_import(module_name, imported_module)
+                    # Hook allows each package to enforce conventions after import.
+                    if on_import is not None:
+                        on_import(module_name, imported_module)
 
-                # Optional export collection supports "autoload + symbol export" use cases.
-                if collect_public_members:
-                    public_members.extend(_public_members_from_module(imported_module))
-            except Exception:
-                logger.exception("failed to auto import module: %s", module_name)
-                if strict:
-                    raise
+                    # Optional export collection supports "autoload + symbol export" use cases.
+                    if collect_public_members:
+                        public_members.extend(
+                            _public_members_from_module(imported_module)
+                        )
+                except Exception:
+                    logger.exception("failed to auto import module: %s", module_name)
+                    if strict:
+                        raise
 
         return public_members
     finally:
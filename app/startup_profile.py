@@ -0,0 +1,246 @@
+"""
+Startup profiler for `app.setup()`, enabled with `STARTUP_PROFILE=true`.
+
+Reports the wall time and import cost of each configuration step, and the import time of every module loaded during
+startup. `python -X importtime` reports module import times, but has no idea which configuration step triggered an
+import and does not include the non-import work (connections, version checks, etc) done by each step.
+
+Import times are measured by a meta path finder which wraps each module's `exec_module`, the same place `-X importtime`
+measures. `self_seconds` excludes the time spent importing other modules.
+
+This module must only depend on the standard library: it is imported before anything else in `app/__init__.py` so the
+import of every other module can be measured.
+
+>>> STARTUP_PROFILE=true python -c "import app"
+>>> python -m app.cli profile-startup
+"""
+
+import importlib.abc
+import json
+import os
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from time import perf_counter
+from types import ModuleType
+
+STARTUP_PROFILE_ENV = "STARTUP_PROFILE"
+
+STARTUP_PROFILE_OUTPUT_ENV = "STARTUP_PROFILE_OUTPUT"
+"optional path the JSON report is written to, used by `profile-startup` to read the report of a child process"
+
+UNATTRIBUTED_STEP = "unattributed"
+"time outside of any explicit step, mostly the module-level imports in `app/__init__.py`"
+
+SLOWEST_MODULES_LOGGED = 25
+
+
+@dataclass
+class ModuleImport:
+    name: str
+    cumulative_seconds: float
+    self_seconds: float
+
+
+@dataclass
+class StartupStep:
+    name: str
+    wall_seconds: float
+    import_seconds: float
+    "time spent importing modules which were first imported during this step"
+    modules_imported: int
+
+
+@dataclass
+class StartupReport:
+    total_seconds: float
+    steps: list[StartupStep]
+    modules: list[ModuleImport]
+    "sorted by `self_seconds`, slowest first"
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    "finds specs using the rest of `sys.meta_path`, and wraps the loader so the module execution is timed"
+
+    def __init__(self, profiler: StartupProfiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            if (spec := finder.find_spec(fullname, path, target)) is not None:
+                break
+        else:
+            return None
+
+        loader = spec.loader
+
+        # builtin and frozen importers are classes shared by every module they load, so they are not wrapped
+        if (
+            loader is not None
+            and not isinstance(loader, type)
+            and hasattr(loader, "__dict__")
+            and "exec_module" not in loader.__dict__
+        ):
+            loader.exec_module = self.profiler.timed_exec_module(loader.exec_module)  # type: ignore[method-assign]
+            self.profiler.patched_loaders.append(loader)
+
+        return spec
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.started_at = perf_counter()
+        self.steps: list[StartupStep] = []
+        self.modules: dict[str, ModuleImport] = {}
+        self.patched_loaders: list[importlib.abc.Loader] = []
+
+        # imports on other threads would corrupt the nesting stack, startup is single threaded
+        self._thread_id = threading.get_ident()
+        # time spent importing children, for each module currently being executed
+        self._import_stack: list[float] = []
+        self._top_level_import_seconds = 0.0
+
+        self._finder = _ImportTimer(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def timed_exec_module(
+        self, exec_module: Callable[[ModuleType], None]
+    ) -> Callable[[ModuleType], None]:
+        def wrapper(module: ModuleType) -> None:
+            if threading.get_ident() != self._thread_id:
+                exec_module(module)
+                return
+
+            self._import_stack.append(0.0)
+            start = perf_counter()
+
+            try:
+                exec_module(module)
+            finally:
+                elapsed = perf_counter() - start
+                children_seconds = self._import_stack.pop()
+
+                if self._import_stack:
+                    self._import_stack[-1] += elapsed
+                else:
+                    self._top_level_import_seconds += elapsed
+
+                self.modules[module.__name__] = ModuleImport(
+                    name=module.__name__,
+                    cumulative_seconds=elapsed,
+                    self_seconds=elapsed - children_seconds,
+                )
+
+        return wrapper
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        start = perf_counter()
+        import_seconds_before = self._top_level_import_seconds
+        modules_before = len(self.modules)
+
+        try:
+            yield
+        finally:
+            self.steps.append(
+                StartupStep(
+                    name=name,
+                    wall_seconds=perf_counter() - start,
+                    import_seconds=self._top_level_import_seconds
+                    - import_seconds_before,
+                    modules_imported=len(self.modules) - modules_before,
+                )
+            )
+
+    def stop(self) -> StartupReport:
+        "stop measuring imports and build the report"
+
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+        for loader in self.patched_loaders:
+            loader.__dict__.pop("exec_module", None)
+
+        self.patched_loaders.clear()
+
+        total_seconds = perf_counter() - self.started_at
+        steps = list(self.steps)
+
+        steps.append(
+            StartupStep(
+                name=UNATTRIBUTED_STEP,
+                wall_seconds=total_seconds - sum(s.wall_seconds for s in self.steps),
+                import_seconds=self._top_level_import_seconds
+                - sum(s.import_seconds for s in self.steps),
+                modules_imported=len(self.modules)
+                - sum(s.modules_imported for s in self.steps),
+            )
+        )
+
+        return StartupReport(
+            total_seconds=total_seconds,
+            steps=steps,
+            modules=sorted(
+                self.modules.values(),
+                key=lambda module: module.self_seconds,
+                reverse=True,
+            ),
+        )
+
+
+def is_startup_profile_enabled() -> bool:
+    # `app.env` is not used so the profiler can be started before it is imported
+    return os.environ.get(STARTUP_PROFILE_ENV, "").lower() in ("1", "true")
+
+
+profiler: StartupProfiler | None = (
+    StartupProfiler() if is_startup_profile_enabled() else None
+)
+
+
+@contextmanager
+def startup_step(name: str) -> Iterator[None]:
+    "measure a step of `app.setup()`, no-op unless profiling is enabled"
+
+    if profiler is None:
+        yield
+        return
+
+    with profiler.step(name):
+        yield
+
+
+def finish_startup_profile() -> StartupReport | None:
+    "stop profiling and log the report, or write it to `STARTUP_PROFILE_OUTPUT` when set"
+
+    global profiler
+
+    if profiler is None:
+        return None
+
+    report = profiler.stop()
+    profiler = None
+
+    if output_path := os.environ.get(STARTUP_PROFILE_OUTPUT_ENV):
+        with open(output_path, "w") as f:
+            json.dump(asdict(report), f)
+
+        return report
+
+    from app import log
+
+    log.info(
+        "startup profile",
+        total_seconds=round(report.total_seconds, 4),
+        steps=[asdict(step) for step in report.steps],
+        slowest_modules=[
+            asdict(module) for module in report.modules[:SLOWEST_MODULES_LOGGED]
+        ],
+    )
+
+    return report
@@ -3,29 +3,110 @@ Client for resolving IP addresses to geographic locations.
 
 Backed by observabilitystack/geoip-api:
 https://github.com/observabilitystack/geoip-api
+
+With `GEOIP_DATABASE_PATH` set, IPs are resolved from a local memory mapped database instead (see `geoip_database.py`),
+without a network hop or caching. The API is used when the file is not configured or cannot be opened.
+
+API lookups are cached in two tiers: an in-process LRU checked first, backed by redis so every worker shares the hot IPs.
+Failed lookups (timeouts, errors, unknown IPs) are cached for `GEOIP_NEGATIVE_CACHE_TTL_SECONDS` in both tiers, so a
+slow period does not poison the cache and the API is not hammered while it is down.
+
+Successful lookups are also cached by the `asnNetwork` the API returns, so any address in that network (an IPv6 /64,
+a carrier-grade NAT pool) resolves in-process without a lookup. Prefixes broader than an IPv4 /24 or IPv6 /48 are only
+cached by IP, they usually span many cities.
+
+Async routes should use `alookup_ip_location` (or `lookup_many`), which does not block the event loop. Concurrent
+lookups of the same IP on a loop share a single API request, and at most `GEOIP_MAX_CONNECTIONS` requests are in flight
+per loop.
 """
 
+import asyncio
+import functools
+import ipaddress
+import json
+import threading
+import weakref
+from collections.abc import Iterable
+from time import monotonic
+
 import httpx2
-from cachetools import LRUCache, cached
+from cachetools import TLRUCache
 from pydantic import BaseModel
+from redis.exceptions import RedisError
 
 from app import log
-from app.env import env
+from app.configuration.redis import get_async_redis, get_redis
+from app.env import env, loose_env
+from app.utils.ip_network_cache import IPNetworkCache
 
 from app.models.data.geolocation_point import GeolocationPoint
 
 GEOIP_BASE_URL = env.base_url("GEOIP_BASE_URL")
 
+GEOIP_DATABASE_PATH = loose_env.str("GEOIP_DATABASE_PATH")
+"optional, built with `python -m app.cli build-geoip-database`"
+
 # Autocomplete must stay snappy; skip location bias if geoip is slow.
 GEOIP_TIMEOUT_SECONDS = 0.1
 
+GEOIP_CACHE_TTL_SECONDS = 24 * 60 * 60
+"IP blocks are rarely reassigned, a day old location is good enough for search bias"
+
+GEOIP_NEGATIVE_CACHE_TTL_SECONDS = 60
+"failures are usually transient, retry soon but not on every request"
+
+GEOIP_MAX_CONNECTIONS = 100
+"connection pool size of the async client (the httpx default), API requests past it wait for a free connection"
+
+GEOIP_REDIS_KEY_PREFIX = "geoip:v1"
+"bump the version when the serialized format changes"
+
+
+def _cache_ttl(location: GeoIPLocation | None) -> int:
+    return (
+        GEOIP_NEGATIVE_CACHE_TTL_SECONDS
+        if location is None
+        else GEOIP_CACHE_TTL_SECONDS
+    )
+
+
 # Arbitrary bound so unique IPs cannot grow memory without limit.
-_geoip_cache: LRUCache = LRUCache(maxsize=1024)
+_geoip_cache: TLRUCache = TLRUCache(
+    maxsize=1024,
+    ttu=lambda _ip, location, now: now + _cache_ttl(location),
+    timer=monotonic,
+)
+_geoip_cache_lock = threading.Lock()
+
+GEOIP_NETWORK_CACHE_MIN_PREFIXLEN = {4: 24, 6: 48}
+"""
+networks broader than this (by IP version) are not cached as a whole. `asnNetwork` is the announced BGP prefix, a /16
+spans many metros and an IPv6 /32 is usually an ISP's entire allocation.
+"""
+
+_geoip_network_cache: IPNetworkCache[GeoIPLocation] = IPNetworkCache(maxsize=4096)
 _geoip_client = httpx2.Client(
     base_url=GEOIP_BASE_URL,
     timeout=GEOIP_TIMEOUT_SECONDS,
 )
 
+_async_geoip_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, httpx2.AsyncClient
+] = weakref.WeakKeyDictionary()
+"pooled connections belong to the event loop which opened them, so there is a client per loop"
+
+_async_geoip_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, asyncio.Semaphore
+] = weakref.WeakKeyDictionary()
+"""
+bounds API requests to the client's pool, so requests queue here instead of timing out on the pool after 100ms. A
+large `lookup_many` would otherwise fail everything past the pool size.
+"""
+
+_in_flight_lookups: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, asyncio.Task]
+] = weakref.WeakKeyDictionary()
+
 
 class GeoIPLocation(BaseModel):
     """Response payload from the geoip API (field names match the API)."""
@@ -55,25 +136,353 @@ class GeoIPLocation(BaseModel):
         )
 
 
-@cached(cache=_geoip_cache)
-def lookup_ip_location(ip: str) -> GeoIPLocation | None:
-    """
-    Resolve an IP address to lat/lng via the geoip API.
+_SERIALIZED_FIELDS = tuple(GeoIPLocation.model_fields)
+
+
+def _serialize_location(location: GeoIPLocation | None) -> str:
+    "a positional JSON array, `[]` for a failed lookup"
+
+    if location is None:
+        return "[]"
+
+    return json.dumps(
+        [getattr(location, field) for field in _SERIALIZED_FIELDS],
+        separators=(",", ":"),
+    )
+
+
+def _deserialize_location(raw: bytes | str) -> GeoIPLocation | None:
+    values = json.loads(raw)
+
+    if not values:
+        return None
+
+    return GeoIPLocation.model_validate(
+        dict(zip(_SERIALIZED_FIELDS, values, strict=True))
+    )
+
+
+_NOT_CACHED = object()
+
+
+def _deserialize_cached_location(
+    ip: str, raw: bytes | str
+) -> GeoIPLocation | None | object:
+    "`_NOT_CACHED` for an entry which cannot be read, such as one written with different fields, so it is looked up again"
 
-    Results are memoized in-process. On timeout (>100ms), network errors, or
-    non-success responses, returns None so callers can proceed without bias.
-    """
     try:
-        response = _geoip_client.get(f"/{ip}")
+        return _deserialize_location(raw)
+    except (TypeError, ValueError) as e:
+        log.warning("geoip cache entry invalid", ip=ip, error=str(e))
+        return _NOT_CACHED
+
+
+def _redis_get(ip: str) -> GeoIPLocation | None | object:
+    "cached location, None for a cached failure, or `_NOT_CACHED`"
+
+    try:
+        raw = get_redis().get(f"{GEOIP_REDIS_KEY_PREFIX}:{ip}")
+    except RedisError as e:
+        log.warning("geoip cache read failed", ip=ip, error=str(e))
+        return _NOT_CACHED
+
+    if raw is None:
+        return _NOT_CACHED
+
+    return _deserialize_cached_location(ip, raw)  # type: ignore[arg-type]
+
+
+def _redis_set(ip: str, location: GeoIPLocation | None) -> None:
+    try:
+        get_redis().set(
+            f"{GEOIP_REDIS_KEY_PREFIX}:{ip}",
+            _serialize_location(location),
+            ex=_cache_ttl(location),
+        )
+    except RedisError as e:
+        log.warning("geoip cache write failed", ip=ip, error=str(e))
+
+
+async def _aredis_get_many(ips: list[str]) -> dict[str, GeoIPLocation | None]:
+    "cached locations (None for cached failures) for the IPs in redis, in a single round trip"
+
+    if not ips:
+        return {}
+
+    try:
+        raw_values = await get_async_redis().mget(
+            [f"{GEOIP_REDIS_KEY_PREFIX}:{ip}" for ip in ips]
+        )
+    except RedisError as e:
+        log.warning("geoip cache read failed", ips=ips, error=str(e))
+        return {}
+
+    locations = {
+        ip: _deserialize_cached_location(ip, raw)
+        for ip, raw in zip(ips, raw_values, strict=True)
+        if raw is not None
+    }
+
+    return {
+        ip: location
+        for ip, location in locations.items()
+        if location is not _NOT_CACHED
+    }  # type: ignore[return-value]
+
+
+async def _aredis_set(ip: str, location: GeoIPLocation | None) -> None:
+    try:
+        await get_async_redis().set(
+            f"{GEOIP_REDIS_KEY_PREFIX}:{ip}",
+            _serialize_location(location),
+            ex=_cache_ttl(location),
+        )
+    except RedisError as e:
+        log.warning("geoip cache write failed", ip=ip, error=str(e))
+
+
+def _parse_response(ip: str, response: httpx2.Response) -> GeoIPLocation | None:
+    try:
         response.raise_for_status()
         return GeoIPLocation.model_validate(response.json())
+    except (httpx2.HTTPError, ValueError) as e:
+        log.warning("geoip lookup failed", ip=ip, error=str(e))
+        return None
+
+
+def _fetch_location(ip: str) -> GeoIPLocation | None | object:
+    "location from the API, `_NOT_CACHED` if the request was never sent"
+
+    try:
+        response = _geoip_client.get(f"/{ip}")
+    except httpx2.PoolTimeout:
+        # every pooled connection was busy, this says nothing about the IP and must not be cached
+        log.warning("geoip connection pool exhausted", ip=ip)
+        return _NOT_CACHED
     except httpx2.TimeoutException:
         log.warning("geoip lookup timed out", ip=ip, timeout=GEOIP_TIMEOUT_SECONDS)
         return None
-    except (httpx2.HTTPError, ValueError) as e:
+    except httpx2.HTTPError as e:
+        log.warning("geoip lookup failed", ip=ip, error=str(e))
+        return None
+
+    return _parse_response(ip, response)
+
+
+def _async_geoip_client() -> httpx2.AsyncClient:
+    loop = asyncio.get_running_loop()
+
+    if (client := _async_geoip_clients.get(loop)) is None:
+        client = _async_geoip_clients[loop] = httpx2.AsyncClient(
+            base_url=GEOIP_BASE_URL,
+            timeout=GEOIP_TIMEOUT_SECONDS,
+            limits=httpx2.Limits(
+                max_connections=GEOIP_MAX_CONNECTIONS, max_keepalive_connections=20
+            ),
+        )
+
+    return client
+
+
+def _async_geoip_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+
+    if (semaphore := _async_geoip_semaphores.get(loop)) is None:
+        semaphore = _async_geoip_semaphores[loop] = asyncio.Semaphore(
+            GEOIP_MAX_CONNECTIONS
+        )
+
+    return semaphore
+
+
+async def _afetch_location(ip: str) -> GeoIPLocation | None | object:
+    "location from the API, `_NOT_CACHED` if the request was never sent"
+
+    try:
+        async with _async_geoip_semaphore():
+            response = await _async_geoip_client().get(f"/{ip}")
+    except httpx2.PoolTimeout:
+        log.warning("geoip connection pool exhausted", ip=ip)
+        return _NOT_CACHED
+    except httpx2.TimeoutException:
+        log.warning("geoip lookup timed out", ip=ip, timeout=GEOIP_TIMEOUT_SECONDS)
+        return None
+    except httpx2.HTTPError as e:
         log.warning("geoip lookup failed", ip=ip, error=str(e))
         return None
 
+    return _parse_response(ip, response)
+
+
+def _cached_location(ip: str) -> GeoIPLocation | None | object:
+    "location from the in-process IP or network cache, or `_NOT_CACHED`"
+
+    with _geoip_cache_lock:
+        location = _geoip_cache.get(ip, _NOT_CACHED)
+
+    if location is _NOT_CACHED:
+        location = _geoip_network_cache.get(ip) or _NOT_CACHED
+
+    return location
+
+
+def _cache_location(ip: str, location: GeoIPLocation | None) -> None:
+    with _geoip_cache_lock:
+        _geoip_cache[ip] = location
+
+    if location is None or location.asnNetwork is None:
+        return
+
+    try:
+        network = ipaddress.ip_network(location.asnNetwork, strict=False)
+        contains_ip = ipaddress.ip_address(ip) in network
+    except ValueError:
+        return
+
+    if (
+        contains_ip
+        and network.prefixlen >= GEOIP_NETWORK_CACHE_MIN_PREFIXLEN[network.version]
+    ):
+        _geoip_network_cache.set(network, location, ttl=GEOIP_CACHE_TTL_SECONDS)
+
+
+@functools.cache
+def _local_database():
+    "the local geoip database, None if it is not configured or cannot be opened"
+
+    if not GEOIP_DATABASE_PATH:
+        return None
+
+    # imported during execution, `geoip_database` imports the location model from this module
+    from .geoip_database import GeoIPDatabase, GeoIPDatabaseError
+
+    try:
+        return GeoIPDatabase(GEOIP_DATABASE_PATH)
+    except (OSError, GeoIPDatabaseError) as e:
+        log.warning(
+            "geoip database unavailable, using the geoip api",
+            path=GEOIP_DATABASE_PATH,
+            error=str(e),
+        )
+        return None
+
+
+def lookup_ip_location(ip: str) -> GeoIPLocation | None:
+    """
+    Resolve an IP address to lat/lng via the local geoip database, or the geoip API.
+
+    API results are cached in-process and in redis. On timeout (>100ms), network errors, or
+    non-success responses, returns None so callers can proceed without bias.
+    """
+    if (database := _local_database()) is not None:
+        return database.lookup(ip)
+
+    if (location := _cached_location(ip)) is not _NOT_CACHED:
+        return location  # type: ignore[return-value]
+
+    location = _redis_get(ip)
+
+    if location is _NOT_CACHED:
+        location = _fetch_location(ip)
+
+        if location is _NOT_CACHED:
+            return None
+
+        _redis_set(ip, location)  # type: ignore[arg-type]
+
+    _cache_location(ip, location)  # type: ignore[arg-type]
+
+    return location  # type: ignore[return-value]
+
+
+async def _alookup_uncached(ip: str, check_redis: bool) -> GeoIPLocation | None:
+    location: GeoIPLocation | None | object = _NOT_CACHED
+
+    if check_redis:
+        location = (await _aredis_get_many([ip])).get(ip, _NOT_CACHED)
+
+    if location is _NOT_CACHED:
+        location = await _afetch_location(ip)
+
+        if location is _NOT_CACHED:
+            return None
+
+        await _aredis_set(ip, location)  # type: ignore[arg-type]
+
+    _cache_location(ip, location)  # type: ignore[arg-type]
+
+    return location  # type: ignore[return-value]
+
+
+async def _alookup_single_flight(
+    ip: str, check_redis: bool = True
+) -> GeoIPLocation | None:
+    "concurrent lookups of `ip` on this event loop share one task"
+
+    in_flight = _in_flight_lookups.setdefault(asyncio.get_running_loop(), {})
+
+    if (task := in_flight.get(ip)) is None:
+        task = in_flight[ip] = asyncio.create_task(_alookup_uncached(ip, check_redis))
+        task.add_done_callback(lambda _: in_flight.pop(ip, None))
+
+    # a cancelled caller must not cancel the lookup for everyone else waiting on it
+    return await asyncio.shield(task)
+
+
+async def alookup_ip_location(ip: str) -> GeoIPLocation | None:
+    "`lookup_ip_location` without blocking the event loop, sharing the in-process and redis caches"
+
+    if (database := _local_database()) is not None:
+        return database.lookup(ip)
+
+    if (location := _cached_location(ip)) is not _NOT_CACHED:
+        return location  # type: ignore[return-value]
+
+    return await _alookup_single_flight(ip)
+
+
+async def lookup_many(ips: Iterable[str]) -> dict[str, GeoIPLocation | None]:
+    """
+    Resolve several IPs concurrently, keyed by IP.
+
+    IPs missing from the in-process cache are read from redis in a single round trip, the rest are fetched from the
+    API concurrently, at most `GEOIP_MAX_CONNECTIONS` at a time.
+    """
+
+    unique_ips = list(dict.fromkeys(ips))
+
+    if (database := _local_database()) is not None:
+        return {ip: database.lookup(ip) for ip in unique_ips}
+
+    locations: dict[str, GeoIPLocation | None] = {}
+    missing: list[str] = []
+
+    for ip in unique_ips:
+        if (location := _cached_location(ip)) is _NOT_CACHED:
+            missing.append(ip)
+        else:
+            locations[ip] = location  # type: ignore[assignment]
+
+    if not missing:
+        return locations
+
+    # IPs already being looked up are awaited below, there is no need to read them from redis
+    in_flight = _in_flight_lookups.get(asyncio.get_running_loop(), {})
+    cached = await _aredis_get_many([ip for ip in missing if ip not in in_flight])
+
+    for ip, location in cached.items():
+        _cache_location(ip, location)
+
+    locations |= cached
+    uncached = [ip for ip in missing if ip not in cached]
+
+    fetched = await asyncio.gather(
+        *(_alookup_single_flight(ip, check_redis=False) for ip in uncached)
+    )
+    locations |= dict(zip(uncached, fetched, strict=True))
+
+    return {ip: locations[ip] for ip in unique_ips}
+
 
 def get_point_for_ip(ip: str | None) -> GeolocationPoint | None:
     """
@@ -0,0 +1,226 @@
+"""
+Local GeoIP database: a compact file of sorted IP ranges, memory mapped and binary searched.
+
+The geoip API is a network hop on the autocomplete path. With `GEOIP_DATABASE_PATH` set, `lookup_ip_location` resolves
+IPs from this file in microseconds and the API is only used if the file cannot be opened. Build the file from the
+MaxMind GeoLite2 City CSVs with `python -m app.cli build-geoip-database`.
+
+The file is mapped read-only, so every worker process on a host shares the same pages through the OS page cache.
+
+Layout (all integers big endian):
+
+- header: magic, IPv4 range count, IPv6 range count, location count
+- IPv4 ranges: `(start u32, end u32, location index u32)`, sorted by start
+- IPv6 ranges: `(start 16 bytes, end 16 bytes, location index u32)`, sorted by start. Big endian addresses sort the
+  same as bytes, so ranges are compared without converting to integers.
+- location offsets: `u32` per location, relative to the start of the location data
+- location data: each location serialized once (see `geoip._serialize_location`), ranges in the same city share it
+"""
+
+import ipaddress
+import itertools
+import mmap
+import struct
+from collections.abc import Iterable
+from pathlib import Path
+
+from .geoip import GeoIPLocation, _deserialize_location, _serialize_location
+
+MAGIC = b"GEOIPRG1"
+
+_HEADER = struct.Struct(">8sIII")
+_IPV4_RANGE = struct.Struct(">III")
+_IPV4_START = struct.Struct(">I")
+_IPV6_RANGE = struct.Struct(">16s16sI")
+_IPV6_START = struct.Struct(">16s")
+_OFFSET = struct.Struct(">I")
+
+
+class GeoIPDatabaseError(Exception):
+    pass
+
+
+class GeoIPDatabase:
+    def __init__(self, path: Path | str):
+        with open(path, "rb") as f:
+            try:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise GeoIPDatabaseError(f"empty geoip database: {path}") from e
+
+        if len(self._buffer) < _HEADER.size:
+            raise GeoIPDatabaseError(f"truncated geoip database: {path}")
+
+        magic, self.ipv4_count, self.ipv6_count, self.location_count = (
+            _HEADER.unpack_from(self._buffer)
+        )
+
+        if magic != MAGIC:
+            raise GeoIPDatabaseError(f"not a geoip range database: {path}")
+
+        self._ipv4_offset = _HEADER.size
+        self._ipv6_offset = self._ipv4_offset + self.ipv4_count * _IPV4_RANGE.size
+        self._location_offsets_offset = (
+            self._ipv6_offset + self.ipv6_count * _IPV6_RANGE.size
+        )
+        self._location_data_offset = (
+            self._location_offsets_offset + self.location_count * _OFFSET.size
+        )
+
+        if self._location_data_offset > len(self._buffer):
+            raise GeoIPDatabaseError(f"truncated geoip database: {path}")
+
+        # locations are decoded once, so the same object is returned for every IP in the same location
+        self._locations: dict[int, GeoIPLocation | None] = {}
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def lookup(self, ip: str) -> GeoIPLocation | None:
+        "location for `ip`, None if it is not in any range or is not a valid IP"
+
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+
+        if address.version == 4:
+            index = self._search(
+                int(address),
+                self._ipv4_offset,
+                self.ipv4_count,
+                _IPV4_RANGE,
+                _IPV4_START,
+            )
+        else:
+            index = self._search(
+                address.packed,
+                self._ipv6_offset,
+                self.ipv6_count,
+                _IPV6_RANGE,
+                _IPV6_START,
+            )
+
+        if index is None:
+            return None
+
+        return self._location(index)
+
+    def _search(
+        self,
+        key: int | bytes,
+        offset: int,
+        count: int,
+        record: struct.Struct,
+        start_field: struct.Struct,
+    ) -> int | None:
+        "location index of the last range starting at or before `key`, if `key` is within it"
+
+        low, high = 0, count
+
+        while low < high:
+            middle = (low + high) // 2
+            # only the start is unpacked while searching
+            (start,) = start_field.unpack_from(
+                self._buffer, offset + middle * record.size
+            )
+
+            if start <= key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == 0:
+            return None
+
+        _, end, location_index = record.unpack_from(
+            self._buffer, offset + (low - 1) * record.size
+        )
+
+        return location_index if key <= end else None
+
+    def _location(self, index: int) -> GeoIPLocation | None:
+        # a range pointing past the location table is a corrupt file, reading it would run into other data
+        if index >= self.location_count:
+            return None
+
+        if index in self._locations:
+            return self._locations[index]
+
+        (start,) = _OFFSET.unpack_from(
+            self._buffer, self._location_offsets_offset + index * _OFFSET.size
+        )
+
+        if index + 1 < self.location_count:
+            (end,) = _OFFSET.unpack_from(
+                self._buffer,
+                self._location_offsets_offset + (index + 1) * _OFFSET.size,
+            )
+            end += self._location_data_offset
+        else:
+            end = len(self._buffer)
+
+        location = _deserialize_location(
+            self._buffer[self._location_data_offset + start : end]
+        )
+        self._locations[index] = location
+
+        return location
+
+
+def write_geoip_database(
+    path: Path | str, ranges: Iterable[tuple[str, GeoIPLocation]]
+) -> int:
+    """
+    Write `(CIDR network, location)` pairs, networks must not overlap. Returns the number of ranges written.
+
+    `ranges` is consumed once: each location is serialized as it is read, so only the packed ranges and the distinct
+    serialized locations are held in memory.
+    """
+
+    ipv4: list[tuple[int, int, int]] = []
+    ipv6: list[tuple[bytes, bytes, int]] = []
+    location_indexes: dict[str, int] = {}
+
+    for network_string, location in ranges:
+        network = ipaddress.ip_network(network_string, strict=False)
+        serialized = _serialize_location(location)
+        index = location_indexes.setdefault(serialized, len(location_indexes))
+
+        if network.version == 4:
+            ipv4.append(
+                (int(network.network_address), int(network.broadcast_address), index)
+            )
+        else:
+            ipv6.append(
+                (
+                    network.network_address.packed,
+                    network.broadcast_address.packed,
+                    index,
+                )
+            )
+
+    ipv4.sort()
+    ipv6.sort()
+
+    for sorted_ranges in (ipv4, ipv6):
+        for previous, current in itertools.pairwise(sorted_ranges):
+            if current[0] <= previous[1]:
+                raise GeoIPDatabaseError("geoip networks overlap")
+
+    location_data = [serialized.encode() for serialized in location_indexes]
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(ipv4), len(ipv6), len(location_data)))
+
+        f.writelines(_IPV4_RANGE.pack(*ipv4_range) for ipv4_range in ipv4)
+        f.writelines(_IPV6_RANGE.pack(*ipv6_range) for ipv6_range in ipv6)
+
+        offset = 0
+        for data in location_data:
+            f.write(_OFFSET.pack(offset))
+            offset += len(data)
+
+        f.writelines(location_data)
+
+    return len(ipv4) + len(ipv6)
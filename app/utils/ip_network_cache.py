@@ -0,0 +1,114 @@
+"""
+In-process cache keyed by IP network, so every address inside a cached network is a hit.
+
+Networks are kept as sorted, non-overlapping `[start, end]` integer ranges per IP version. A lookup is a binary search
+for the last range starting at or before the address, the same interval search `geoip_database.py` does on disk.
+"""
+
+import bisect
+import ipaddress
+import threading
+from dataclasses import dataclass
+from time import monotonic
+
+type IPNetwork = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+@dataclass(slots=True)
+class _Range[T]:
+    start: int
+    end: int
+    expires_at: float
+    value: T
+
+
+class IPNetworkCache[T]:
+    """
+    Values by network with a TTL, bounded to `maxsize` networks. The oldest network is evicted first.
+
+    A network overlapping cached networks replaces them, so the latest answer for an address wins.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._starts: dict[int, list[int]] = {4: [], 6: []}
+        self._ranges: dict[int, list[_Range[T]]] = {4: [], 6: []}
+        # insertion order, for eviction
+        self._inserted: dict[tuple[int, int], None] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._inserted)
+
+    def get(self, ip: str) -> T | None:
+        "value of the network containing `ip`, None on a miss or if `ip` is not a valid address"
+
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+
+        key = int(address)
+
+        with self._lock:
+            starts = self._starts[address.version]
+            index = bisect.bisect_right(starts, key) - 1
+
+            if index < 0:
+                return None
+
+            cached = self._ranges[address.version][index]
+
+            if key > cached.end:
+                return None
+
+            if cached.expires_at <= monotonic():
+                self._remove(address.version, index)
+                return None
+
+            return cached.value
+
+    def set(self, network: IPNetwork, value: T, ttl: float) -> None:
+        start = int(network.network_address)
+        end = int(network.broadcast_address)
+        version = network.version
+
+        with self._lock:
+            starts = self._starts[version]
+
+            # cached networks overlapping this one are contiguous, from the last one starting before it
+            first = bisect.bisect_right(starts, start) - 1
+            if first < 0 or self._ranges[version][first].end < start:
+                first += 1
+
+            last = bisect.bisect_right(starts, end)
+
+            for index in reversed(range(first, last)):
+                self._remove(version, index)
+
+            while len(self._inserted) >= self.maxsize:
+                oldest_version, oldest_start = next(iter(self._inserted))
+                self._remove(
+                    oldest_version,
+                    bisect.bisect_left(self._starts[oldest_version], oldest_start),
+                )
+
+            index = bisect.bisect_left(starts, start)
+            starts.insert(index, start)
+            self._ranges[version].insert(
+                index, _Range(start, end, monotonic() + ttl, value)
+            )
+            self._inserted[(version, start)] = None
+
+    def clear(self) -> None:
+        with self._lock:
+            for version in self._starts:
+                self._starts[version].clear()
+                self._ranges[version].clear()
+
+            self._inserted.clear()
+
+    def _remove(self, version: int, index: int) -> None:
+        start = self._starts[version].pop(index)
+        del self._ranges[version][index]
+        del self._inserted[(version, start)]
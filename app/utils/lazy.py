@@ -0,0 +1,57 @@
+"""
+Opt-in lazy construction of heavy API clients, enabled with `LAZY_CLIENTS=true`.
+
+By default clients are constructed when their module is imported, so misconfiguration fails the deploy instead of the
+first request. Celery workers and CLI invocations which never touch most clients pay for importing and constructing
+all of them on every cold start. With lazy clients, the SDK import and construction happen on first attribute access.
+
+Factories should import the SDK inside the factory, otherwise the import cost is paid either way.
+"""
+
+import threading
+from collections.abc import Callable
+from typing import Any, cast
+
+from app.env import env
+
+
+def is_lazy_clients() -> bool:
+    return env.bool("LAZY_CLIENTS", False)
+
+
+class LazyClient[T]:
+    """
+    Proxies attribute access to the client built by `factory` on first use.
+
+    The proxy is not an instance of the client class, so `isinstance` checks against it fail. Call `get()` when the
+    real client is required.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._client: T | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        state = "unloaded" if self._client is None else repr(self._client)
+        return f"LazyClient({self._factory.__qualname__}, {state})"
+
+
+def lazy_client[T](factory: Callable[[], T]) -> T:
+    "construct the client now, or on first use when lazy clients are enabled"
+
+    if not is_lazy_clients():
+        return factory()
+
+    return cast(T, LazyClient(factory))
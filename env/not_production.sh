@@ -40,6 +40,7 @@ REDIS_HOST="${REDIS_HOST:-redis.${SERVICES_HOST}}"
 DATABASE_HOST="${DATABASE_HOST:-postgres.${SERVICES_HOST}}"
 SMTP_HOST="${SMTP_HOST:-mailpit.${SERVICES_HOST}}"
 GEOIP_HOST="${GEOIP_HOST:-geoip.${SERVICES_HOST}}"
+DATABASE_POOLER_HOST="${DATABASE_POOLER_HOST:-pgbouncer.${SERVICES_HOST}}"
 
 # names are important here: pg_isready and docker configuration requires these
 # if you are not using docker for local postgres and redis, you can change these
@@ -30,7 +30,8 @@ from app import log
 from app.models import *
 from app.configuration.database import database_url
 
-config.set_main_option("sqlalchemy.url", database_url())
+# the advisory lock and `SET` statements below are session state, which a transaction pooler (PgBouncer) does not keep
+config.set_main_option("sqlalchemy.url", database_url(direct=True))
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -0,0 +1,31 @@
+"""user last_active_at index
+
+Revision ID: 43816cd25eaf
+Revises: 0782ae000489
+Create Date: 2026-10-19 14:02:11.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import activemodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '43816cd25eaf'
+down_revision: Union[str, None] = '0782ae000489'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # concurrent index creation cannot run inside a transaction and avoids locking writes to the user table
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('user_last_active_at_idx'), 'user', ['last_active_at'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('user_last_active_at_idx'), table_name='user', postgresql_concurrently=True, if_exists=True)
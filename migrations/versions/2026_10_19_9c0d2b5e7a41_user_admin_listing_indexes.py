@@ -0,0 +1,33 @@
+"""user admin listing indexes
+
+Revision ID: 9c0d2b5e7a41
+Revises: 43816cd25eaf
+Create Date: 2026-10-19 16:48:37.502113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import activemodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c0d2b5e7a41'
+down_revision: Union[str, None] = '43816cd25eaf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # concurrent index creation cannot run inside a transaction and avoids locking writes to the user table
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('user_role_id_idx'), 'user', ['role', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('user_email_pattern_idx'), 'user', ['email'], unique=False, postgresql_ops={'email': 'text_pattern_ops'}, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('user_email_pattern_idx'), table_name='user', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('user_role_id_idx'), table_name='user', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,22 @@
+from app.commands.benchmark_middleware import (
+    FULL_STACK,
+    NO_MIDDLEWARE,
+    layer_costs,
+    perform,
+)
+from app.routes.middleware import MIDDLEWARE_LAYERS
+
+
+def test_benchmark_middleware_covers_every_layer():
+    results = perform(iterations=5, warmup=1)
+
+    configurations = {result.configuration for result in results}
+    assert configurations == {
+        FULL_STACK,
+        NO_MIDDLEWARE,
+        *(f"-{layer}" for layer in MIDDLEWARE_LAYERS),
+    }
+
+    costs = layer_costs(results)
+    assert {cost.layer for cost in costs} == set(MIDDLEWARE_LAYERS)
+    assert len(costs) == len(MIDDLEWARE_LAYERS) * 2
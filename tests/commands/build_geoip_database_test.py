@@ -0,0 +1,33 @@
+from app.commands.build_geoip_database import perform
+from app.utils.geoip_database import GeoIPDatabase
+
+
+def test_build_geoip_database_joins_blocks_to_locations(tmp_path):
+    blocks_path = tmp_path / "GeoLite2-City-Blocks-IPv4.csv"
+    blocks_path.write_text(
+        "network,geoname_id,registered_country_geoname_id,represented_country_geoname_id,"
+        "is_anonymous_proxy,is_satellite_provider,postal_code,latitude,longitude,accuracy_radius\n"
+        "174.16.192.0/20,5419384,6252001,,0,0,80209,39.7067,-104.9694,20\n"
+        "1.0.0.0/24,,2077456,,0,0,,,,1000\n"
+    )
+
+    locations_path = tmp_path / "GeoLite2-City-Locations-en.csv"
+    locations_path.write_text(
+        "geoname_id,locale_code,continent_code,continent_name,country_iso_code,country_name,"
+        "subdivision_1_iso_code,subdivision_1_name,subdivision_2_iso_code,subdivision_2_name,"
+        "city_name,metro_code,time_zone,is_in_european_union\n"
+        "5419384,en,NA,North America,US,United States,CO,Colorado,,,Denver,751,America/Denver,0\n"
+    )
+
+    output_path = tmp_path / "geoip.db"
+
+    # the block without coordinates is skipped
+    assert perform([blocks_path], locations_path, output_path) == 1
+
+    location = GeoIPDatabase(output_path).lookup("174.16.202.210")
+
+    assert location is not None
+    assert location.city == "Denver"
+    assert location.stateprovCode == "CO"
+    assert location.usMetroCode == 751
+    assert location.accuracyRadius == 20
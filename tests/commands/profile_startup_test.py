@@ -0,0 +1,15 @@
+from app.commands.profile_startup import perform
+from app.startup_profile import UNATTRIBUTED_STEP
+
+
+def test_profile_startup_reports_every_setup_step():
+    report = perform()
+
+    step_names = [step.name for step in report.steps]
+    assert step_names[0] == "configure_logger"
+    assert "configure_database" in step_names
+    assert "import_commands_and_models" in step_names
+    assert step_names[-1] == UNATTRIBUTED_STEP
+
+    assert report.total_seconds > 0
+    assert any(module.name == "app.models.user" for module in report.modules)
@@ -12,6 +12,7 @@ import json
 
 from app.configuration.versions import (
     VERSIONS_FILE,
+    cached_service_versions,
     chrome_version,
     postgres_version,
     redis_version,
@@ -38,3 +39,19 @@ def test_chrome_version_matches_persisted_version():
     persisted_chrome_version = json.loads(VERSIONS_FILE.read_bytes())["chrome"]
 
     assert chrome_version() == persisted_chrome_version, VERSION_ERROR.format("chrome")
+
+
+def test_service_versions_are_cached_for_other_processes(monkeypatch):
+    from app.configuration import versions
+
+    live_versions = cached_service_versions()
+    assert live_versions == {"redis": redis_version(), "postgres": postgres_version()}
+
+    # a second lookup is answered from redis without querying either service
+    def fail(*args, **kwargs):
+        raise AssertionError("service was queried")
+
+    monkeypatch.setattr(versions, "redis_version", fail)
+    monkeypatch.setattr(versions, "postgres_version", fail)
+
+    assert cached_service_versions() == live_versions
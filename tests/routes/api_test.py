@@ -1,7 +1,11 @@
+import time
+
 from fastapi import status
 from fastapi.testclient import TestClient
 
 from app.generated.fastapi_typed_routes import api_app_url_path_for
+from app.lib.rate_limit import usage_for_day
+from app.routes.api import rate_limit_api_request
 
 from app.models.user import User
 
@@ -57,3 +61,46 @@ def test_authorized_api_credentials(client: TestClient):
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"status": "ok"}
+
+
+def test_api_rate_limit_headers(client: TestClient):
+    user = User(clerk_id="user_123").save()
+    user.generate_api_key()
+
+    response = client.get(
+        api_app_url_path_for("external_api_ping_external_v1_ping_get"),
+        headers={"Authorization": f"Bearer {user.api_key}"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ratelimit-limit"] == str(rate_limit_api_request.limit)
+    assert (
+        int(response.headers["ratelimit-remaining"]) == rate_limit_api_request.limit - 1
+    )
+    assert usage_for_day(str(user.id), time.strftime("%Y-%m-%d", time.gmtime())) == 1
+
+
+def test_api_rate_limit_exceeded(client: TestClient, monkeypatch):
+    monkeypatch.setattr(rate_limit_api_request, "limit", 2)
+
+    user = User(clerk_id="user_123").save()
+    user.generate_api_key()
+
+    def ping():
+        return client.get(
+            api_app_url_path_for("external_api_ping_external_v1_ping_get"),
+            headers={"Authorization": f"Bearer {user.api_key}"},
+        )
+
+    assert ping().status_code == status.HTTP_200_OK
+    assert ping().status_code == status.HTTP_200_OK
+
+    response = ping()
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.json()["error"]["code"] == "RATE_LIMITED"
+    assert response.headers["ratelimit-remaining"] == "0"
+    assert int(response.headers["retry-after"]) > 0
+
+    # throttled requests are not billed
+    assert usage_for_day(str(user.id), time.strftime("%Y-%m-%d", time.gmtime())) == 2
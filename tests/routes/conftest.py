@@ -4,10 +4,21 @@ import pytest
 from fastapi.testclient import TestClient
 from httpx2 import ASGITransport, AsyncClient
 
+from app.lib.user_activity import reset_user_activity_throttle
+from app.routes.utils.cache import clear_response_cache
+
 from tests.routes.clerk import MockAuthenticateRequest, get_valid_token
 from tests.routes.utils import base_server_url, bearer_headers
 
 
+@pytest.fixture(autouse=True)
+def clear_in_process_caches():
+    "redis is flushed before each test, but in-process state layered on top of redis is not"
+    clear_response_cache()
+    reset_user_activity_throttle()
+    yield
+
+
 @pytest.fixture
 def client(faker):
     "client to connect to your fastapi routes"
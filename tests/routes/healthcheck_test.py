@@ -4,8 +4,12 @@ which has caused lots of issues in the past.
 """
 
 from fastapi import status
+from whenever import Instant
 
 from app.generated.fastapi_typed_routes import api_app_url_path_for
+from app.lib.user_activity import record_user_activity
+
+from app.models.user import User
 
 
 async def test_healthcheck(aclient):
@@ -19,3 +23,34 @@ async def test_user_status(aclient):
 
     # should error since there are no users
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+async def test_user_status_is_cached(aclient):
+    User(clerk_id="user_123", last_active_at=Instant.now().to_system_tz()).save()
+
+    first = await aclient.get(api_app_url_path_for("active_user_status"))
+    second = await aclient.get(api_app_url_path_for("active_user_status"))
+
+    assert first.status_code == status.HTTP_200_OK
+    assert first.headers["x-cache"] == "MISS"
+
+    assert second.status_code == status.HTTP_200_OK
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+
+
+async def test_user_status_uses_activity_watermark(aclient):
+    # no users exist in the database, the watermark alone should satisfy the probe
+    record_user_activity()
+
+    response = await aclient.get(api_app_url_path_for("active_user_status"))
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+async def test_user_status_stale_activity_watermark(aclient):
+    record_user_activity(Instant.now().subtract(hours=25).timestamp())
+
+    response = await aclient.get(api_app_url_path_for("active_user_status"))
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
@@ -0,0 +1,85 @@
+from datetime import UTC, datetime
+from uuid import UUID
+
+import orjson
+from fastapi import APIRouter, FastAPI
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.routing import APIRoute, iter_route_contexts
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+from app.routes.utils.json_response import ORJSONRoute, ORJSONSortedResponse
+
+SAMPLE_UUID = UUID("0192b8f3-6a54-7c2e-9a4b-3f1d2c5e8a71")
+
+
+class Inner(BaseModel):
+    zebra: int
+    apple: int
+
+
+class Outer(BaseModel):
+    name: str
+    inner: Inner
+    renamed: str = Field(alias="renamedField")
+
+
+def test_model_is_rendered_in_field_order():
+    model = Outer(name="x", inner=Inner(zebra=1, apple=2), renamedField="y")
+
+    body = ORJSONSortedResponse(model).body
+
+    assert body == b'{"name":"x","inner":{"zebra":1,"apple":2},"renamedField":"y"}'
+
+
+def test_nested_models_are_rendered():
+    body = ORJSONSortedResponse(
+        {"items": [Inner(zebra=1, apple=2)], 1: "non-string key"}
+    ).body
+
+    assert orjson.loads(body) == {
+        "items": [{"zebra": 1, "apple": 2}],
+        "1": "non-string key",
+    }
+
+
+def test_routes_without_a_response_model_are_rendered_by_orjson():
+    router = APIRouter(route_class=ORJSONRoute)
+
+    @router.get("/untyped")
+    def untyped():
+        return {"at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=UTC), "id": SAMPLE_UUID}
+
+    @router.get("/typed")
+    def typed() -> Inner:
+        return Inner(zebra=1, apple=2)
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    response = client.get("/untyped")
+
+    assert response.content == (
+        b'{"at":"2024-01-02T03:04:05+00:00","id":"' + str(SAMPLE_UUID).encode() + b'"}'
+    )
+
+    # typed routes keep FastAPI's fast path, which requires the response class to be a default
+    typed_route = next(route for route in router.routes if route.path == "/typed")  # type: ignore[attr-defined]
+    assert isinstance(typed_route.response_class, DefaultPlaceholder)  # type: ignore[attr-defined]
+    assert client.get("/typed").content == b'{"zebra":1,"apple":2}'
+
+
+def test_every_api_route_renders_with_orjson():
+    from app.server import api_app
+
+    api_routes = [
+        ctx.original_route
+        for ctx in iter_route_contexts(api_app.routes)
+        if isinstance(ctx.original_route, APIRoute)
+        # static file routes are added to the app directly and always return a response
+        and ctx.original_route.include_in_schema
+    ]
+
+    assert api_routes
+    assert all(isinstance(route, ORJSONRoute) for route in api_routes)
@@ -1,9 +1,12 @@
+import json
+
 from fastapi import status
 from fastapi.testclient import TestClient
 
 from app.factories.clerk import get_clerk_admin_user, get_clerk_dev_user
 from app.generated.fastapi_typed_routes import api_app_url_path_for
 from app.routes.admin import SESSION_KEY_LOGIN_AS_USER
+from app.routes.utils.pagination import encode_cursor
 
 from app.models.user import User, UserRole
 
@@ -56,6 +59,131 @@ def test_user_list(client: TestClient):
     assert len(user_state["users"]) == users_to_create
     assert user_state["users"][-1]["email"] == "test2@example.com"
     assert user_state["users"][-1]["clerk_id"] == "user_2"
+    assert user_state["next_cursor"] is None
+
+
+def test_user_list_pagination(client: TestClient):
+    _, _, clerk_admin = get_clerk_admin_user()
+
+    for i in range(3):
+        User(email=f"test{i}@example.com", clerk_id=f"user_{i}").save()
+
+    response = client.get(
+        api_app_url_path_for("user_list"),
+        params={"limit": 2},
+        headers=clerk_authorization(clerk_admin),
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+
+    first_page = response.json()
+    assert [user["clerk_id"] for user in first_page["users"]] == ["user_0", "user_1"]
+    assert first_page["next_cursor"]
+
+    response = client.get(
+        api_app_url_path_for("user_list"),
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+        headers=clerk_authorization(clerk_admin),
+    )
+
+    second_page = response.json()
+    assert [user["clerk_id"] for user in second_page["users"]] == ["user_2"]
+    assert second_page["next_cursor"] is None
+
+    response = client.get(
+        api_app_url_path_for("user_list"),
+        params={"cursor": "not-a-cursor"},
+        headers=clerk_authorization(clerk_admin),
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_user_list_rejects_tampered_cursor(client: TestClient):
+    _, _, clerk_admin = get_clerk_admin_user()
+
+    user = User(email="test@example.com", clerk_id="user_0").save()
+
+    # well formed, but the values do not match the sort columns
+    for values in [
+        ["normal", "x"],
+        ["normal", 1],
+        ["superuser", str(user.id)],
+        ["normal", "user_01h45ytscbebyvny4gc8cr8ma2"],
+    ]:
+        response = client.get(
+            api_app_url_path_for("user_list"),
+            params={"cursor": encode_cursor(*values)},
+            headers=clerk_authorization(clerk_admin),
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["error"]["code"] == "INVALID_CURSOR"
+
+
+def test_user_list_search(client: TestClient):
+    _, _, clerk_admin = get_clerk_admin_user()
+
+    User(email="alice@example.com", clerk_id="user_alice").save()
+    User(email="bob@example.com", clerk_id="user_bob").save()
+    User(email="a_lice@example.com", clerk_id="user_underscore").save()
+
+    def search(term: str) -> list[str]:
+        response = client.get(
+            api_app_url_path_for("user_list"),
+            params={"search": term},
+            headers=clerk_authorization(clerk_admin),
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        return [user["clerk_id"] for user in response.json()["users"]]
+
+    assert search("ali") == ["user_alice"]
+    assert search("user_bob") == ["user_bob"]
+    # LIKE wildcards in the search term are matched literally
+    assert search("a_") == ["user_underscore"]
+
+    # search and pagination parameters are combined
+    response = client.get(
+        api_app_url_path_for("user_list"),
+        params={"search": "a", "limit": 1},
+        headers=clerk_authorization(clerk_admin),
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["users"]) == 1
+    assert response.json()["next_cursor"]
+
+
+def test_user_export(client: TestClient):
+    _, _, clerk_admin = get_clerk_admin_user()
+
+    users = [
+        User(email=f"test{i}@example.com", clerk_id=f"user_{i}").save()
+        for i in range(3)
+    ]
+
+    response = client.get(
+        api_app_url_path_for("user_export"),
+        headers=clerk_authorization(clerk_admin),
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["clerk_id"] for row in exported] == [
+        user.clerk_id for user in sorted(users, key=lambda user: str(user.id))
+    ]
+
+    # resuming after the first user skips it
+    response = client.get(
+        api_app_url_path_for("user_export"),
+        params={"after": exported[0]["id"]},
+        headers=clerk_authorization(clerk_admin),
+    )
+
+    assert len(response.text.splitlines()) == 2
 
 
 def test_login_as_authorized_good_credentials(client: TestClient):
@@ -0,0 +1,48 @@
+import pytest
+from pydantic import BaseModel
+
+from app.routes.utils.pydantic_lists import (
+    dump_json_list,
+    iter_dump_json_list,
+    iter_validate_json_list,
+    list_adapter,
+    validate_json_list,
+)
+
+
+class Item(BaseModel):
+    name: str
+    tags: list[str]
+
+
+ITEMS = [
+    Item(name='quoted "name", with ] brackets', tags=["a", "b"]),
+    Item(name="escaped \\ slash", tags=[]),
+    Item(name="plain", tags=["}"]),
+]
+
+
+def test_list_adapter_is_cached():
+    assert list_adapter(Item) is list_adapter(Item)
+
+
+def test_iter_dump_json_list_matches_dump_json_list():
+    streamed = b"".join(iter_dump_json_list(iter(ITEMS), batch_size=2))
+
+    assert streamed == dump_json_list(ITEMS)
+    assert b"".join(iter_dump_json_list([], Item)) == b"[]"
+
+
+def test_iter_validate_json_list_handles_arbitrary_chunks():
+    data = dump_json_list(ITEMS)
+    chunks = [data[i : i + 3] for i in range(0, len(data), 3)]
+
+    assert list(iter_validate_json_list(chunks, Item)) == ITEMS
+    assert validate_json_list(data, Item) == ITEMS
+
+
+def test_iter_validate_json_list_rejects_truncated_arrays():
+    data = dump_json_list(ITEMS)
+
+    with pytest.raises(ValueError):
+        list(iter_validate_json_list([data[:-1]], Item))
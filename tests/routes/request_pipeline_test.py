@@ -0,0 +1,139 @@
+import uuid
+
+from fastapi import status
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.generated.fastapi_typed_routes import api_app_url_path_for
+from app.routes.middleware import access_log, allowed_hosts
+from app.routes.middleware.cors import CORSPolicy
+from app.server import api_app
+
+
+async def test_request_id_is_generated(aclient):
+    response = await aclient.get(api_app_url_path_for("healthcheck"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert uuid.UUID(response.headers["x-request-id"])
+
+
+async def test_request_id_is_reused(aclient):
+    request_id = uuid.uuid4().hex
+
+    response = await aclient.get(
+        api_app_url_path_for("healthcheck"), headers={"X-Request-ID": request_id}
+    )
+
+    assert response.headers["x-request-id"] == request_id
+
+
+async def test_invalid_request_id_is_replaced(aclient):
+    response = await aclient.get(
+        api_app_url_path_for("healthcheck"), headers={"X-Request-ID": "not-a-uuid"}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["x-request-id"] != "not-a-uuid"
+
+
+async def test_untrusted_host_is_rejected(aclient):
+    response = await aclient.get(
+        api_app_url_path_for("healthcheck"), headers={"Host": "evil.example.com"}
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.text == "Invalid host header"
+    # security headers are still applied to rejected requests
+    assert "x-content-type-options" in response.headers
+
+
+async def test_cors_preflight(aclient):
+    origin = allowed_hosts(True)[0]
+
+    response = await aclient.options(
+        api_app_url_path_for("healthcheck"),
+        headers={
+            "Origin": origin,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type,authorization",
+        },
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["access-control-allow-origin"] == origin
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert (
+        response.headers["access-control-allow-headers"] == "content-type,authorization"
+    )
+    assert response.headers["vary"] == "Origin"
+    assert "x-content-type-options" in response.headers
+    assert "x-request-id" in response.headers
+
+
+async def test_cors_preflight_disallowed_origin(aclient):
+    response = await aclient.options(
+        api_app_url_path_for("healthcheck"),
+        headers={
+            "Origin": "https://evil.example.com",
+            "Access-Control-Request-Method": "GET",
+        },
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.text == "Disallowed CORS origin"
+    assert "access-control-allow-origin" not in response.headers
+
+
+async def test_cors_simple_response(aclient):
+    origin = allowed_hosts(True)[0]
+
+    response = await aclient.get(
+        api_app_url_path_for("healthcheck"), headers={"Origin": origin}
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["access-control-allow-origin"] == origin
+    assert "Origin" in response.headers["vary"]
+
+
+def test_cors_policy_any_port_origins():
+    policy = CORSPolicy(
+        allowed_origins=["https://example.com"],
+        any_port_origins=["http://localhost"],
+    )
+
+    assert policy.is_allowed_origin(b"https://example.com")
+    assert not policy.is_allowed_origin(b"https://example.com:8080")
+    assert policy.is_allowed_origin(b"http://localhost")
+    assert policy.is_allowed_origin(b"http://localhost:5173")
+    assert not policy.is_allowed_origin(b"https://localhost:5173")
+    assert not policy.is_allowed_origin(b"http://localhost.evil.com")
+
+
+def test_no_middleware_is_a_base_http_middleware():
+    assert all(
+        not issubclass(middleware.cls, BaseHTTPMiddleware)  # type: ignore[arg-type]
+        for middleware in api_app.user_middleware
+    )
+
+
+async def test_access_log(aclient, monkeypatch):
+    logged: list[tuple[str, dict]] = []
+
+    class RecordingLogger:
+        def info(self, message: str, **fields) -> None:
+            logged.append((message, fields))
+
+        debug = info
+
+    monkeypatch.setattr(access_log, "log", RecordingLogger())
+
+    path = api_app_url_path_for("healthcheck")
+    response = await aclient.get(path, params={"check": "1"})
+
+    assert response.status_code == status.HTTP_200_OK
+
+    [(message, fields)] = logged
+    assert message == f"200 GET {path}?check=1"
+    assert fields["status"] == 200
+    assert fields["path"] == path
+    assert fields["query"] == "check=1"
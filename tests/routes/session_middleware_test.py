@@ -0,0 +1,44 @@
+import time
+
+from fastapi import status
+
+from app.generated.fastapi_typed_routes import api_app_url_path_for
+from app.routes.middleware import SESSION_SECRET_KEY
+from app.routes.middleware.session import SessionSerializer
+
+
+def test_session_serializer_round_trip():
+    serializer = SessionSerializer(SESSION_SECRET_KEY)
+
+    cookie = serializer.dumps({"login_as": "user_123", "empty": None})
+    decoded = serializer.loads(cookie)
+
+    assert decoded
+    assert decoded[0] == {"login_as": "user_123", "empty": None}
+
+
+def test_session_serializer_rejects_invalid_cookies():
+    serializer = SessionSerializer(SESSION_SECRET_KEY)
+    cookie = serializer.dumps({"login_as": "user_123"})
+
+    tampered = cookie[:-4] + ("AAAA" if not cookie.endswith("AAAA") else "BBBB")
+
+    assert serializer.loads(tampered) is None
+    assert serializer.loads("not a cookie!") is None
+    assert SessionSerializer("another secret").loads(cookie) is None
+
+    expired = serializer.dumps(
+        {"login_as": "user_123"}, issued_at=int(time.time()) - serializer.max_age - 1
+    )
+    assert serializer.loads(expired) is None
+
+
+async def test_unused_session_is_not_reissued(aclient):
+    aclient.cookies.set(
+        "session", SessionSerializer(SESSION_SECRET_KEY).dumps({"login_as": None})
+    )
+
+    response = await aclient.get(api_app_url_path_for("unauthenticated_ping"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "set-cookie" not in response.headers
@@ -1,7 +1,5 @@
-import json
 import typing as t
 
-import itsdangerous
 from httpx2 import Response
 
 from app.env import env
@@ -45,15 +43,15 @@ def distribution_headers(distribution) -> dict[str, str]:
 def decode_cookie(response: Response):
     "decode a signed cookie into a dict for inspection and assertion"
     from app.routes.middleware import SESSION_SECRET_KEY
+    from app.routes.middleware.session import SessionSerializer
 
-    from tests.utils import starlette_session_decode
+    cookie_value = response.cookies.get("session")
 
-    signer = itsdangerous.Signer(SESSION_SECRET_KEY)
-    encrypted_cookie_value = response.cookies.get("session")
-
-    if not encrypted_cookie_value:
+    if not cookie_value:
         return {}
 
-    decoded = signer.unsign(encrypted_cookie_value)
-    session_data = json.loads(starlette_session_decode(decoded))
+    decoded = SessionSerializer(SESSION_SECRET_KEY).loads(cookie_value)
+    assert decoded, "session cookie is invalid"
+
+    session_data, _issued_at = decoded
     return session_data
@@ -0,0 +1,107 @@
+import json
+import sys
+
+import pytest
+
+from app import setup
+
+PACKAGE_NAME = "autoimport_fixture"
+
+
+@pytest.fixture
+def fixture_package(tmp_path, monkeypatch):
+    "a package which auto-imports its submodules, and records the order they are imported in"
+
+    package = tmp_path / PACKAGE_NAME
+    package.mkdir()
+
+    (package / "__init__.py").write_text(
+        "from app.setup import autoimport_submodules\n"
+        "IMPORTED = []\n"
+        "import os\n"
+        "autoimport_submodules(\n"
+        "    on_import=lambda name, module: IMPORTED.append(name),\n"
+        "    max_workers=int(os.environ.get('AUTOIMPORT_FIXTURE_WORKERS', '1')),\n"
+        "    deferred=os.environ.get('AUTOIMPORT_FIXTURE_DEFERRED') == '1',\n"
+        ")\n"
+    )
+    (package / "first.py").write_text("VALUE = 1\n")
+    (package / "second.py").write_text("VALUE = 2\n")
+
+    manifest_path = tmp_path / "autoimport_manifest.json"
+    monkeypatch.setattr(setup, "AUTOIMPORT_MANIFEST_PATH", manifest_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    setup._load_autoimport_manifest.cache_clear()
+
+    yield package
+
+    setup._load_autoimport_manifest.cache_clear()
+    for module_name in list(sys.modules):
+        if module_name.split(".")[0] == PACKAGE_NAME:
+            del sys.modules[module_name]
+
+
+def _import_fixture():
+    for module_name in list(sys.modules):
+        if module_name.split(".")[0] == PACKAGE_NAME:
+            del sys.modules[module_name]
+
+    return __import__(PACKAGE_NAME)
+
+
+def test_manifest_is_used_until_the_package_changes(fixture_package, monkeypatch):
+    setup.write_autoimport_manifest([PACKAGE_NAME])
+
+    manifest = json.loads(setup.AUTOIMPORT_MANIFEST_PATH.read_text())
+    assert manifest[PACKAGE_NAME]["modules"] == [
+        [f"{PACKAGE_NAME}.first", False],
+        [f"{PACKAGE_NAME}.second", False],
+    ]
+
+    walks = []
+    original_walk = setup._walk_submodules
+    monkeypatch.setattr(
+        setup,
+        "_walk_submodules",
+        lambda *args: walks.append(args) or original_walk(*args),
+    )
+
+    assert _import_fixture().IMPORTED == [
+        f"{PACKAGE_NAME}.first",
+        f"{PACKAGE_NAME}.second",
+    ]
+    assert walks == []
+
+    # a new module makes the manifest stale, so the package is walked instead
+    (fixture_package / "third.py").write_text("VALUE = 3\n")
+
+    assert _import_fixture().IMPORTED == [
+        f"{PACKAGE_NAME}.first",
+        f"{PACKAGE_NAME}.second",
+        f"{PACKAGE_NAME}.third",
+    ]
+    assert len(walks) == 1
+
+
+def test_parallel_imports_keep_discovery_order(fixture_package, monkeypatch):
+    monkeypatch.setenv("AUTOIMPORT_FIXTURE_WORKERS", "4")
+
+    assert _import_fixture().IMPORTED == [
+        f"{PACKAGE_NAME}.first",
+        f"{PACKAGE_NAME}.second",
+    ]
+
+
+def test_deferred_imports_on_attribute_access(fixture_package, monkeypatch):
+    monkeypatch.setenv("AUTOIMPORT_FIXTURE_DEFERRED", "1")
+
+    package = _import_fixture()
+    assert package.IMPORTED == []
+    assert f"{PACKAGE_NAME}.first" not in sys.modules
+
+    assert package.first.VALUE == 1
+    assert package.IMPORTED == [f"{PACKAGE_NAME}.first"]
+    assert "second" in dir(package)
+
+    with pytest.raises(AttributeError):
+        _ = package.missing
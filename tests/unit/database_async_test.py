@@ -0,0 +1,84 @@
+import pytest
+
+from app.configuration import database_async
+from app.configuration.database_async import (
+    aglobal_async_session,
+    dispose_async_engine,
+    get_async_engine,
+    get_async_session,
+)
+from app.configuration.database_pool import InstrumentedQueuePool
+
+from app.models.user import User
+from sqlalchemy import text
+
+
+@pytest.fixture
+async def async_transaction():
+    "the sync test transaction is not visible to the async engine, so async tests roll back their own"
+
+    async with get_async_engine().connect() as connection:
+        transaction = await connection.begin()
+        database_async.async_session_connection = connection
+
+        try:
+            yield connection
+        finally:
+            database_async.async_session_connection = None
+            await transaction.rollback()
+
+    await dispose_async_engine()
+
+
+async def test_async_engine_uses_instrumented_pool(async_transaction):
+    assert isinstance(get_async_engine().pool, InstrumentedQueuePool)
+
+    async with get_async_session() as session:
+        assert (await session.execute(text("SELECT 1"))).scalar() == 1
+
+
+async def test_async_model_helpers(async_transaction):
+    user = await User(clerk_id="user_async", email="async@example.com").asave()
+
+    assert user.id
+    assert user.created_at
+
+    assert (await User.aget(user.id)).email == "async@example.com"  # type: ignore[union-attr]
+    assert (await User.aone(clerk_id="user_async")).id == user.id
+    assert await User.aone_or_none(clerk_id="user_missing") is None
+    assert [found.id for found in await User.awhere(clerk_id="user_async")] == [user.id]
+
+
+async def test_async_model_helpers_accept_a_primary_key(async_transaction):
+    user = await User(clerk_id="user_async_id", email="async_id@example.com").asave()
+
+    assert [found.id for found in await User.awhere(user.id)] == [user.id]
+    assert [found.id for found in await User.awhere(str(user.id))] == [user.id]
+    assert (await User.aone_or_none(user.id)).id == user.id  # type: ignore[union-attr]
+    assert (await User.aone_or_none(str(user.id))).id == user.id  # type: ignore[union-attr]
+    assert (await User.aget(str(user.id))).id == user.id  # type: ignore[union-attr]
+
+
+async def test_async_save_runs_hooks(async_transaction):
+    with pytest.raises(ValueError, match="clerk_id must start with"):
+        await User(clerk_id="invalid").asave()
+
+
+async def test_aglobal_async_session_shares_session(async_transaction):
+    dependency = aglobal_async_session()
+    await anext(dependency)
+
+    async with get_async_session() as first, get_async_session() as second:
+        assert first is second
+
+    with pytest.raises(StopAsyncIteration):
+        await anext(dependency)
+
+
+async def test_server_lifespan_disposes_the_async_engine():
+    from app.server import api_app, lifespan
+
+    async with lifespan(api_app):
+        get_async_engine()
+
+    assert database_async._engine is None
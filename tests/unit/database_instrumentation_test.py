@@ -0,0 +1,61 @@
+import pytest
+
+from app.configuration.database_instrumentation import (
+    DATABASE_QUERY_BUDGET,
+    track_queries,
+)
+
+from activemodel.session_manager import get_engine, get_session
+from app.models.user import User
+from sqlalchemy import select, text
+from sqlalchemy.exc import ProgrammingError
+
+
+def test_track_queries_counts_statements_and_duplicates():
+    log_context = {}
+
+    with track_queries(log_context) as stats, get_session() as session:
+        for _ in range(3):
+            session.execute(select(User.id).where(User.clerk_id == "missing"))
+
+        session.execute(text("SELECT 1"))
+
+    assert stats.statements == 4
+    assert stats.duplicate_statements == 2
+    assert stats.seconds > 0
+    assert log_context["db_queries"] == 4
+    assert log_context["db_duplicate_queries"] == 2
+
+
+def test_track_queries_ignores_statements_outside_the_block():
+    with track_queries() as stats:
+        pass
+
+    with get_session() as session:
+        session.execute(text("SELECT 1"))
+
+    assert stats.statements == 0
+
+
+def test_query_budget():
+    with track_queries() as stats:
+        assert not stats.is_over_budget()
+
+        for i in range(DATABASE_QUERY_BUDGET + 1):
+            stats.record(f"SELECT {i}", 0.001)
+
+    assert stats.is_over_budget()
+    assert stats.duplicate_statements == 0
+
+
+def test_failed_statements_do_not_affect_later_timings():
+    with track_queries() as stats, get_engine().connect() as connection:
+        with pytest.raises(ProgrammingError):
+            connection.execute(text("SELECT missing_column FROM missing_table"))
+
+        connection.rollback()
+        connection.execute(text("SELECT 1"))
+
+    # the failed statement never finished, it is not counted
+    assert stats.statements == 1
+    assert 0 < stats.seconds < 1
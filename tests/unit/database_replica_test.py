@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from app.configuration import database_replica
+from app.configuration.database_replica import (
+    dispose_read_replica_engine,
+    get_read_replica_engine,
+    replica_session,
+)
+
+from sqlalchemy import select
+
+
+@pytest.fixture
+def read_replica(monkeypatch):
+    # the primary stands in for the replica, it is not in recovery so it never lags
+    monkeypatch.setenv(
+        "TEST_READ_REPLICA_DATABASE_URL", os.environ["TEST_DATABASE_URL"]
+    )
+    dispose_read_replica_engine()
+
+    yield get_read_replica_engine()
+
+    dispose_read_replica_engine()
+
+
+def test_replica_session_without_replica_uses_primary(monkeypatch):
+    monkeypatch.delenv("TEST_READ_REPLICA_DATABASE_URL", raising=False)
+
+    assert get_read_replica_engine() is None
+
+    with replica_session() as session:
+        assert session.scalar(select(1)) == 1
+
+
+def test_replica_session_uses_replica(read_replica):
+    with replica_session() as session:
+        assert session.get_bind() is read_replica
+        assert session.scalar(select(1)) == 1
+
+
+def test_replica_session_falls_back_when_lagging(read_replica, monkeypatch):
+    monkeypatch.setattr(database_replica, "replica_lag_seconds", lambda engine: 60.0)
+
+    with replica_session() as session:
+        assert session.get_bind() is not read_replica
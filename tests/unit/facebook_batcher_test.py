@@ -0,0 +1,174 @@
+import threading
+
+import pytest
+
+from app.helpers import facebook_batcher
+from app.helpers.facebook_batcher import ConversionEventBatcher
+
+
+class RecordingSender:
+    def __init__(self, failures: int = 0):
+        self.batches: list[tuple[list[dict], str | None]] = []
+        self.dead_letters: list[tuple[list[dict], str | None, Exception]] = []
+        self.failures = failures
+        self.sent = threading.Event()
+
+    def send(self, events: list[dict], test_event_code: str | None) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+
+        self.batches.append((events, test_event_code))
+        self.sent.set()
+
+    def dead_letter(
+        self, events: list[dict], test_event_code: str | None, error: Exception
+    ) -> None:
+        self.dead_letters.append((events, test_event_code, error))
+
+
+@pytest.fixture
+def build_batcher():
+    "batchers are closed after the test, so their threads do not outlive it"
+
+    batchers: list[ConversionEventBatcher] = []
+
+    def build(sender: RecordingSender, **kwargs) -> ConversionEventBatcher:
+        kwargs.setdefault("dead_letter", sender.dead_letter)
+        batcher = ConversionEventBatcher(
+            send=sender.send, retry_backoff_seconds=0, **kwargs
+        )
+        batchers.append(batcher)
+        return batcher
+
+    yield build
+
+    for batcher in batchers:
+        batcher.close()
+
+
+def test_full_batch_is_sent_without_waiting_for_the_interval(build_batcher):
+    sender = RecordingSender()
+    batcher = build_batcher(sender, max_batch_size=3, flush_interval_seconds=60)
+
+    for index in range(3):
+        batcher.add({"event_name": "PageView", "event_id": index})
+
+    assert sender.sent.wait(5)
+    assert sender.batches == [
+        ([{"event_name": "PageView", "event_id": index} for index in range(3)], None)
+    ]
+
+
+def test_partial_batch_is_sent_after_the_interval(build_batcher):
+    sender = RecordingSender()
+    batcher = build_batcher(sender, flush_interval_seconds=0.05)
+
+    batcher.add({"event_name": "Purchase"})
+
+    assert sender.sent.wait(5)
+    assert sender.batches == [([{"event_name": "Purchase"}], None)]
+
+
+def test_flush_splits_batches_by_size_and_test_event_code(build_batcher):
+    sender = RecordingSender()
+    batcher = build_batcher(sender, max_batch_size=2, flush_interval_seconds=60)
+
+    batcher.add({"event_id": 1}, "TEST123")
+    batcher.add({"event_id": 2})
+    batcher.add({"event_id": 3}, "TEST123")
+    batcher.add({"event_id": 4}, "TEST123")
+    batcher.flush()
+
+    assert sender.batches == [
+        ([{"event_id": 1}, {"event_id": 3}], "TEST123"),
+        ([{"event_id": 4}], "TEST123"),
+        ([{"event_id": 2}], None),
+    ]
+
+
+def test_failed_batch_is_retried_then_dead_lettered(build_batcher):
+    sender = RecordingSender(failures=1)
+    batcher = build_batcher(sender, flush_interval_seconds=60)
+
+    batcher.add({"event_id": 1})
+    batcher.flush()
+
+    assert sender.batches == [([{"event_id": 1}], None)]
+    assert sender.dead_letters == []
+
+    sender.failures = 3
+    batcher.add({"event_id": 2})
+    batcher.flush()
+
+    assert len(sender.batches) == 1
+    assert [events for events, _, _ in sender.dead_letters] == [[{"event_id": 2}]]
+
+
+def test_non_retryable_errors_are_dead_lettered_immediately(build_batcher):
+    sender = RecordingSender(failures=1)
+    batcher = build_batcher(
+        sender, is_retryable=lambda _: False, flush_interval_seconds=60
+    )
+
+    batcher.add({"event_id": 1})
+    batcher.flush()
+
+    assert sender.batches == []
+    assert len(sender.dead_letters) == 1
+    assert sender.failures == 0
+
+
+def test_events_past_the_queue_limit_are_dropped(build_batcher):
+    sender = RecordingSender()
+    batcher = build_batcher(sender, max_queue_size=1, flush_interval_seconds=60)
+
+    batcher.add({"event_id": 1})
+    batcher.add({"event_id": 2})
+    batcher.flush()
+
+    assert sender.batches == [([{"event_id": 1}], None)]
+
+
+def test_thread_keeps_sending_after_a_dead_letter_error(build_batcher):
+    sender = RecordingSender(failures=1)
+
+    def failing_dead_letter(events, test_event_code, error):
+        raise ConnectionError("redis is down")
+
+    batcher = build_batcher(
+        sender,
+        dead_letter=failing_dead_letter,
+        is_retryable=lambda _: False,
+        flush_interval_seconds=0.05,
+    )
+
+    batcher.add({"event_id": 1})
+    batcher.add({"event_id": 2})
+
+    # the first batch fails and its dead letter raises on the background thread
+    assert not sender.sent.wait(0.5)
+    assert sender.failures == 0
+
+    batcher.add({"event_id": 3})
+
+    assert sender.sent.wait(5)
+    assert sender.batches == [([{"event_id": 3}], None)]
+
+
+def test_close_sends_queued_events_and_stops_the_thread():
+    sender = RecordingSender()
+    batcher = ConversionEventBatcher(
+        send=sender.send, dead_letter=sender.dead_letter, flush_interval_seconds=60
+    )
+
+    batcher.add({"event_id": 1})
+    thread = batcher._thread
+    batcher.close()
+
+    assert sender.batches == [([{"event_id": 1}], None)]
+    assert thread is not None and not thread.is_alive()
+    assert batcher not in facebook_batcher._batchers
+
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.add({"event_id": 2})
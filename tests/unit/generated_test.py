@@ -4,6 +4,7 @@ import pytest
 
 from app.env import env
 from app.generated import fastapi_typed_routes, react_router_routes
+from app.setup import AUTOIMPORT_MANIFEST_PATH
 
 from tests.direnv import run_just_recipe
 
@@ -42,12 +43,14 @@ def test_generated_files_match_just_py_generate():
 
     fastapi_original_content = fastapi_target_file.read_text()
     react_router_original_content = react_router_target_file.read_text()
+    autoimport_manifest_original_content = AUTOIMPORT_MANIFEST_PATH.read_text()
 
     # This modifies the generated files in-place, so we can re-read them and make sure the content has not changed
     run_just_recipe("_py_generate")
 
     fastapi_new_content = fastapi_target_file.read_text()
     react_router_new_content = react_router_target_file.read_text()
+    autoimport_manifest_new_content = AUTOIMPORT_MANIFEST_PATH.read_text()
 
     if fastapi_new_content != fastapi_original_content:
         # Use pytest.fail instead of assert to avoid verbose diff output for large generated files
@@ -60,3 +63,8 @@ def test_generated_files_match_just_py_generate():
         pytest.fail(
             "React router routes do not match the generated file. Run:\njust py_generate"
         )
+
+    if autoimport_manifest_new_content != autoimport_manifest_original_content:
+        pytest.fail(
+            "Autoimport manifest does not match the generated file. Run:\njust py_generate"
+        )
@@ -1,10 +1,19 @@
 """Unit tests for the geoip client."""
 
+import asyncio
+
 import httpx2
 import pytest
 
+from app.configuration.redis import get_redis
 from app.utils import geoip
-from app.utils.geoip import GeoIPLocation, get_point_for_ip, lookup_ip_location
+from app.utils.geoip import (
+    GeoIPLocation,
+    alookup_ip_location,
+    get_point_for_ip,
+    lookup_ip_location,
+    lookup_many,
+)
 
 SAMPLE_IP = "174.16.202.210"
 SAMPLE_GEOIP_PAYLOAD = {
@@ -27,8 +36,10 @@ SAMPLE_GEOIP_PAYLOAD = {
 @pytest.fixture(autouse=True)
 def clear_geoip_cache():
     geoip._geoip_cache.clear()
+    geoip._geoip_network_cache.clear()
     yield
     geoip._geoip_cache.clear()
+    geoip._geoip_network_cache.clear()
 
 
 def test_geoip_location_model_parses_api_payload():
@@ -64,6 +75,202 @@ def test_lookup_ip_location_is_memoized(httpx2_mock):
     assert len(httpx2_mock.get_requests()) == 1
 
 
+def test_lookup_ip_location_is_shared_through_redis(httpx2_mock):
+    httpx2_mock.add_response(json=SAMPLE_GEOIP_PAYLOAD)
+
+    first = lookup_ip_location(SAMPLE_IP)
+
+    # another worker, with an empty in-process cache
+    geoip._geoip_cache.clear()
+    geoip._geoip_network_cache.clear()
+    second = lookup_ip_location(SAMPLE_IP)
+
+    assert second == first
+    assert len(httpx2_mock.get_requests()) == 1
+
+    ttl = get_redis().ttl(f"{geoip.GEOIP_REDIS_KEY_PREFIX}:{SAMPLE_IP}")
+    assert geoip.GEOIP_NEGATIVE_CACHE_TTL_SECONDS < ttl <= geoip.GEOIP_CACHE_TTL_SECONDS  # type: ignore[operator]
+
+
+def test_lookup_ip_location_is_cached_by_network(httpx2_mock):
+    httpx2_mock.add_response(
+        json=SAMPLE_GEOIP_PAYLOAD | {"asnNetwork": "174.16.202.0/24"}
+    )
+
+    first = lookup_ip_location(SAMPLE_IP)
+
+    # same /24, never looked up
+    assert lookup_ip_location("174.16.202.1") is first
+    assert lookup_ip_location("174.16.202.255") is first
+    assert len(httpx2_mock.get_requests()) == 1
+
+
+def test_lookup_ip_location_caches_broad_networks_by_ip_only(httpx2_mock):
+    # the sample payload is a /20, broader than a /24
+    httpx2_mock.add_response(json=SAMPLE_GEOIP_PAYLOAD)
+    httpx2_mock.add_response(json=SAMPLE_GEOIP_PAYLOAD)
+
+    lookup_ip_location(SAMPLE_IP)
+    lookup_ip_location(SAMPLE_IP)
+
+    assert len(geoip._geoip_network_cache) == 0
+    assert len(httpx2_mock.get_requests()) == 1
+
+    # another address in the same /20 is looked up on its own
+    lookup_ip_location("174.16.207.1")
+
+    assert len(httpx2_mock.get_requests()) == 2
+
+
+def test_ipv6_networks_broader_than_a_48_are_not_cached(httpx2_mock):
+    httpx2_mock.add_response(
+        json=SAMPLE_GEOIP_PAYLOAD | {"asnNetwork": "2001:db8::/32"}
+    )
+
+    lookup_ip_location("2001:db8::1")
+
+    assert len(geoip._geoip_network_cache) == 0
+
+
+def test_lookup_ip_location_caches_failures_briefly(httpx2_mock):
+    httpx2_mock.add_exception(httpx2.TimeoutException("timed out"))
+
+    assert lookup_ip_location("8.8.8.8") is None
+    assert lookup_ip_location("8.8.8.8") is None
+    assert len(httpx2_mock.get_requests()) == 1
+
+    ttl = get_redis().ttl(f"{geoip.GEOIP_REDIS_KEY_PREFIX}:8.8.8.8")
+    assert 0 < ttl <= geoip.GEOIP_NEGATIVE_CACHE_TTL_SECONDS  # type: ignore[operator]
+
+
+def test_invalid_redis_entries_are_looked_up_again(httpx2_mock):
+    key = f"{geoip.GEOIP_REDIS_KEY_PREFIX}:{SAMPLE_IP}"
+    get_redis().set(key, "[1,2]")
+    httpx2_mock.add_response(json=SAMPLE_GEOIP_PAYLOAD)
+
+    location = lookup_ip_location(SAMPLE_IP)
+
+    assert location is not None
+    assert len(httpx2_mock.get_requests()) == 1
+    assert geoip._deserialize_location(get_redis().get(key)) == location  # type: ignore[arg-type]
+
+
+async def test_lookup_many_skips_invalid_redis_entries(httpx2_mock):
+    get_redis().set(f"{geoip.GEOIP_REDIS_KEY_PREFIX}:{SAMPLE_IP}", "not json")
+    httpx2_mock.add_response(json=SAMPLE_GEOIP_PAYLOAD)
+
+    locations = await lookup_many([SAMPLE_IP])
+
+    assert locations[SAMPLE_IP] is not None
+    assert len(httpx2_mock.get_requests()) == 1
+
+
+def test_serialized_location_round_trips():
+    location = GeoIPLocation.model_validate(SAMPLE_GEOIP_PAYLOAD)
+    serialized = geoip._serialize_location(location)
+
+    assert geoip._deserialize_location(serialized) == location
+    assert len(serialized) < len(location.model_dump_json())
+    assert geoip._deserialize_location(geoip._serialize_location(None)) is None
+
+
+async def test_alookup_ip_location_coalesces_concurrent_lookups(httpx2_mock):
+    httpx2_mock.add_response(json=SAMPLE_GEOIP_PAYLOAD)
+
+    first, second, third = await asyncio.gather(
+        *(alookup_ip_location(SAMPLE_IP) for _ in range(3))
+    )
+
+    assert first is not None
+    assert first is second is third
+    assert len(httpx2_mock.get_requests()) == 1
+    assert geoip._in_flight_lookups[asyncio.get_running_loop()] == {}
+
+    # later lookups are served from the in-process cache
+    assert await alookup_ip_location(SAMPLE_IP) is first
+
+
+async def test_alookup_ip_location_returns_none_on_timeout(httpx2_mock):
+    httpx2_mock.add_exception(httpx2.TimeoutException("timed out"))
+
+    assert await alookup_ip_location("8.8.8.8") is None
+
+
+def test_lookup_ip_location_does_not_cache_pool_timeouts(httpx2_mock):
+    httpx2_mock.add_exception(httpx2.PoolTimeout("no free connection"))
+    httpx2_mock.add_response(json=SAMPLE_GEOIP_PAYLOAD)
+
+    assert lookup_ip_location(SAMPLE_IP) is None
+    assert get_redis().get(f"{geoip.GEOIP_REDIS_KEY_PREFIX}:{SAMPLE_IP}") is None
+
+    assert lookup_ip_location(SAMPLE_IP) is not None
+    assert len(httpx2_mock.get_requests()) == 2
+
+
+async def test_alookup_ip_location_does_not_cache_pool_timeouts(httpx2_mock):
+    httpx2_mock.add_exception(httpx2.PoolTimeout("no free connection"))
+    httpx2_mock.add_response(json=SAMPLE_GEOIP_PAYLOAD)
+
+    assert await alookup_ip_location(SAMPLE_IP) is None
+    assert await alookup_ip_location(SAMPLE_IP) is not None
+    assert len(httpx2_mock.get_requests()) == 2
+
+
+async def test_lookup_many_bounds_concurrent_requests(monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+
+    class SlowClient:
+        async def get(self, path: str) -> httpx2.Response:
+            nonlocal in_flight, max_in_flight
+
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+            return httpx2.Response(
+                200,
+                json=SAMPLE_GEOIP_PAYLOAD,
+                request=httpx2.Request("GET", f"{geoip.GEOIP_BASE_URL}{path}"),
+            )
+
+    loop = asyncio.get_running_loop()
+    monkeypatch.setattr(geoip, "GEOIP_MAX_CONNECTIONS", 3)
+    monkeypatch.setattr(geoip, "_async_geoip_client", SlowClient)
+    geoip._async_geoip_semaphores.pop(loop, None)
+
+    try:
+        locations = await lookup_many(f"10.0.0.{index}" for index in range(10))
+    finally:
+        geoip._async_geoip_semaphores.pop(loop, None)
+
+    assert len(locations) == 10
+    assert all(location is not None for location in locations.values())
+    assert max_in_flight == 3
+
+
+async def test_lookup_many_reads_each_cache_tier(httpx2_mock):
+    location = GeoIPLocation.model_validate(SAMPLE_GEOIP_PAYLOAD)
+
+    geoip._geoip_cache["1.1.1.1"] = None
+    get_redis().set(
+        f"{geoip.GEOIP_REDIS_KEY_PREFIX}:2.2.2.2", geoip._serialize_location(location)
+    )
+    httpx2_mock.add_response(json=SAMPLE_GEOIP_PAYLOAD)
+
+    locations = await lookup_many(["2.2.2.2", SAMPLE_IP, "1.1.1.1", SAMPLE_IP])
+
+    assert list(locations) == ["2.2.2.2", SAMPLE_IP, "1.1.1.1"]
+    assert locations["1.1.1.1"] is None
+    assert locations["2.2.2.2"] == location
+    assert locations[SAMPLE_IP] == location
+
+    requests = httpx2_mock.get_requests()
+    assert len(requests) == 1
+    assert requests[0].url.path == f"/{SAMPLE_IP}"
+
+
 def test_lookup_ip_location_returns_none_on_timeout(httpx2_mock):
     httpx2_mock.add_exception(httpx2.TimeoutException("timed out"))
 
@@ -0,0 +1,144 @@
+import pytest
+
+from app.utils import geoip
+from app.utils.geoip import GeoIPLocation, lookup_ip_location
+from app.utils.geoip_database import (
+    _HEADER,
+    _IPV4_RANGE,
+    MAGIC,
+    GeoIPDatabase,
+    GeoIPDatabaseError,
+    write_geoip_database,
+)
+
+DENVER = GeoIPLocation(
+    country="US",
+    stateprov="Colorado",
+    stateprovCode="CO",
+    city="Denver",
+    latitude=39.7067,
+    longitude=-104.9694,
+    timezone="America/Denver",
+    accuracyRadius=20,
+)
+BERLIN = GeoIPLocation(
+    country="DE",
+    city="Berlin",
+    latitude=52.52,
+    longitude=13.405,
+)
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    path = tmp_path / "geoip.db"
+
+    write_geoip_database(
+        path,
+        [
+            ("174.16.192.0/20", DENVER),
+            ("10.0.0.0/8", BERLIN),
+            ("174.16.224.0/24", DENVER),
+            ("2001:db8::/32", BERLIN),
+        ],
+    )
+
+    return path
+
+
+def test_lookup_finds_ipv4_and_ipv6_ranges(database_path):
+    database = GeoIPDatabase(database_path)
+
+    assert database.lookup("174.16.202.210") == DENVER
+    assert database.lookup("174.16.192.0") == DENVER
+    assert database.lookup("174.16.207.255") == DENVER
+    assert database.lookup("10.255.255.255") == BERLIN
+    assert database.lookup("2001:db8::1") == BERLIN
+
+    # ranges with the same location share a record
+    assert database.location_count == 2
+    assert database.lookup("174.16.224.1") is database.lookup("174.16.202.210")
+
+    database.close()
+
+
+def test_lookup_misses(database_path):
+    database = GeoIPDatabase(database_path)
+
+    assert database.lookup("9.255.255.255") is None
+    assert database.lookup("174.16.208.0") is None
+    assert database.lookup("255.255.255.255") is None
+    assert database.lookup("2001:db9::1") is None
+    assert database.lookup("not an ip") is None
+
+    database.close()
+
+
+def test_rejects_overlapping_networks(tmp_path):
+    with pytest.raises(GeoIPDatabaseError):
+        write_geoip_database(
+            tmp_path / "geoip.db",
+            [("10.0.0.0/8", BERLIN), ("10.1.0.0/16", DENVER)],
+        )
+
+
+def test_write_consumes_an_iterator(tmp_path):
+    path = tmp_path / "geoip.db"
+    ranges = iter([("174.16.192.0/20", DENVER), ("2001:db8::/32", BERLIN)])
+
+    assert write_geoip_database(path, ranges) == 2
+
+    database = GeoIPDatabase(path)
+    assert database.lookup("2001:db8::1") == BERLIN
+    database.close()
+
+
+def test_location_index_past_the_location_table_is_a_miss(tmp_path):
+    path = tmp_path / "geoip.db"
+    path.write_bytes(_HEADER.pack(MAGIC, 1, 0, 0) + _IPV4_RANGE.pack(0, 2**32 - 1, 0))
+
+    database = GeoIPDatabase(path)
+
+    assert database.lookup("10.0.0.1") is None
+
+    database.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "geoip.db"
+    path.write_bytes(b"not a geoip database")
+
+    with pytest.raises(GeoIPDatabaseError):
+        GeoIPDatabase(path)
+
+
+def test_lookup_ip_location_uses_local_database(
+    database_path, monkeypatch, httpx2_mock
+):
+    monkeypatch.setattr(geoip, "GEOIP_DATABASE_PATH", str(database_path))
+    geoip._local_database.cache_clear()
+
+    try:
+        assert lookup_ip_location("174.16.202.210") == DENVER
+        assert lookup_ip_location("9.9.9.9") is None
+        assert httpx2_mock.get_requests() == []
+    finally:
+        geoip._local_database.cache_clear()
+
+
+def test_lookup_ip_location_falls_back_to_api_without_database(
+    tmp_path, monkeypatch, httpx2_mock
+):
+    monkeypatch.setattr(geoip, "GEOIP_DATABASE_PATH", str(tmp_path / "missing.db"))
+    geoip._local_database.cache_clear()
+    geoip._geoip_cache.clear()
+    geoip._geoip_network_cache.clear()
+    httpx2_mock.add_response(json=DENVER.model_dump())
+
+    try:
+        assert lookup_ip_location("174.16.202.210") == DENVER
+        assert len(httpx2_mock.get_requests()) == 1
+    finally:
+        geoip._local_database.cache_clear()
+        geoip._geoip_cache.clear()
+        geoip._geoip_network_cache.clear()
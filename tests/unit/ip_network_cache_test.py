@@ -0,0 +1,56 @@
+import ipaddress
+
+from app.utils.ip_network_cache import IPNetworkCache
+
+
+def test_get_matches_any_address_in_the_network():
+    cache = IPNetworkCache[str](maxsize=10)
+    cache.set(ipaddress.ip_network("100.64.0.0/10"), "cgnat", ttl=60)
+    cache.set(ipaddress.ip_network("2001:db8::/64"), "ipv6", ttl=60)
+
+    assert cache.get("100.64.0.0") == "cgnat"
+    assert cache.get("100.127.255.255") == "cgnat"
+    assert cache.get("100.128.0.0") is None
+    assert cache.get("100.63.255.255") is None
+    assert cache.get("2001:db8::ffff:1") == "ipv6"
+    assert cache.get("2001:db8:0:1::1") is None
+    assert cache.get("not an ip") is None
+
+
+def test_overlapping_networks_replace_cached_networks():
+    cache = IPNetworkCache[str](maxsize=10)
+    cache.set(ipaddress.ip_network("10.0.0.0/24"), "a", ttl=60)
+    cache.set(ipaddress.ip_network("10.0.1.0/24"), "b", ttl=60)
+    cache.set(ipaddress.ip_network("10.0.2.0/24"), "c", ttl=60)
+
+    cache.set(ipaddress.ip_network("10.0.0.0/23"), "wide", ttl=60)
+
+    assert len(cache) == 2
+    assert cache.get("10.0.0.1") == "wide"
+    assert cache.get("10.0.1.1") == "wide"
+    assert cache.get("10.0.2.1") == "c"
+
+    cache.set(ipaddress.ip_network("10.0.1.0/24"), "narrow", ttl=60)
+
+    assert cache.get("10.0.0.1") is None
+    assert cache.get("10.0.1.1") == "narrow"
+
+
+def test_expired_networks_miss():
+    cache = IPNetworkCache[str](maxsize=10)
+    cache.set(ipaddress.ip_network("10.0.0.0/24"), "a", ttl=0)
+
+    assert cache.get("10.0.0.1") is None
+    assert len(cache) == 0
+
+
+def test_oldest_network_is_evicted():
+    cache = IPNetworkCache[str](maxsize=2)
+    cache.set(ipaddress.ip_network("10.0.2.0/24"), "first", ttl=60)
+    cache.set(ipaddress.ip_network("10.0.0.0/24"), "second", ttl=60)
+    cache.set(ipaddress.ip_network("10.0.1.0/24"), "third", ttl=60)
+
+    assert len(cache) == 2
+    assert cache.get("10.0.2.1") is None
+    assert cache.get("10.0.0.1") == "second"
+    assert cache.get("10.0.1.1") == "third"
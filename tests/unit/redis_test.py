@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+import redis
+from redis.exceptions import ConnectionError
+
+from app.configuration.redis import (
+    InstrumentedConnectionPool,
+    _PoolMetricsMixin,
+    get_async_redis,
+    get_redis,
+    redis_pipeline,
+    redis_pool_metrics,
+    redis_url,
+)
+
+
+def test_get_redis_shares_an_instrumented_pool():
+    client = get_redis()
+
+    assert client is get_redis()
+    assert isinstance(client.connection_pool, InstrumentedConnectionPool)
+    assert client.ping()
+
+    (metrics,) = [pool for pool in redis_pool_metrics() if not pool.asyncio]
+    assert metrics.in_use == 0
+    assert metrics.idle >= 1
+    assert "@" not in metrics.server
+
+
+def test_pools_must_report_usage():
+    class UninstrumentedPool(_PoolMetricsMixin, redis.BlockingConnectionPool):
+        pass
+
+    with pytest.raises(TypeError, match="_usage"):
+        UninstrumentedPool()
+
+
+def test_redis_pipeline():
+    with redis_pipeline() as pipe:
+        pipe.set("pipelined", 1).incr("pipelined")
+        assert pipe.execute() == [True, 2]
+
+
+def test_pool_exhaustion_is_counted():
+    pool = InstrumentedConnectionPool.from_url(
+        redis_url(), max_connections=1, timeout=0.05
+    )
+    connection = pool.get_connection()
+
+    assert pool.metrics().in_use == 1
+
+    with pytest.raises(ConnectionError):
+        pool.get_connection()
+
+    assert pool.metrics().exhausted == 1
+
+    pool.release(connection)
+    assert pool.metrics().idle == 1
+    pool.disconnect()
+
+
+def test_exhausted_pool_waits_for_a_connection():
+    pool = InstrumentedConnectionPool.from_url(
+        redis_url(), max_connections=1, timeout=5
+    )
+    connection = pool.get_connection()
+
+    release = threading.Timer(0.05, pool.release, args=[connection])
+    release.start()
+
+    # blocks until the other checkout is released instead of failing
+    assert pool.get_connection() is connection
+    assert pool.metrics().exhausted == 0
+
+    release.join()
+    pool.release(connection)
+    pool.disconnect()
+
+
+async def test_get_async_redis_shares_a_pool_per_loop():
+    client = get_async_redis()
+
+    assert client is get_async_redis()
+    assert await client.ping()
+    assert any(pool.asyncio for pool in redis_pool_metrics())
+
+    await client.connection_pool.disconnect()
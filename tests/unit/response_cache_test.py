@@ -0,0 +1,23 @@
+import time
+
+from app.configuration.redis import get_redis
+from app.routes.utils import cache
+
+
+def test_redis_entry_shorter_than_the_header_is_a_miss():
+    key = f"{cache.CACHE_KEY_PREFIX}:test:/short"
+    get_redis().set(key, b"abc", px=10_000)
+
+    assert cache._redis_get(key) is None
+
+
+def test_redis_entry_round_trips():
+    key = f"{cache.CACHE_KEY_PREFIX}:test:/round-trip"
+    fresh_until = 1_000_000.0
+
+    cache._redis_set(key, (fresh_until, time.time() + 10, b'{"ok":true}'))
+    entry = cache._redis_get(key)
+
+    assert entry is not None
+    assert entry[0] == fresh_until
+    assert entry[2] == b'{"ok":true}'
@@ -0,0 +1,55 @@
+import sys
+
+from app.startup_profile import UNATTRIBUTED_STEP, StartupProfiler
+from app.utils.lazy import LazyClient
+
+
+def test_startup_profiler_attributes_imports_to_steps(tmp_path, monkeypatch):
+    (tmp_path / "startup_profile_parent.py").write_text(
+        "import startup_profile_child\n"
+    )
+    (tmp_path / "startup_profile_child.py").write_text("VALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = StartupProfiler()
+
+    try:
+        with profiler.step("import parent"):
+            import startup_profile_parent  # noqa: F401
+
+        with profiler.step("no imports"):
+            pass
+    finally:
+        report = profiler.stop()
+        sys.modules.pop("startup_profile_parent", None)
+        sys.modules.pop("startup_profile_child", None)
+
+    steps = {step.name: step for step in report.steps}
+    assert steps["import parent"].modules_imported == 2
+    assert steps["import parent"].import_seconds > 0
+    assert steps["no imports"].modules_imported == 0
+    assert UNATTRIBUTED_STEP in steps
+
+    modules = {module.name: module for module in report.modules}
+    parent = modules["startup_profile_parent"]
+    child = modules["startup_profile_child"]
+    assert parent.cumulative_seconds >= child.cumulative_seconds
+    assert parent.self_seconds <= parent.cumulative_seconds - child.cumulative_seconds
+
+    # the import hook is removed once the profile is complete
+    assert not any(type(finder).__name__ == "_ImportTimer" for finder in sys.meta_path)
+
+
+def test_lazy_client_constructs_on_first_use():
+    constructed = []
+
+    def factory():
+        constructed.append(True)
+        return "client"
+
+    client = LazyClient(factory)
+    assert constructed == []
+
+    assert client.upper() == "CLIENT"
+    assert client.get() == "client"
+    assert constructed == [True]
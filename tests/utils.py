@@ -28,21 +28,6 @@ def base64_decode(original_b64_string: str | bytes, url_safe: bool = False) -> b
     return base64.b64decode(b64_string)
 
 
-def starlette_session_decode(decoded_signed_value: bytes) -> bytes:
-    """
-    Specifically handles decoding the payload from a Starlette session cookie.
-
-    Starlette 1.0.0 uses TimestampSigner which includes a dot-separated timestamp
-    after the base64-encoded data.
-    """
-
-    data = decoded_signed_value
-    if b"." in data:
-        data = data.split(b".")[0]
-
-    return base64_decode(data, url_safe=True)
-
-
 def get_public_ip_address() -> str | None:
     """
     Get the current public IP address of this server. Helpful when you have geolocation stuff that is
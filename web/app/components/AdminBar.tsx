@@ -1,7 +1,8 @@
-import { useState } from "react"
+import { type FormEvent, useState } from "react"
 import { href } from "react-router"
 
 import { Button } from "@/components/ui/button"
+import { Input } from "@/components/ui/input"
 import {
   Select,
   SelectContent,
@@ -10,19 +11,44 @@ import {
   SelectValue,
 } from "@/components/ui/select"
 import { getClient } from "~/configuration/clerk"
-import { loginAsUser } from "~/configuration/client"
+import { loginAsUser, userList } from "~/configuration/client"
 
-import { useQuery } from "@tanstack/react-query"
-import { userListOptions } from "client/@tanstack/react-query.gen"
+import { keepPreviousData, useInfiniteQuery } from "@tanstack/react-query"
 
 function AdminBar() {
   const [selectedUser, setSelectedUser] = useState("")
-  const { data, error } = useQuery({ ...userListOptions() })
+  const [searchInput, setSearchInput] = useState("")
+  const [search, setSearch] = useState("")
+
+  // the user list is paginated, later pages are fetched with the previous page's `next_cursor`
+  const { data, error, fetchNextPage, hasNextPage, isFetchingNextPage } =
+    useInfiniteQuery({
+      queryKey: ["userList", search],
+      queryFn: async ({ pageParam }) => {
+        const { data } = await userList({
+          query: { search: search || undefined, cursor: pageParam },
+          throwOnError: true,
+        })
+        return data
+      },
+      initialPageParam: undefined as string | undefined,
+      getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
+      // keep the bar rendered while a new search is loading
+      placeholderData: keepPreviousData,
+    })
 
   if (!data || error) {
     return
   }
 
+  const currentUser = data.pages[0]?.current_user
+  const users = data.pages.flatMap((page) => page.users)
+
+  const handleSearch = (event: FormEvent<HTMLFormElement>) => {
+    event.preventDefault()
+    setSearch(searchInput.trim())
+  }
+
   const handleLoginAs = async () => {
     if (!selectedUser) return
 
@@ -40,24 +66,43 @@ function AdminBar() {
 
   return (
     <div className="fixed top-0 left-0 z-50 flex w-full items-center space-x-2 bg-white p-1 text-xs shadow">
-      {data.current_user && (
+      {currentUser && (
         <div className="whitespace-nowrap">
-          Clerk: {data.current_user.clerk_id} ID: {data.current_user.id} Email:{" "}
-          {data.current_user.email}
+          Clerk: {currentUser.clerk_id} ID: {currentUser.id} Email:{" "}
+          {currentUser.email}
         </div>
       )}
+      <form onSubmit={handleSearch} className="ml-3">
+        <Input
+          value={searchInput}
+          onChange={(event) => setSearchInput(event.target.value)}
+          placeholder="Email or Clerk ID"
+          className="h-6 w-48 text-xs"
+        />
+      </form>
       <Select value={selectedUser} onValueChange={setSelectedUser}>
         <SelectTrigger className="ml-3 h-2 w-40 text-sm">
           <SelectValue placeholder="Select user" />
         </SelectTrigger>
         <SelectContent>
-          {data.users.map((user) => (
+          {users.map((user) => (
             <SelectItem key={user.clerk_id} value={user.clerk_id}>
               {user.email} {user.clerk_id}
             </SelectItem>
           ))}
         </SelectContent>
       </Select>
+      {hasNextPage && (
+        <Button
+          onClick={() => fetchNextPage()}
+          disabled={isFetchingNextPage}
+          size="sm"
+          variant="link"
+          className="h-2"
+        >
+          Load More
+        </Button>
+      )}
       <Button
         onClick={handleLoginAs}
         disabled={!selectedUser}
@@ -67,7 +112,7 @@ function AdminBar() {
       >
         Switch User
       </Button>
-      {data.current_user && (
+      {currentUser && (
         <Button
           onClick={handleLogout}
           size="sm"